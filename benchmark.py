@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Stage-level benchmark suite for reliability_model3_draft_18Mar2020.py
+on synthetic fleets (see fleet.py).
+
+Each stage of the pipeline is timed on its own, at several fleet sizes:
+    ingest          structure query on a SQLite data source (datasource.py)
+    factors         Pronto-theme factors (factors.ComputeThemeFactors)
+    distribution    mean_/stddev_ parameters (fragility.ComputeDistributionParameters)
+    sweep           p_f at every wind speed of the grid (0-120 mph, 1 mph steps)
+    csv_write       the df0_calculations.csv output
+    db_write        the test_Reliability output with the bulk writer (dbwriter.py)
+                    to a SQLite file
+Every stage runs `repeat` times on the same inputs; the fastest run is the
+stage's time (the others only measure noise) and the median is reported
+alongside. Results are written as JSON, and can be compared with a stored
+baseline: a stage is a regression when its time exceeds the baseline's by
+more than the tolerance.
+
+Key functions:
+RunBenchmarks - Time every stage at each fleet size; returns the results
+            record (a dict).
+CompareWithBaseline - Regressions of a results record against a baseline.
+
+Run as a script:
+    python benchmark.py [--sizes 10000 100000] [--repeat 3] [--output benchmark_results.json]
+                        [--baseline baseline.json] [--tolerance 0.25]
+Exits with status 1 when a stage regressed against the baseline.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import datasource
+import factors
+import fleet
+import fragility
+import tables
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+STAGES = ['ingest', 'factors', 'distribution', 'sweep', 'csv_write', 'db_write']
+FLEET_SIZES = [10000, 100000]
+REPEAT = 3
+TOLERANCE = 0.25        # Allowed slowdown against the baseline (0.25 = 25 %).
+SEED = 0
+RESULTS_VERSION = 1
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _TimeStage(function, repeat):
+
+    #********************************************************************#
+    # Purpose: To run function repeat times. Returns (fastest seconds,  #
+    #          median seconds, result of the last run).                 #
+    #********************************************************************#
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+
+    return min(seconds), float(np.median(seconds)), result
+
+
+def _WriteDB(path, df_output):
+
+    #********************************************************************#
+    # Purpose: To write df_output to test_Reliability in a SQLite file  #
+    #          with the bulk writer (sqlalchemy imported here, so the   #
+    #          other stages run without it).                            #
+    #********************************************************************#
+    import dbwriter
+    from sqlalchemy import create_engine
+
+    engine = create_engine('sqlite:///' + path)
+    try:
+        writer = dbwriter.OpenBulkWriter(engine, 'test_Reliability')
+        dbwriter.WriteBulkChunk(writer, df_output)
+        dbwriter.CommitBulkWriter(writer)
+    finally:
+        engine.dispose()
+
+
+def _BenchmarkFleet(n_structures, repeat, directory, wspeeds):
+
+    #********************************************************************#
+    # Purpose: To time every stage on a fleet of n_structures. Returns  #
+    #          one result dict per stage.                               #
+    #********************************************************************#
+    mce_scores = factors.CompileMCEScores(tables.MCECorrosionScores().set_index('ROW_LABELS'))
+    parameters = tables.SYNTHETIC_PARAMETERS # The production parameters module needs the database configuration.
+    df_reliability_calcs_constants = tables.ReliabilityCalcsConstants(parameters)
+    now_year = datetime.datetime.now().year
+    run_datetime = datetime.datetime.now()
+
+    source = fleet.WriteFleetSQLite(os.path.join(directory, 'fleet_%d.sqlite' % n_structures), n_structures, SEED)
+    stages = {}
+
+    def Ingest():
+        datasource.CloseDataSource(source)  # Each run opens its own connection, as a run does.
+        return datasource.ReadStructures(source)
+    stages['ingest'] = _TimeStage(Ingest, repeat)
+    datasource.CloseDataSource(source)
+    df0 = stages['ingest'][2]
+
+    stages['factors'] = _TimeStage(lambda: factors.ComputeThemeFactors(df0, df_reliability_calcs_constants, mce_scores,
+                                                                       parameters.steel_pronto_themes, now_year,
+                                                                       parameters.r_spl, parameters.r_cor), repeat)
+    df0 = pd.concat([df0, stages['factors'][2]], axis=1)
+
+    stages['distribution'] = _TimeStage(lambda: fragility.ComputeDistributionParameters(df0, parameters.mu_steel, parameters.mu_wood), repeat)
+    df0 = pd.concat([df0, stages['distribution'][2]], axis=1)
+
+    component_parameters = fragility.ComponentParameters(df0)
+    stages['sweep'] = _TimeStage(lambda: fragility.ComputeProbabilityFailureMatrix(wspeeds, component_parameters), repeat)
+
+    df_output = pd.concat([df0.drop(columns=tables.DROP_LIST),
+                           fragility.ProbabilityFailureFrame(stages['sweep'][2], wspeeds, index=df0.index)], axis=1)
+    df_output['DATETIME'] = run_datetime
+    csv_path = os.path.join(directory, 'df0_calculations.csv')
+    stages['csv_write'] = _TimeStage(lambda: df_output.to_csv(csv_path), repeat)
+    db_path = os.path.join(directory, 'test_Reliability_%d.sqlite' % n_structures)
+    stages['db_write'] = _TimeStage(lambda: _WriteDB(db_path, df_output), repeat)
+
+    results = []
+    for stage in STAGES:
+        seconds, seconds_median = stages[stage][:2]
+        results.append({'n_structures': n_structures,
+                        'stage': stage,
+                        'seconds': seconds,
+                        'seconds_median': seconds_median,
+                        'structures_per_second': n_structures/seconds if seconds > 0 else None})
+        print("%9d  %-12s %9.3f s %9.3f s %12.0f /s" % (n_structures, stage, seconds, seconds_median,
+                                                       n_structures/seconds if seconds > 0 else float('nan')))
+
+    return results
+
+
+def RunBenchmarks(fleet_sizes=FLEET_SIZES, repeat=REPEAT, wspeeds=None):
+
+    #********************************************************************#
+    # Purpose: To benchmark every stage at each fleet size (default     #
+    #          wind-speed grid 0-120 mph in 1 mph steps). Returns the   #
+    #          results record: environment details plus one entry per  #
+    #          fleet size and stage.                                    #
+    #********************************************************************#
+    if wspeeds is None:
+        wspeeds = fragility.WindSpeedGrid()
+    print("structures  stage        fastest    median    structures")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n_structures in fleet_sizes:
+            results.extend(_BenchmarkFleet(n_structures, repeat, directory, wspeeds))
+
+    return {'version': RESULTS_VERSION,
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'environment': {'python': platform.python_version(),
+                            'numpy': np.__version__,
+                            'pandas': pd.__version__,
+                            'platform': platform.platform(),
+                            'cpu_count': os.cpu_count()},
+            'seed': SEED,
+            'repeat': repeat,
+            'n_speeds': len(wspeeds),
+            'results': results}
+
+
+def CompareWithBaseline(record, baseline, tolerance=TOLERANCE):
+
+    #********************************************************************#
+    # Purpose: To compare each (fleet size, stage) of record with the   #
+    #          same entry of baseline. Returns the regressions (entries #
+    #          slower than baseline*(1 + tolerance)) as a list of dicts #
+    #          with both times and the ratio.                           #
+    #********************************************************************#
+    if baseline.get('n_speeds') != record.get('n_speeds'):
+        raise ValueError("Baseline has %s wind speeds, results have %s" % (baseline.get('n_speeds'), record.get('n_speeds')))
+
+    baseline_seconds = {(entry['n_structures'], entry['stage']): entry['seconds'] for entry in baseline['results']}
+    regressions = []
+    for entry in record['results']:
+        key = (entry['n_structures'], entry['stage'])
+        if key not in baseline_seconds or baseline_seconds[key] <= 0:
+            continue
+        ratio = entry['seconds']/baseline_seconds[key]
+        if ratio > 1 + tolerance:
+            regressions.append({'n_structures': key[0], 'stage': key[1], 'seconds': entry['seconds'],
+                                'baseline_seconds': baseline_seconds[key], 'ratio': ratio})
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stage-level benchmarks on synthetic fleets.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=FLEET_SIZES, help="fleet sizes (structures)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="runs per stage (fastest is kept)")
+    parser.add_argument('--output', default='benchmark_results.json', help="results file (JSON)")
+    parser.add_argument('--baseline', help="results file to compare with")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="allowed slowdown, e.g. 0.25 for 25%%")
+    arguments = parser.parse_args()
+
+    record = RunBenchmarks(arguments.sizes, arguments.repeat)
+    with open(arguments.output, 'w') as results_file:
+        json.dump(record, results_file, indent=1)
+    print("Results written to", arguments.output)
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as baseline_file:
+            regressions = CompareWithBaseline(record, json.load(baseline_file), arguments.tolerance)
+        for regression in regressions:
+            print("REGRESSION %(stage)s at %(n_structures)d structures: %(seconds).3f s vs %(baseline_seconds).3f s (x%(ratio).2f)" % regression)
+        if regressions:
+            sys.exit(1)
+        print("No stage slower than the baseline by more than %d%%" % round(100*arguments.tolerance))
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Command-line entry point of the reliability model (model.RunModel),
+so production runs are sized and routed per job without editing the INPUT
+section of reliability_model3_draft_18Mar2020.py.
+
+Every option sets one run setting (model.DEFAULT_SETTINGS); options left out
+keep their default, which is the INPUT section's value when run through the
+script. Combinations a run cannot honour (forecast mode with the database,
+Parquet, curve store or incremental cache outputs; --sqlite with another
+source) are rejected with a usage error. Options:
+    input       --source sqlserver|sqlite, --sqlite PATH
+    outputs     --csv/--no-csv, --parquet [PATH]/--no-parquet, --db/--no-db,
+                --db-url URL, --mmap [DIR]/--no-mmap (memory-mapped p_f curve
+                store), --metrics PATH/--no-metrics
+    grid        --wspeed-start, --wspeed-stop, --wspeed-step (mph) or
+                --wspeeds S1 S2 ...
+    sizing      --chunk-size ROWS (structures pulled per query chunk),
+                --workers N, --memory-budget MB (p_f working arrays)
+    modes       --forecast CSV [--forecast-key KEY], --incremental-cache PATH,
+                --profile [DIR], --compact, --float32
+
+Key functions:
+BuildParser - The argument parser, with defaults from a settings dict.
+ParseSettings - Run settings from a command line.
+Main - Parse a command line and run the model.
+
+Run as a script:
+    python cli.py --source sqlite --sqlite fleet.sqlite --chunk-size 100000 --workers 4 --parquet
+    python reliability_model3_draft_18Mar2020.py [options]   (same options)
+"""
+
+import argparse
+import sys
+
+import fragility
+import model
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+DIRNAME_PROFILE = 'reliability_profile' # --profile without a directory
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _PositiveInt(text):
+
+    #********************************************************************#
+    # Purpose: argparse type for counts that must be at least 1.        #
+    #********************************************************************#
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("expected a positive integer, got %s" % text)
+    return value
+
+
+def _PositiveFloat(text):
+
+    #********************************************************************#
+    # Purpose: argparse type for sizes that must be above 0.            #
+    #********************************************************************#
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError("expected a positive number, got %s" % text)
+    return value
+
+
+def BuildParser(defaults=None):
+
+    #********************************************************************#
+    # Purpose: To build the argument parser; defaults (a settings dict, #
+    #          model.DEFAULT_SETTINGS for the keys left out) are the    #
+    #          values of the options not given.                        #
+    #********************************************************************#
+    defaults = dict(model.DEFAULT_SETTINGS, **(defaults or {}))
+    parser = argparse.ArgumentParser(description="Fragility curve reliability model: p_f of every structure over a wind-speed grid.")
+
+    group = parser.add_argument_group('input')
+    group.add_argument('--source', dest='data_source', choices=['sqlserver', 'sqlite'], default=defaults['data_source'],
+                       help="structure/line data source (default %(default)s)")
+    group.add_argument('--sqlite', dest='filename_sqlite', metavar='PATH', default=None,
+                       help="SQLite file of the sqlite source (default %s)" % defaults['filename_sqlite'])
+
+    group = parser.add_argument_group('outputs')
+    group.add_argument('--csv', dest='write_csv', action=argparse.BooleanOptionalAction, default=defaults['write_csv'],
+                       help="write %s and %s" % (model.FILENAME_CSV, model.FILENAME_LINE_CSV))
+    group.add_argument('--parquet', dest='filename_parquet', metavar='PATH', nargs='?', const=defaults['filename_parquet'],
+                       default=defaults['filename_parquet'] if defaults['write_parquet'] else None,
+                       help="write a Parquet dataset partitioned by line (default path %s)" % defaults['filename_parquet'])
+    group.add_argument('--no-parquet', dest='filename_parquet', action='store_const', const=None,
+                       help="do not write the Parquet dataset")
+    group.add_argument('--db', dest='write_db', action=argparse.BooleanOptionalAction, default=None,
+                       help="write the %s table (the Exponent database unless --db-url; default %s)" % (model.DB_TABLE, defaults['write_db']))
+    group.add_argument('--db-url', dest='db_url', metavar='URL', default=defaults['db_url'],
+                       help="SQLAlchemy URL of the output database (implies --db)")
+    group.add_argument('--mmap', dest='dirname_curve_store', metavar='DIR', nargs='?', const=defaults['dirname_curve_store'],
+                       default=defaults['dirname_curve_store'] if defaults['write_curve_store'] else None,
+                       help="write the memory-mapped p_f curve store (default directory %s)" % defaults['dirname_curve_store'])
+    group.add_argument('--no-mmap', dest='dirname_curve_store', action='store_const', const=None,
+                       help="do not write the p_f curve store")
+    group.add_argument('--metrics', dest='filename_metrics', metavar='PATH', default=defaults['filename_metrics'],
+                       help="run metrics file; .jsonl appends one line per run (default %(default)s)")
+    group.add_argument('--no-metrics', dest='filename_metrics', action='store_const', const=None,
+                       help="do not write the run metrics")
+
+    group = parser.add_argument_group('wind-speed grid (mph)')
+    group.add_argument('--wspeed-start', type=float, default=defaults['wspeed_start'], help="first speed (default %(default)s)")
+    group.add_argument('--wspeed-stop', type=float, default=defaults['wspeed_stop'], help="last speed, included (default %(default)s)")
+    group.add_argument('--wspeed-step', type=_PositiveFloat, default=defaults['wspeed_step'], help="step (default %(default)s)")
+    group.add_argument('--wspeeds', dest='wspeed_list', metavar='S', type=float, nargs='+', default=defaults['wspeed_list'],
+                       help="explicit list of speeds, in place of start/stop/step")
+
+    group = parser.add_argument_group('sizing')
+    group.add_argument('--chunk-size', dest='sql_chunksize', metavar='ROWS', type=_PositiveInt, default=defaults['sql_chunksize'],
+                       help="structures pulled and processed per query chunk (default: all at once)")
+    group.add_argument('--workers', type=_PositiveInt, default=defaults['workers'],
+                       help="worker processes for the p_f sweep (default %(default)s)")
+    group.add_argument('--memory-budget', dest='memory_budget_mb', metavar='MB', type=_PositiveFloat, default=defaults['memory_budget_mb'],
+                       help="memory budget of the p_f working arrays, sets the row chunks (default %(default)s)")
+
+    group = parser.add_argument_group('modes')
+    group.add_argument('--forecast', dest='filename_forecast', metavar='CSV', default=defaults['filename_forecast'],
+                       help="p_f at each structure's forecast wind speed (forecast key and FORECAST_WSPEED columns)")
+    group.add_argument('--forecast-key', choices=fragility.FORECAST_KEYS, default=defaults['forecast_key'],
+                       help="join key of the forecast file (default %(default)s)")
+    group.add_argument('--incremental-cache', dest='filename_incremental_cache', metavar='PATH', default=defaults['filename_incremental_cache'],
+                       help="re-score only new or changed structures, caching outputs in PATH")
+    group.add_argument('--profile', dest='dirname_profile', metavar='DIR', nargs='?', const=DIRNAME_PROFILE, default=defaults['dirname_profile'],
+                       help="profile each stage with cProfile and tracemalloc into DIR (default %s)" % DIRNAME_PROFILE)
+    group.add_argument('--compact', dest='compact_dtypes', action=argparse.BooleanOptionalAction, default=defaults['compact_dtypes'],
+                       help="categorical labels and small-integer Pronto codes in memory (p_f unchanged)")
+    group.add_argument('--float32', dest='float32_outputs', action=argparse.BooleanOptionalAction, default=defaults['float32_outputs'],
+                       help="store factors, distribution parameters and p_f as float32")
+
+    return parser
+
+
+def ParseSettings(argv=None, defaults=None):
+
+    #********************************************************************#
+    # Purpose: To parse the command line argv (default sys.argv[1:])    #
+    #          into a run settings dict for model.RunModel. Exits with  #
+    #          a usage error for combinations the run cannot honour.    #
+    #********************************************************************#
+    defaults = dict(model.DEFAULT_SETTINGS, **(defaults or {}))
+    parser = BuildParser(defaults)
+    settings = vars(parser.parse_args(argv))
+
+    if settings['filename_sqlite'] is None:
+        settings['filename_sqlite'] = defaults['filename_sqlite']
+    elif settings['data_source'] != 'sqlite':
+        parser.error("--sqlite needs --source sqlite (the data source is %s)" % settings['data_source'])
+
+    # An output given a path is on; the others keep their default path:
+    settings['write_parquet'] = settings['filename_parquet'] is not None
+    if not settings['write_parquet']:
+        settings['filename_parquet'] = defaults['filename_parquet']
+    settings['write_curve_store'] = settings['dirname_curve_store'] is not None
+    if not settings['write_curve_store']:
+        settings['dirname_curve_store'] = defaults['dirname_curve_store']
+    if settings['write_db'] is None:
+        # --db-url implies --db unless --no-db is given:
+        settings['write_db'] = defaults['write_db'] or settings['db_url'] is not None
+
+    try:
+        model.CheckSettings(settings)
+    except ValueError as error:
+        parser.error(str(error))
+
+    return settings
+
+
+def Main(argv=None, defaults=None):
+
+    #********************************************************************#
+    # Purpose: To run the model with the settings of the command line.  #
+    #          Returns the run metrics record.                          #
+    #********************************************************************#
+    return model.RunModel(ParseSettings(argv, defaults))
+
+
+if __name__ == '__main__':
+    Main(sys.argv[1:])
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Compact-memory dtypes for the structure rows and the outputs of
+reliability_model3_draft_18Mar2020.py.
+
+Compact structures (CompactStructures, applied at ingest):
+    label columns       MATERIAL_FLAG, AGRICULTURE, WETLAND_TYPE,
+                        CORROSION_ZONE, HOST_TLINE_NM, WSIP_SCOPE_IND and
+                        SAP_FUNC_LOC_NO as categoricals (a few distinct
+                        values each)
+    Pronto codes        the <THEME>_CD columns as nullable Int8 (small
+                        integers with a null mask in place of NaN)
+    INSTALLED_YEAR      nullable Int16
+Every calculation reads these columns through to_numpy(dtype=float) or the
+categorical-aware MCE lookup, so p_f is unchanged. A column holding values
+its small type cannot represent exactly (e.g. a fractional code) is left as
+it is.
+
+Compact outputs (CompactOutputs, optional): the float64 columns of the
+output rows (factors, mean_/stddev_, p_f) stored as float32. The
+calculations stay in float64; only the stored result is rounded, which is
+within the DECIMAL(16, 15) of the database p_f columns to about 1e-8.
+
+Key functions:
+CompactStructures - Structure rows with compact dtypes.
+CompactOutputs - Output rows with float32 in place of float64.
+MemoryMB - Memory of a DataFrame (deep), in MB.
+
+Run as a script to report the memory saved and the p_f deviation of
+float32 outputs on a synthetic fleet:
+    python compact.py [n_structures]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+LABEL_COLUMNS = ['MATERIAL_FLAG', 'AGRICULTURE', 'WETLAND_TYPE', 'CORROSION_ZONE', 'HOST_TLINE_NM', 'WSIP_SCOPE_IND', 'SAP_FUNC_LOC_NO']
+PRONTO_COLUMNS = ['ANCHOR_CD', 'GUY_CD', 'STRUCTURE_CD', 'FOUNDATION_CD', 'CROSSARMS_CD', 'FRAME_ATTACH_CD', 'STRUCT_ATTACH_CD',
+                  'STUB_SPLICE_CD', 'CONDUCTOR_CD', 'OGW_CD', 'HARDWARE_INSUL_CD']
+SMALL_INTEGER_COLUMNS = dict({column: 'Int8' for column in PRONTO_COLUMNS}, INSTALLED_YEAR='Int16')
+
+OUTPUT_FLOAT_DTYPE = np.float32
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _SmallIntegers(series, dtype):
+
+    #********************************************************************#
+    # Purpose: To convert series to the nullable integer dtype, or      #
+    #          return it unchanged when a value is not an integer in    #
+    #          the dtype's range.                                       #
+    #********************************************************************#
+    values = series.to_numpy(dtype=float)
+    valid = values[~np.isnan(values)]
+    limits = np.iinfo(dtype.lower())
+    if np.any(valid != np.round(valid)) or np.any(valid < limits.min) or np.any(valid > limits.max):
+        return series
+
+    return pd.Series(pd.array(np.where(np.isnan(values), 0, values).astype(dtype.lower()), dtype=dtype), index=series.index).mask(np.isnan(values))
+
+
+def CompactStructures(df0):
+
+    #********************************************************************#
+    # Purpose: To return df0 (structure query rows) with the label      #
+    #          columns as categoricals and the Pronto codes and         #
+    #          INSTALLED_YEAR as small nullable integers. Columns not   #
+    #          in df0 are skipped.                                      #
+    #********************************************************************#
+    columns = {}
+    for column in LABEL_COLUMNS:
+        if column in df0.columns and not isinstance(df0[column].dtype, pd.CategoricalDtype):
+            columns[column] = df0[column].astype('category')
+    for column, dtype in SMALL_INTEGER_COLUMNS.items():
+        if column in df0.columns and df0[column].dtype != dtype:
+            columns[column] = _SmallIntegers(df0[column], dtype)
+
+    return df0.assign(**columns)
+
+
+def CompactOutputs(df_output, float_dtype=OUTPUT_FLOAT_DTYPE):
+
+    #********************************************************************#
+    # Purpose: To return df_output with its float64 columns stored as   #
+    #          float_dtype.                                             #
+    #********************************************************************#
+    columns = df_output.columns[(df_output.dtypes == np.float64).to_numpy()]
+
+    return df_output.astype(dict.fromkeys(columns, float_dtype))
+
+
+def MemoryMB(df):
+
+    #********************************************************************#
+    # Purpose: To return the memory held by df (index and values,       #
+    #          strings included) in MB.                                 #
+    #********************************************************************#
+    return df.memory_usage(deep=True).sum()/2**20
+
+
+def _Benchmark(n_structures):
+
+    #********************************************************************#
+    # Purpose: To score a synthetic fleet with default and compact      #
+    #          dtypes, and report the memory of the structure rows and  #
+    #          of the output rows, and the largest p_f deviation of the #
+    #          compact run from the float64 one.                        #
+    #********************************************************************#
+    import fleet
+    import fragility
+    import model
+
+    model_parameters = model.SyntheticParameters()
+    wspeeds = fragility.WindSpeedGrid()
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in wspeeds]
+
+    df0 = fleet.GenerateFleet(n_structures)
+    df_output = model.ScoreStructures(df0, model_parameters, wspeeds)
+    df0_compact = CompactStructures(df0)
+    df_output_compact_labels = model.ScoreStructures(df0_compact, model_parameters, wspeeds)
+    df_output_compact = CompactOutputs(df_output_compact_labels)
+
+    prob_fail = df_output[labels].to_numpy()
+    identical = np.array_equal(prob_fail, df_output_compact_labels[labels].to_numpy(), equal_nan=True)
+    deviation = np.nanmax(np.abs(df_output_compact[labels].to_numpy(dtype=float) - prob_fail))
+
+    print("%d structures x %d speeds" % (n_structures, len(wspeeds)))
+    for name, default, compact in [('structure rows', MemoryMB(df0), MemoryMB(df0_compact)),
+                                   ('output rows', MemoryMB(df_output), MemoryMB(df_output_compact))]:
+        print("  %-15s %9.1f MB -> %9.1f MB (-%.0f%%)" % (name, default, compact, 100*(1 - compact/default)))
+    print("  p_f with compact structure rows identical:", identical)
+    print("  max |p_f float32 - p_f float64| = %.3g" % deviation)
+
+
+if __name__ == '__main__':
+    _Benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
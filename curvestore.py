@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Memory-mapped store of the p_f curves of
+reliability_model3_draft_18Mar2020.py for fast lookups by structure ID.
+
+A store is a directory of .npy files:
+    prob_fail.npy           p_f matrix, structures x wind speeds (float64),
+                            rows in the order the run wrote them
+    wspeeds.npy             wind-speed axis (mph)
+    <KEY>.npy               sorted IDs (one file per index key)
+    <KEY>_rows.npy          row of prob_fail.npy for each sorted ID
+Index keys are SAP_EQUIP_ID and STRUCTURE_NO; rows with a missing ID are left
+out of that key's index, and an ID found on several rows (STRUCTURE_NO is
+reused across lines) returns all of them.
+
+The writer streams rows straight into prob_fail.npy (the .npy header is
+reserved up front and filled in on close), so the matrix is never held in
+memory. Readers open every file with mmap_mode='r' and binary-search the
+index, so a lookup touches only the pages of the requested curves.
+
+Key functions:
+OpenCurveStoreWriter / WriteCurveChunk / CloseCurveStoreWriter - Write a store
+            chunk by chunk; the store replaces any existing one on close.
+LoadCurveStore - Memory-map a store.
+LookupRows - Rows of prob_fail.npy for a list of IDs.
+LookupCurves - p_f curves for a list of IDs as a DataFrame.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import fragility
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+INDEX_KEYS = ['SAP_EQUIP_ID', 'STRUCTURE_NO']
+HEADER_BYTES = 128      # Reserved .npy (version 1.0) header size, including the magic string.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _NpyHeader(shape, dtype):
+
+    #********************************************************************#
+    # Purpose: To build a version 1.0 .npy header of exactly            #
+    #          HEADER_BYTES bytes for a C-ordered array.                #
+    #********************************************************************#
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(np.dtype(dtype)), tuple(shape))
+    magic = np.lib.format.magic(1, 0)
+    padding = HEADER_BYTES - len(magic) - 2 - len(header) - 1
+    if padding < 0:
+        raise ValueError("Shape %r does not fit the reserved .npy header" % (tuple(shape),))
+
+    return magic + np.uint16(HEADER_BYTES - len(magic) - 2).tobytes() + (header + ' '*padding + '\n').encode('latin1')
+
+
+def OpenCurveStoreWriter(path, wspeeds, index_keys=INDEX_KEYS):
+
+    #********************************************************************#
+    # Purpose: To start writing a store for the wind-speed grid         #
+    #          wspeeds. Files are written to <path>.tmp and moved to    #
+    #          path by CloseCurveStoreWriter.                           #
+    #********************************************************************#
+    tmp_path = path + '.tmp'
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    prob_fail_file = open(os.path.join(tmp_path, 'prob_fail.npy'), 'wb')
+    prob_fail_file.write(b'\0'*HEADER_BYTES)
+
+    return {'path': path,
+            'tmp_path': tmp_path,
+            'wspeeds': np.asarray(wspeeds, dtype=float),
+            'index_keys': list(index_keys),
+            'prob_fail_file': prob_fail_file,
+            'ids': {key: [] for key in index_keys},
+            'rows': 0}
+
+
+def WriteCurveChunk(writer, df_chunk, prob_fail):
+
+    #********************************************************************#
+    # Purpose: To append a chunk of curves (prob_fail, rows aligned     #
+    #          with df_chunk) and collect its IDs for the index.        #
+    #********************************************************************#
+    prob_fail = np.ascontiguousarray(prob_fail, dtype=np.float64)
+    if prob_fail.ndim != 2 or prob_fail.shape != (len(df_chunk), len(writer['wspeeds'])):
+        raise ValueError("p_f chunk of shape %r does not match %d structures x %d speeds"
+                         % (prob_fail.shape, len(df_chunk), len(writer['wspeeds'])))
+
+    writer['prob_fail_file'].write(prob_fail.tobytes())
+    for key in writer['index_keys']:
+        writer['ids'][key].append(df_chunk[key].to_numpy())
+    writer['rows'] += len(df_chunk)
+
+
+def CloseCurveStoreWriter(writer):
+
+    #********************************************************************#
+    # Purpose: To fill in the prob_fail.npy header, write the wind      #
+    #          speeds and the sorted ID indexes, and move the store to  #
+    #          its path (replacing an existing store). Returns the      #
+    #          number of structures.                                    #
+    #********************************************************************#
+    prob_fail_file = writer['prob_fail_file']
+    prob_fail_file.seek(0)
+    prob_fail_file.write(_NpyHeader((writer['rows'], len(writer['wspeeds'])), np.float64))
+    prob_fail_file.close()
+    np.save(os.path.join(writer['tmp_path'], 'wspeeds.npy'), writer['wspeeds'])
+
+    for key in writer['index_keys']:
+        ids = np.concatenate(writer['ids'][key]) if writer['ids'][key] else np.array([])
+        rows = np.flatnonzero(pd.notna(ids))
+        ids = ids[rows]
+        if ids.dtype.kind not in 'iuf':
+            ids = ids.astype(str) # Fixed-width text, so the index can be memory-mapped.
+        order = np.argsort(ids, kind='stable')
+        np.save(os.path.join(writer['tmp_path'], key + '.npy'), ids[order])
+        np.save(os.path.join(writer['tmp_path'], key + '_rows.npy'), rows[order])
+
+    if os.path.isdir(writer['path']):
+        shutil.rmtree(writer['path'])
+    os.rename(writer['tmp_path'], writer['path'])
+
+    return writer['rows']
+
+
+def LoadCurveStore(path):
+
+    #********************************************************************#
+    # Purpose: To memory-map a store. Returns a dict with 'prob_fail',  #
+    #          'wspeeds' and, per index key, 'index' {key: (sorted IDs, #
+    #          rows)}; nothing is read until it is accessed.            #
+    #********************************************************************#
+    store = {'prob_fail': np.load(os.path.join(path, 'prob_fail.npy'), mmap_mode='r'),
+             'wspeeds': np.load(os.path.join(path, 'wspeeds.npy')),
+             'index': {}}
+    for key in INDEX_KEYS:
+        if os.path.exists(os.path.join(path, key + '.npy')):
+            store['index'][key] = (np.load(os.path.join(path, key + '.npy'), mmap_mode='r'),
+                                   np.load(os.path.join(path, key + '_rows.npy'), mmap_mode='r'))
+
+    return store
+
+
+def LookupRows(store, ids, key='SAP_EQUIP_ID'):
+
+    #********************************************************************#
+    # Purpose: To binary-search ids in the key index. Returns (ids,     #
+    #          rows): one entry per matching row, in the order of the   #
+    #          requested ids. Unknown ids (an id that is not exactly a  #
+    #          value of the index dtype, e.g. 40000000.7, is unknown)   #
+    #          raise a ValueError listing them.                         #
+    #********************************************************************#
+    if key not in store['index']:
+        raise ValueError("No %s index in this curve store; available: %s" % (key, sorted(store['index'])))
+    sorted_ids, sorted_rows = store['index'][key]
+
+    requested = np.atleast_1d(np.asarray(ids))
+    if sorted_ids.dtype.kind == 'U':
+        ids = requested.astype(str)
+        valid = np.ones(len(ids), dtype=bool)
+    elif requested.dtype.kind in 'iu' and sorted_ids.dtype.kind in 'iu':
+        ids = requested.astype(sorted_ids.dtype)
+        valid = ids == requested
+    else:
+        # Any other id (text, fractional, out of range) is unknown unless it
+        # converts to the index dtype and back unchanged:
+        numeric = pd.to_numeric(pd.Series(requested, dtype=object), errors='coerce').to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            ids = np.where(np.isfinite(numeric), numeric, 0).astype(sorted_ids.dtype)
+        valid = ids.astype(float) == numeric
+    first = np.searchsorted(sorted_ids, ids, side='left')
+    last = np.searchsorted(sorted_ids, ids, side='right')
+
+    unknown = requested[(last == first) | ~valid]
+    if len(unknown) > 0:
+        raise ValueError("Unknown %s in curve store: %s" % (key, ', '.join(str(value) for value in unknown[:20])))
+
+    counts = last - first
+    positions = np.repeat(first - np.cumsum(np.r_[0, counts[:-1]]), counts) + np.arange(counts.sum())
+
+    return np.repeat(ids, counts), np.asarray(sorted_rows[positions])
+
+
+def LookupCurves(store, ids, key='SAP_EQUIP_ID'):
+
+    #********************************************************************#
+    # Purpose: To return the p_f curves of ids (one row per matching    #
+    #          structure) as a DataFrame indexed by ID with the         #
+    #          _<wspeed>_mph columns.                                   #
+    #********************************************************************#
+    matched_ids, rows = LookupRows(store, ids, key)
+
+    return fragility.ProbabilityFailureFrame(store['prob_fail'][rows], store['wspeeds'],
+                                             index=pd.Index(matched_ids, name=key))
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Pluggable data sources for the structure/line input query of
+reliability_model3_draft_18Mar2020.py.
+
+A data source is a dict naming its backend and connection settings; the
+connection is only opened when structures are first read. Backends:
+    sqlserver - The Exponent SQL Server database (pyodbc, trusted
+                connection, server and database from config.py).
+    sqlite    - A local SQLite file holding CSV_Structure and CSV_TLine with
+                the same columns, for runs, profiling and benchmarks without
+                the production database.
+Both serve the same join query (STRUCTURE_QUERY) against their own table
+names. pyodbc and config are imported only by the sqlserver backend.
+
+Key functions:
+OpenDataSource - Data source for a backend (nothing is connected yet).
+StructureQuery - The join query as run by a data source.
+ReadStructures - Run the query: one DataFrame, or an iterator of chunks.
+IterStructures - Iterate over the query result in chunks (one chunk without
+            chunksize); nothing is read until iteration starts.
+CloseDataSource - Close the connection if one was opened.
+CreateSQLiteSource - Create (or replace) a SQLite file with the
+            CSV_Structure and CSV_TLine tables, optionally filled from
+            DataFrames.
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+# Input columns and their SQLite types. SAP_FUNC_LOC_NO is the join key.
+STRUCTURE_COLUMNS = {'SAP_EQUIP_ID': 'INTEGER', 'ETGIS_ID': 'TEXT', 'STRUCTURE_NO': 'TEXT', 'WEAR_FATIGUE_RED_FAC': 'REAL',
+                     'SAP_FUNC_LOC_NO': 'TEXT', 'AGRICULTURE': 'TEXT', 'WETLAND_TYPE': 'TEXT', 'CORROSION_ZONE': 'TEXT',
+                     'INSTALLED_YEAR': 'INTEGER', 'MATERIAL_FLAG': 'TEXT', 'ANCHOR_CD': 'REAL', 'GUY_CD': 'REAL',
+                     'STRUCTURE_CD': 'REAL', 'FOUNDATION_CD': 'REAL', 'CROSSARMS_CD': 'REAL', 'FRAME_ATTACH_CD': 'REAL',
+                     'STRUCT_ATTACH_CD': 'REAL', 'STUB_SPLICE_CD': 'REAL', 'CONDUCTOR_CD': 'REAL', 'OGW_CD': 'REAL',
+                     'HARDWARE_INSUL_CD': 'REAL', 'WSIP_SCOPE_IND': 'TEXT', 'HOST_TLINE_NM': 'TEXT', 'SPLICES': 'REAL'}
+TLINE_COLUMNS = {'SAP_FUNC_LOC_NO': 'TEXT', 'TLINE_MILES': 'REAL', 'OUTAGE_DESIGNLIFE_MOD': 'REAL'}
+
+STRUCTURE_QUERY = (
+    '''SELECT
+        sD.SAP_EQUIP_ID, sD.ETGIS_ID, sD.STRUCTURE_NO, sD.WEAR_FATIGUE_RED_FAC, sD.SAP_FUNC_LOC_NO, sD.AGRICULTURE, sD.WETLAND_TYPE, sD.CORROSION_ZONE, sD.INSTALLED_YEAR, sD.MATERIAL_FLAG, sD.ANCHOR_CD, sD.GUY_CD, sD.STRUCTURE_CD, sD.FOUNDATION_CD, sD.CROSSARMS_CD, sD.FRAME_ATTACH_CD, sD.STRUCT_ATTACH_CD, sD.STUB_SPLICE_CD, sD.CONDUCTOR_CD, sD.OGW_CD, sD.HARDWARE_INSUL_CD,
+
+        sD.WSIP_SCOPE_IND,
+        sD.HOST_TLINE_NM,
+        sD.SPLICES,
+
+        tD.TLINE_MILES, tD.OUTAGE_DESIGNLIFE_MOD
+
+      FROM {structure_table} sD
+      INNER JOIN {tline_table} tD on sD.SAP_FUNC_LOC_NO=tD.SAP_FUNC_LOC_NO
+    ''')
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _ConnectSQLServer(source):
+
+    #********************************************************************#
+    # Purpose: To connect to the Exponent database (config.py).         #
+    #********************************************************************#
+    import pyodbc
+    import config # Configuration file with Exponent database info
+
+    return pyodbc.connect(driver="{SQL Server}", server=config.ExpoServer, database=config.ExpoDatabase, trusted_connection='yes')
+
+
+def _ConnectSQLite(source):
+
+    #********************************************************************#
+    # Purpose: To open the SQLite file (which must already exist).      #
+    #********************************************************************#
+    if not os.path.exists(source['path']):
+        raise ValueError("SQLite data source %s does not exist; create it with datasource.CreateSQLiteSource" % source['path'])
+
+    return sqlite3.connect(source['path'])
+
+
+DATA_SOURCES = {'sqlserver': {'connect': _ConnectSQLServer,
+                              'structure_table': '[PGE_OA].[dbo].[CSV_Structure]',
+                              'tline_table': '[PGE_OA].[dbo].[CSV_TLine]'},
+                'sqlite': {'connect': _ConnectSQLite,
+                           'structure_table': 'CSV_Structure',
+                           'tline_table': 'CSV_TLine'}}
+
+
+def OpenDataSource(backend='sqlserver', path=None):
+
+    #********************************************************************#
+    # Purpose: To describe a data source of the given backend ('path'   #
+    #          is the SQLite file). No connection is opened here.       #
+    #********************************************************************#
+    if backend not in DATA_SOURCES:
+        raise ValueError("Unknown data source '%s'; expected one of %s" % (backend, sorted(DATA_SOURCES)))
+    if backend == 'sqlite' and path is None:
+        raise ValueError("The sqlite data source needs a path")
+
+    return {'backend': backend, 'path': path, 'connection': None}
+
+
+def StructureQuery(source):
+
+    #********************************************************************#
+    # Purpose: To return the structure/line join query with the table   #
+    #          names of the source's backend.                           #
+    #********************************************************************#
+    backend = DATA_SOURCES[source['backend']]
+
+    return STRUCTURE_QUERY.format(structure_table=backend['structure_table'], tline_table=backend['tline_table'])
+
+
+def ReadStructures(source, chunksize=None):
+
+    #********************************************************************#
+    # Purpose: To run the structure query, connecting on first use.     #
+    #          Returns a DataFrame, or with chunksize an iterator of    #
+    #          DataFrames of up to chunksize rows.                      #
+    #********************************************************************#
+    if source['connection'] is None:
+        source['connection'] = DATA_SOURCES[source['backend']]['connect'](source)
+
+    if chunksize is None:
+        return pd.DataFrame(pd.read_sql_query(StructureQuery(source), source['connection']))
+
+    return pd.read_sql_query(StructureQuery(source), source['connection'], chunksize=chunksize)
+
+
+def IterStructures(source, chunksize=None):
+
+    #********************************************************************#
+    # Purpose: To yield the structure query result as DataFrames of up  #
+    #          to chunksize rows (the whole result as one DataFrame     #
+    #          when chunksize is None). The query runs when the first   #
+    #          chunk is requested.                                      #
+    #********************************************************************#
+    if chunksize is None:
+        yield ReadStructures(source)
+    else:
+        yield from ReadStructures(source, chunksize)
+
+
+def CloseDataSource(source):
+
+    #********************************************************************#
+    # Purpose: To close the source's connection, if one was opened.     #
+    #********************************************************************#
+    if source['connection'] is not None:
+        source['connection'].close()
+        source['connection'] = None
+
+
+def CreateSQLiteSource(path, df_structure=None, df_tline=None):
+
+    #********************************************************************#
+    # Purpose: To create the SQLite file at path (replacing the two     #
+    #          tables if they exist) with the CSV_Structure and         #
+    #          CSV_TLine columns, an index on the join key, and         #
+    #          optionally the rows of df_structure / df_tline (extra    #
+    #          columns are ignored). Returns a data source for it.      #
+    #********************************************************************#
+    connection = sqlite3.connect(path)
+    try:
+        for table, columns, df in [('CSV_Structure', STRUCTURE_COLUMNS, df_structure), ('CSV_TLine', TLINE_COLUMNS, df_tline)]:
+            connection.execute("DROP TABLE IF EXISTS %s" % table)
+            connection.execute("CREATE TABLE %s (%s)" % (table, ', '.join('%s %s' % item for item in columns.items())))
+            if df is not None:
+                df[list(columns)].to_sql(table, connection, if_exists='append', index=False)
+        connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS CSV_TLine_SAP_FUNC_LOC_NO ON CSV_TLine (SAP_FUNC_LOC_NO)")
+        connection.commit()
+    finally:
+        connection.close()
+
+    return OpenDataSource('sqlite', path)
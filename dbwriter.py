@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Bulk database writer for the outputs of
+reliability_model3_draft_18Mar2020.py (test_Reliability table).
+
+Rows are written into a staging table (<table>_staging) chunk by chunk with
+batched executemany inserts of plain tuples (pyodbc's fast_executemany when
+the engine is created with fast_executemany=True). When every chunk is in,
+the staging table replaces the target table in a single transaction (drop +
+rename), so readers never see a partially written table and a failed run
+leaves the previous table in place.
+
+The writer only uses SQLAlchemy Core and the dialect's own DDL, so the same
+code runs against SQL Server and a local SQLite file.
+
+Key functions:
+OpenBulkWriter - Writer state (a dict) for one table.
+WriteBulkChunk - Append a DataFrame chunk to the staging table.
+CommitBulkWriter - Swap the staging table in; returns rows, seconds and
+            rows/sec.
+AbortBulkWriter - Drop the staging table, leaving the target unchanged.
+
+Run as a script to compare with DataFrame.to_sql on a SQLite file:
+    python dbwriter.py [n_rows] [n_speeds]
+"""
+
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, MetaData, Table, create_engine
+from sqlalchemy.types import BigInteger, Boolean, DateTime, Float, String
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+BATCH_ROWS = 5000           # Rows per executemany call.
+STAGING_SUFFIX = '_staging'
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def OpenBulkWriter(engine, table_name, dtype=None, batch_rows=BATCH_ROWS):
+
+    #********************************************************************#
+    # Purpose: To start a bulk write of table_name. dtype maps column   #
+    #          names to SQLAlchemy types (as for DataFrame.to_sql);     #
+    #          columns not in dtype get a type from their pandas dtype. #
+    #          The staging table is created with the first chunk.       #
+    #********************************************************************#
+    return {'engine': engine,
+            'table_name': table_name,
+            'staging_name': table_name + STAGING_SUFFIX,
+            'dtype': dict(dtype or {}),
+            'batch_rows': batch_rows,
+            'table': None,
+            'insert_sql': None,
+            'rows': 0,
+            'seconds': 0.0}
+
+
+def _ColumnType(series):
+
+    #********************************************************************#
+    # Purpose: To choose a column type for a column missing from dtype. #
+    #********************************************************************#
+    if pd.api.types.is_bool_dtype(series):
+        return Boolean()
+    if pd.api.types.is_integer_dtype(series):
+        return BigInteger()
+    if pd.api.types.is_float_dtype(series):
+        return Float()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DateTime()
+    return String()
+
+
+def _CreateStagingTable(writer, df_chunk):
+
+    #********************************************************************#
+    # Purpose: To (re)create the staging table with the columns of      #
+    #          df_chunk and prepare the insert statement.               #
+    #********************************************************************#
+    engine = writer['engine']
+    columns = [Column(name, writer['dtype'].get(name, _ColumnType(df_chunk[name]))) for name in df_chunk.columns]
+    table = Table(writer['staging_name'], MetaData(), *columns)
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+
+    quote = engine.dialect.identifier_preparer.quote
+    if engine.dialect.paramstyle == 'qmark':
+        placeholders = ', '.join(['?']*len(columns))
+    elif engine.dialect.paramstyle == 'format':
+        placeholders = ', '.join(['%s']*len(columns))
+    else:
+        raise ValueError("Unsupported DBAPI paramstyle '%s'" % engine.dialect.paramstyle)
+    writer['table'] = table
+    writer['insert_sql'] = "INSERT INTO %s (%s) VALUES (%s)" % (quote(writer['staging_name']),
+                                                                ', '.join(quote(name) for name in df_chunk.columns),
+                                                                placeholders)
+
+
+def _ChunkRows(writer, df_chunk):
+
+    #********************************************************************#
+    # Purpose: To convert df_chunk into a list of row tuples of plain   #
+    #          Python values: NaN and +-inf become NULL, timestamps     #
+    #          become datetime, and each column goes through its type's #
+    #          bind processor for the engine's dialect.                 #
+    #********************************************************************#
+    dialect = writer['engine'].dialect
+    column_values = []
+    for name in df_chunk.columns:
+        series = df_chunk[name]
+        if pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype=float).astype(object)
+            values[~np.isfinite(series.to_numpy(dtype=float))] = None
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            values = np.array(series.dt.to_pydatetime(), dtype=object)
+            values[series.isna().to_numpy()] = None
+        else:
+            values = series.to_numpy(dtype=object, copy=True)
+            values[pd.isna(values)] = None
+            if pd.api.types.is_integer_dtype(series):
+                values = [int(value) for value in values]
+        processor = writer['table'].c[name].type.bind_processor(dialect)
+        if processor is not None:
+            values = [processor(value) for value in values]
+        column_values.append(values)
+
+    return list(zip(*column_values))
+
+
+def WriteBulkChunk(writer, df_chunk):
+
+    #********************************************************************#
+    # Purpose: To append df_chunk (index not written) to the staging    #
+    #          table in batches of batch_rows rows, one transaction per #
+    #          chunk.                                                   #
+    #********************************************************************#
+    start = time.perf_counter()
+    if writer['table'] is None:
+        _CreateStagingTable(writer, df_chunk)
+    elif list(df_chunk.columns) != [column.name for column in writer['table'].columns]:
+        raise ValueError("Chunk columns differ from the staging table %s" % writer['staging_name'])
+
+    rows = _ChunkRows(writer, df_chunk)
+    with writer['engine'].begin() as connection:
+        for batch_start in range(0, len(rows), writer['batch_rows']):
+            connection.exec_driver_sql(writer['insert_sql'], rows[batch_start:batch_start + writer['batch_rows']])
+
+    writer['rows'] += len(rows)
+    writer['seconds'] += time.perf_counter() - start
+
+
+def CommitBulkWriter(writer):
+
+    #********************************************************************#
+    # Purpose: To replace the target table by the staging table in one #
+    #          transaction. Returns {'rows', 'seconds',                 #
+    #          'rows_per_second'} for the whole write.                  #
+    #********************************************************************#
+    start = time.perf_counter()
+    engine = writer['engine']
+    if writer['table'] is None:
+        raise ValueError("Nothing was written to %s" % writer['staging_name'])
+
+    quote = engine.dialect.identifier_preparer.quote
+    target, staging = writer['table_name'], writer['staging_name']
+    with engine.begin() as connection:
+        if engine.dialect.name == 'mssql':
+            connection.exec_driver_sql("IF OBJECT_ID(N'%s', N'U') IS NOT NULL DROP TABLE %s" % (target, quote(target)))
+            connection.exec_driver_sql("EXEC sp_rename N'%s', N'%s'" % (staging, target))
+        else:
+            connection.exec_driver_sql("DROP TABLE IF EXISTS %s" % quote(target))
+            connection.exec_driver_sql("ALTER TABLE %s RENAME TO %s" % (quote(staging), quote(target)))
+
+    writer['seconds'] += time.perf_counter() - start
+    writer['table'] = None
+
+    return {'rows': writer['rows'],
+            'seconds': writer['seconds'],
+            'rows_per_second': writer['rows']/writer['seconds'] if writer['seconds'] > 0 else float('nan')}
+
+
+def AbortBulkWriter(writer):
+
+    #********************************************************************#
+    # Purpose: To drop the staging table after a failed write; the      #
+    #          target table is left as it was.                          #
+    #********************************************************************#
+    if writer['table'] is not None:
+        writer['table'].drop(writer['engine'], checkfirst=True)
+        writer['table'] = None
+
+
+def _Benchmark(n_rows, n_speeds):
+
+    #********************************************************************#
+    # Purpose: To write a synthetic output table of n_rows rows with    #
+    #          n_speeds p_f columns to a SQLite file with to_sql and    #
+    #          with the bulk writer, and compare rows/sec and contents. #
+    #********************************************************************#
+    rng = np.random.default_rng(0)
+    df_output = pd.DataFrame({'SAP_EQUIP_ID': np.arange(n_rows),
+                              'ETGIS_ID': ['G%08d' % i for i in range(n_rows)],
+                              'HOST_TLINE_NM': rng.choice(['LINE A', 'LINE B', 'LINE C'], n_rows)})
+    prob_fail = rng.random((n_rows, n_speeds))
+    prob_fail[rng.random((n_rows, n_speeds)) < 0.01] = np.nan
+    df_output = pd.concat([df_output, pd.DataFrame(prob_fail, columns=['_%d_mph' % w for w in range(n_speeds)])], axis=1)
+    df_output['DATETIME'] = datetime.datetime.now().replace(microsecond=0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine('sqlite:///' + os.path.join(directory, 'benchmark.db'))
+
+        start = time.perf_counter()
+        df_output.to_sql('test_to_sql', engine, if_exists='replace', index=False)
+        seconds_to_sql = time.perf_counter() - start
+
+        writer = OpenBulkWriter(engine, 'test_bulk')
+        for chunk_start in range(0, n_rows, 20000):
+            WriteBulkChunk(writer, df_output.iloc[chunk_start:chunk_start + 20000])
+        summary = CommitBulkWriter(writer)
+
+        df_read = pd.read_sql_table('test_bulk', engine)
+        identical = (df_read.drop(columns='DATETIME').equals(df_output.drop(columns='DATETIME'))
+                     and (df_read['DATETIME'] == df_output['DATETIME']).all())
+        engine.dispose()
+
+    print("%d rows x %d columns, SQLite file" % df_output.shape)
+    print("to_sql       %8.2f s  %10.0f rows/s" % (seconds_to_sql, n_rows/seconds_to_sql))
+    print("bulk writer  %8.2f s  %10.0f rows/s  read back identical: %s" % (summary['seconds'], summary['rows_per_second'], identical))
+
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_speeds = int(sys.argv[2]) if len(sys.argv) > 2 else 121
+    _Benchmark(n_rows, n_speeds)
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Columnar (whole-array) versions of the Pronto-theme dependent
+calculations in reliability_model3_draft_18Mar2020.py.
+
+Key functions:
+CompileMCEScores - Compile the MCE corrosion scores table once into integer
+            label codes plus dense float score arrays (NaN in place of the
+            'ERROR_MCE_N/A' sentinels).
+LookupMCEScores - Gather the MCE scores of every structure with one take
+            on the compiled table; unknown labels are reported as one batch.
+ComputeStructureFactors - Structure-dependent reduction factors (outage
+            density, splice density, wear and fatigue, soil and atmospheric
+            corrosivity) for every structure at once.
+ComputeThemeDesignLifeAdjustment / ThemeProntoCodes / MaterialMasks - The
+            per-theme pieces of ComputeThemeFactors, shared with the
+            parameter sweep (sweep.py).
+ComputeThemeFactors - design_life_adjustment, design_life_adjusted, cov,
+            strength_ratio and design_ratio for every structure and every
+            Pronto theme, returned with the same column names as the
+            original 'for entry' / 'for p' loop
+            (<THEME>_des_life_adjustment, <THEME>_cov, etc.).
+"""
+
+import numpy as np
+import pandas as pd
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+# Input data column -> MCE corrosion scores column used for that classification:
+MCE_SCORE_COLUMNS = {'AGRICULTURE': 'AGRICULTURE',
+                     'WETLAND_TYPE': 'WETLAND_TYPE',
+                     'CORROSION_ZONE': 'ATMOSPHERIC_CORROSION'}
+
+# Pronto theme referenced for WOOD structures in place of the STEEL theme:
+WOOD_THEME_MAP = {'FOUNDATION_CD': 'STRUCTURE_CD',
+                  'STRUCT_ATTACH_CD': 'FRAME_ATTACH_CD',
+                  'STUB_SPLICE_CD': 'CROSSARMS_CD'}
+
+# Design life formula used for each Pronto theme (DLife is short for 'design life').
+# Themes not listed use 'ALL_OTHERS' (CROSSARMS_CD, STUB_SPLICE_CD,
+# FRAME_ATTACH_CD, STRUCT_ATTACH_CD).
+DLIFE_FORMULA = {'CONDUCTOR_CD': 'CONDUCTOR',
+                 'ANCHOR_CD': 'ANCHOR',
+                 'GUY_CD': 'GUY',
+                 'OGW_CD': 'OGW_HI',
+                 'HARDWARE_INSUL_CD': 'OGW_HI',
+                 'FOUNDATION_CD': 'STRUCTURE_FOUNDATION',
+                 'STRUCTURE_CD': 'STRUCTURE_FOUNDATION'}
+
+# Reduction factors entering the square-root sum of each design life formula,
+# and whether the outage term multiplies the whole adjustment
+# ((1 - sqrt(...))*(1 - outage)) or only the square root (1 - sqrt(...)*(1 - outage)).
+# For a negative outage density reduction factor the design life adjustment is
+# that product (a single factor enters as itself, not as a square root);
+# otherwise it is 1 - sqrt(sum of squares of the factors and the outage factor).
+# Then, for every formula:
+#     design_life_adjusted = design life*design_life_adjustment
+#     cov = cov_new + (cov_D - cov_new)*(AGE_YEARS**2/design_life_adjusted**2)
+# with cov_new, cov_D and design life from the component constants.
+DLIFE_TERMS = {'CONDUCTOR': (('wear_fatigue', 'splice_density', 'atmospheric_corrosivity'), True),
+               'ANCHOR': (('soil_corrosivity',), True),
+               'GUY': (('atmospheric_corrosivity',), True),
+               'OGW_HI': (('soil_corrosivity', 'atmospheric_corrosivity'), False),
+               'STRUCTURE_FOUNDATION': (('wear_fatigue', 'soil_corrosivity', 'atmospheric_corrosivity'), True),
+               'ALL_OTHERS': (('wear_fatigue', 'atmospheric_corrosivity'), True)}
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def CompileMCEScores(df_MCE_corrosion_scores_indexed):
+
+    #********************************************************************#
+    # Purpose: To compile the MCE corrosion scores DataFrame (indexed   #
+    #          to ROW_LABELS) into a dict holding the label index and   #
+    #          one dense float array per score column. String sentinel  #
+    #          values (e.g. 'ERROR_MCE_N/A') are stored as NaN.         #
+    #********************************************************************#
+    labels = pd.Index(df_MCE_corrosion_scores_indexed.index)
+    if labels.has_duplicates:
+        raise ValueError("Duplicate MCE corrosion score labels: %s" % sorted(labels[labels.duplicated()].unique()))
+
+    scores = {}
+    for column in df_MCE_corrosion_scores_indexed.columns:
+        scores[column] = pd.to_numeric(df_MCE_corrosion_scores_indexed[column], errors='coerce').to_numpy(dtype=float)
+
+    return {'labels': labels, 'scores': scores}
+
+
+def EncodeMCELabels(mce_scores, classifications):
+
+    #********************************************************************#
+    # Purpose: To convert an array of classification labels into        #
+    #          integer codes into the compiled MCE label index          #
+    #          (-1 for labels not in the table, including missing ones). #
+    #********************************************************************#
+    if isinstance(classifications, pd.Series) and isinstance(classifications.dtype, pd.CategoricalDtype):
+        # Categorical input: look up each category once and take by code.
+        category_codes = mce_scores['labels'].get_indexer(classifications.cat.categories)
+        codes = classifications.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_codes[codes], -1)
+
+    return mce_scores['labels'].get_indexer(pd.Index(classifications, dtype=object))
+
+
+def FindUnknownMCELabels(df0, mce_scores):
+
+    #********************************************************************#
+    # Purpose: To collect, per classification column, every label in    #
+    #          df0 that is not present in the MCE corrosion scores      #
+    #          table. Returns {column: sorted list of labels}; columns  #
+    #          with no unknown labels are omitted.                      #
+    #********************************************************************#
+    unknown = {}
+    for classification_column in MCE_SCORE_COLUMNS:
+        codes = EncodeMCELabels(mce_scores, df0[classification_column])
+        if (codes < 0).any():
+            unknown_labels = pd.unique(df0[classification_column].to_numpy(dtype=object)[codes < 0])
+            unknown[classification_column] = sorted(unknown_labels, key=str)
+
+    return unknown
+
+
+def LookupMCEScores(df0, mce_scores):
+
+    #********************************************************************#
+    # Purpose: To look up the AGRICULTURE, WETLAND_TYPE and             #
+    #          ATMOSPHERIC_CORROSION scores of every structure with a   #
+    #          single gather per column. All unknown labels are         #
+    #          reported together in one ValueError before any scores   #
+    #          are returned.                                            #
+    #********************************************************************#
+    codes = {}
+    for classification_column in MCE_SCORE_COLUMNS:
+        codes[classification_column] = EncodeMCELabels(mce_scores, df0[classification_column])
+
+    if any((c < 0).any() for c in codes.values()):
+        raise ValueError("Classification labels not found in the MCE corrosion scores table: %s" % FindUnknownMCELabels(df0, mce_scores))
+
+    looked_up = {}
+    for classification_column, score_column in MCE_SCORE_COLUMNS.items():
+        looked_up[classification_column] = mce_scores['scores'][score_column].take(codes[classification_column])
+
+    return looked_up
+
+
+def ComputeStructureFactors(df0, mce_scores, r_spl, r_cor):
+
+    #********************************************************************#
+    # Purpose: To calculate the structure-dependent reduction factors   #
+    #          for every structure in df0 as whole-array operations.    #
+    #          Returns a dict of numpy arrays keyed by factor name.     #
+    #********************************************************************#
+    outage_density = -df0['OUTAGE_DESIGNLIFE_MOD'].to_numpy(dtype=float)
+    splice_density = np.minimum(df0['SPLICES'].to_numpy(dtype=float)/5*r_spl, r_spl)
+    wear_fatigue = df0['WEAR_FATIGUE_RED_FAC'].to_numpy(dtype=float)
+
+    # MCE scores (mce_scores may be the compiled table or the indexed DataFrame):
+    if isinstance(mce_scores, pd.DataFrame):
+        mce_scores = CompileMCEScores(mce_scores)
+    scores = LookupMCEScores(df0, mce_scores)
+    score_agriculture = scores['AGRICULTURE']
+    score_wetland = scores['WETLAND_TYPE']
+    score_corrosion_atmospheric = scores['CORROSION_ZONE']
+
+    # Soil and atmospheric corrosivity reduction factors (NaN values set to 0):
+    soil_corrosivity = np.nan_to_num(np.maximum(score_agriculture, score_wetland)/2*r_cor, nan=0.0)
+    atmospheric_corrosivity = np.nan_to_num(np.maximum(score_wetland, score_corrosion_atmospheric)/2*r_cor, nan=0.0)
+
+    return {'outage_density': outage_density,
+            'splice_density': splice_density,
+            'wear_fatigue': wear_fatigue,
+            'soil_corrosivity': soil_corrosivity,
+            'atmospheric_corrosivity': atmospheric_corrosivity}
+
+
+def ComputeDesignLifeAdjustment(formula, factors):
+
+    #********************************************************************#
+    # Purpose: To calculate the design life adjustment for one of the   #
+    #          DLIFE_TERMS formulas over arrays of reduction factors.   #
+    #          This is the single definition of the design life         #
+    #          formulas of the model.                                   #
+    #********************************************************************#
+    terms, bracketed = DLIFE_TERMS[formula]
+    outage = factors['outage_density']
+    sum_squares = sum(factors[t]**2 for t in terms)
+
+    if len(terms) == 1:
+        reduction = factors[terms[0]]
+    else:
+        reduction = np.sqrt(sum_squares)
+
+    if bracketed:
+        adjustment_negative_outage = (1 - reduction)*(1 - outage)
+    else:
+        adjustment_negative_outage = 1 - reduction*(1 - outage)
+    adjustment_positive_outage = 1 - np.sqrt(sum_squares + outage**2)
+
+    return np.where(outage < 0, adjustment_negative_outage, adjustment_positive_outage)
+
+
+def ComputeStrengthRatio(pronto_codes):
+
+    #********************************************************************#
+    # Purpose: To calculate the strength ratio from an array of Pronto  #
+    #          codes (0 or NaN -> 1, 2 -> 0.92, else 1 - (code - 1)/6). #
+    #********************************************************************#
+    codes = np.asarray(pronto_codes, dtype=float)
+    strength_ratio = 1 - (codes - 1)/6
+    strength_ratio = np.where(codes == 2, 0.92, strength_ratio)
+    strength_ratio = np.where((codes == 0) | np.isnan(codes), 1.0, strength_ratio)
+
+    return strength_ratio
+
+
+def ComputeThemeDesignLifeAdjustment(entry, factors, is_wood, is_other):
+
+    #********************************************************************#
+    # Purpose: To calculate the design life adjustment of the Pronto    #
+    #          theme entry for every structure (the WOOD formula        #
+    #          follows the renamed theme). The factor arrays may carry  #
+    #          leading dimensions (e.g. parameter sets) that broadcast  #
+    #          against the structure masks.                             #
+    #********************************************************************#
+    entry_wood = WOOD_THEME_MAP.get(entry, entry)
+    formula = DLIFE_FORMULA.get(entry, 'ALL_OTHERS')
+
+    design_life_adjustment = ComputeDesignLifeAdjustment(formula, factors)
+    formula_wood = DLIFE_FORMULA.get(entry_wood, 'ALL_OTHERS')
+    if formula_wood != formula:
+        design_life_adjustment = np.where(is_wood, ComputeDesignLifeAdjustment(formula_wood, factors), design_life_adjustment)
+    if entry == 'GUY_CD':
+        # CODE CHECK: the UNKNOWN/OTHER branch of the original loop tests
+        # entry == 'GUY', so GUY_CD falls through to the ALL_OTHERS formula.
+        design_life_adjustment = np.where(is_other, ComputeDesignLifeAdjustment('ALL_OTHERS', factors), design_life_adjustment)
+
+    return design_life_adjustment
+
+
+def ThemeProntoCodes(df0, entry, is_wood):
+
+    #********************************************************************#
+    # Purpose: To return the Pronto codes of theme entry for every      #
+    #          structure (the renamed theme's column for WOOD).         #
+    #********************************************************************#
+    entry_wood = WOOD_THEME_MAP.get(entry, entry)
+    codes = df0[entry].to_numpy(dtype=float)
+    if entry_wood != entry:
+        codes = np.where(is_wood, df0[entry_wood].to_numpy(dtype=float), codes)
+
+    return codes
+
+
+def MaterialMasks(df0):
+
+    #********************************************************************#
+    # Purpose: To return the (is_steel, is_wood, is_other) masks of the #
+    #          structures of df0.                                       #
+    #********************************************************************#
+    material = df0['MATERIAL_FLAG'].to_numpy()
+    is_steel = material == 'STEEL'
+    is_wood = material == 'WOOD'
+    is_other = ~(is_steel | is_wood)    # UNKNOWN and OTHER material types calculated as STEEL for now.
+
+    return is_steel, is_wood, is_other
+
+
+def ComputeThemeFactors(df0, df_reliability_calcs_constants, mce_scores, pronto_themes, now_year, r_spl, r_cor):
+
+    #********************************************************************#
+    # Purpose: To calculate design life adjustment, adjusted design     #
+    #          life, strength ratio, design ratio and cov for all       #
+    #          structures and all Pronto themes. Returns a DataFrame    #
+    #          (indexed like df0) with the columns produced by the      #
+    #          original per-structure loop, in the same order.          #
+    #********************************************************************#
+    factors = ComputeStructureFactors(df0, mce_scores, r_spl, r_cor)
+
+    AGE_YEARS = now_year - df0['INSTALLED_YEAR'].to_numpy(dtype=float)
+    is_steel, is_wood, is_other = MaterialMasks(df0)
+
+    columns = {}
+    for entry in pronto_themes:
+        entry_wood = WOOD_THEME_MAP.get(entry, entry)
+        design_life_adjustment = ComputeThemeDesignLifeAdjustment(entry, factors, is_wood, is_other)
+
+        # Component constants (cov, cov at design life, design life) per structure:
+        constants = df_reliability_calcs_constants[entry]
+        constants_wood = df_reliability_calcs_constants[entry_wood]
+        cov_new = np.where(is_wood, constants_wood.loc[0], constants.loc[0])
+        cov_design = np.where(is_wood, constants_wood.loc[1], constants.loc[1])
+        design_life = np.where(is_wood, constants_wood.loc[2], constants.loc[2])
+
+        design_life_adjusted = design_life*design_life_adjustment
+        cov = cov_new + (cov_design - cov_new)*(AGE_YEARS**2/design_life_adjusted**2)
+
+        columns[entry + '_' + 'des_life_adjustment'] = design_life_adjustment
+        columns[entry + '_' + 'des_life_adjusted'] = design_life_adjusted
+        columns[entry + '_' + 'strength_ratio'] = ComputeStrengthRatio(ThemeProntoCodes(df0, entry, is_wood))
+        columns[entry + '_' + 'design_ratio'] = np.ones(len(df0), dtype=np.int64)
+        columns[entry + '_' + 'cov'] = cov
+
+    return pd.DataFrame(columns, index=df0.index)
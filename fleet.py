@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Synthetic structure fleets shaped like the structure query of
+reliability_model3_draft_18Mar2020.py, for scale testing and benchmarks
+without production data.
+
+A fleet is a set of transmission lines (CSV_TLine rows: SAP_FUNC_LOC_NO,
+TLINE_MILES, OUTAGE_DESIGNLIFE_MOD) and the structures on them (CSV_Structure
+rows). Structures are numbered along their line, and line-level traits carry
+over to them: most structures on a line share its material, build year and
+corrosion zone. Pronto codes worsen with age and are NaN for the themes that
+do not apply to the structure's material (e.g. CROSSARMS_CD on steel
+towers). Every AGRICULTURE / WETLAND_TYPE / CORROSION_ZONE label is a
+df_MCE_corrosion_scores row with a score in the matching column.
+
+Fleets are reproducible: a (seed, n_structures) pair always gives the same
+rows, and a larger fleet with the same seed starts with the rows of a
+smaller one. Rows are generated in blocks of BLOCK_ROWS structures, each from
+its own random stream, so millions of structures can be streamed to SQLite
+or Parquet without holding the fleet in memory.
+
+Key functions:
+FleetLines - The CSV_TLine rows of a fleet.
+IterFleetChunks - Joined (df0-shaped) rows of a fleet, BLOCK_ROWS at a time.
+GenerateFleet - A whole fleet as one df0-shaped DataFrame.
+WriteFleetSQLite - Write a fleet to a SQLite data source (see datasource.py).
+WriteFleetParquet - Write a fleet to a Parquet dataset partitioned by
+            HOST_TLINE_NM (see parquetwriter.py).
+
+Run as a script to write a fleet:
+    python fleet.py n_structures <file.sqlite | directory.parquet> [seed]
+"""
+
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import datasource
+import parquetwriter
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+BLOCK_ROWS = 100000     # Structures per generated block (one random stream each).
+LINE_BATCH = 1024       # Lines per generated batch (one random stream each).
+
+# Structures per line: lognormal around 250, at least 5.
+LINE_STRUCTURES_MEDIAN = 250
+LINE_STRUCTURES_SIGMA = 0.9
+STRUCTURES_PER_MILE = (4.0, 8.0)    # Uniform range of structure density.
+LINE_VOLTAGES = {60: 0.25, 70: 0.15, 115: 0.35, 230: 0.2, 500: 0.05}
+
+# Material of each line, and the share of its structures of another material:
+MATERIAL_FLAGS = {'STEEL': 0.60, 'WOOD': 0.35, 'UNKNOWN': 0.03, 'OTHER': 0.02}
+MATERIAL_MIXING = 0.15
+
+# Line build eras (weight, mean year, standard deviation); structures are
+# replaced after the line was built with probability REPLACED_SHARE.
+BUILD_ERAS = [(0.15, 1925, 8), (0.45, 1958, 10), (0.30, 1978, 8), (0.10, 2003, 8)]
+INSTALLED_YEAR_RANGE = (1905, 2019)
+REPLACED_SHARE = 0.25
+
+OUTAGE_DESIGNLIFE_MODS = {-0.1: 0.1, -0.05: 0.15, 0.0: 0.45, 0.05: 0.15, 0.1: 0.1, 0.15: 0.05}
+
+# Labels (df_MCE_corrosion_scores rows scored for the column) and weights.
+# CORROSION_ZONE is drawn per line and kept by LINE_ZONE_SHARE of its structures.
+AGRICULTURE_LABELS = {'Nonagricultural and Natural Vegetation': 0.22, 'Grazing Land': 0.20, 'Urban and Built-up Land': 0.12,
+                      'Other Land': 0.08, 'Prime Farmland': 0.07, 'Farmland of Statewide Importance': 0.05,
+                      'Farmland of Local Importance': 0.04, 'Unique Farmland': 0.02, 'Not Mapped': 0.04,
+                      'Rural Residential and Rural Commercial': 0.03, 'Rural Residential Land': 0.02,
+                      'Vacant or Disturbed Land': 0.03, 'Irrigated Farmland (interim)': 0.01, 'Local Potential': 0.01,
+                      'Farmland of Local Potential': 0.01, 'Semi-agricultural and Rural Commercial Land': 0.01,
+                      'Confined Animal Agriculture': 0.01, 'Water': 0.02, 'Water Area': 0.01}
+WETLAND_LABELS = {'None': 0.70, 'Blank': 0.12, 'Freshwater Emergent Wetland': 0.05, 'Freshwater Forested/Shrub Wetland': 0.03,
+                  'Riverine': 0.03, 'Freshwater Pond': 0.02, 'Lake': 0.01, 'Estuarine and Marine Wetland': 0.02,
+                  'Estuarine and Marine Deepwater': 0.01, 'other': 0.01}
+CORROSION_ZONE_LABELS = {'None': 0.55, 'moderate': 0.30, 'severe': 0.15}
+LINE_ZONE_SHARE = 0.85
+
+# Pronto codes: share of NaN per theme (not inspected or no such component),
+# and code probabilities (0 = no finding, 1 = best ... 5 = worst) for
+# structures installed from CODE_AGE_SPLIT_YEAR on and before it.
+PRONTO_NAN_SHARE = {'ANCHOR_CD': 0.55, 'GUY_CD': 0.60, 'STRUCTURE_CD': 0.10, 'FOUNDATION_CD': 0.10,
+                    'CROSSARMS_CD': 0.15, 'FRAME_ATTACH_CD': 0.15, 'STRUCT_ATTACH_CD': 0.15, 'STUB_SPLICE_CD': 0.30,
+                    'CONDUCTOR_CD': 0.10, 'OGW_CD': 0.35, 'HARDWARE_INSUL_CD': 0.10}
+STEEL_ONLY_THEMES = ['FOUNDATION_CD', 'STRUCT_ATTACH_CD', 'STUB_SPLICE_CD']
+WOOD_ONLY_THEMES = ['STRUCTURE_CD', 'FRAME_ATTACH_CD', 'CROSSARMS_CD']
+PRONTO_CODES = [0, 1, 2, 3, 4, 5]
+CODE_PROBABILITIES_NEWER = [0.60, 0.12, 0.18, 0.07, 0.025, 0.005]
+CODE_PROBABILITIES_OLDER = [0.45, 0.08, 0.24, 0.15, 0.06, 0.02]
+CODE_AGE_SPLIT_YEAR = 1970
+
+SPLICES_MEAN = 1.2      # Poisson mean of splices per structure span.
+WEAR_FATIGUE_SHARE = 0.3    # Share of structures with a wear and fatigue reduction.
+WEAR_FATIGUE_RANGE = (0.02, 0.10)
+WSIP_SCOPE_SHARE = 0.1
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _Choice(rng, weights, size):
+
+    #********************************************************************#
+    # Purpose: To draw size values from a {value: weight} dict.         #
+    #********************************************************************#
+    values = list(weights)
+    probabilities = np.array(list(weights.values()), dtype=float)
+
+    return np.array(values)[rng.choice(len(values), size=size, p=probabilities/probabilities.sum())]
+
+
+def _BuildYears(rng, size):
+
+    #********************************************************************#
+    # Purpose: To draw line build years from the BUILD_ERAS mixture.    #
+    #********************************************************************#
+    weights, means, stddevs = (np.array(values, dtype=float) for values in zip(*BUILD_ERAS))
+    era = rng.choice(len(BUILD_ERAS), size=size, p=weights/weights.sum())
+    years = np.rint(rng.normal(means[era], stddevs[era]))
+
+    return np.clip(years, *INSTALLED_YEAR_RANGE).astype(np.int64)
+
+
+def _LineBatch(seed, batch):
+
+    #********************************************************************#
+    # Purpose: To generate lines batch*LINE_BATCH ... (batch+1)*        #
+    #          LINE_BATCH - 1 with their structure counts and the       #
+    #          line-level traits passed on to their structures.         #
+    #********************************************************************#
+    rng = np.random.default_rng([seed, 1, batch])
+    numbers = np.arange(batch*LINE_BATCH, (batch + 1)*LINE_BATCH)
+    n_structures = np.maximum(5, np.rint(rng.lognormal(np.log(LINE_STRUCTURES_MEDIAN), LINE_STRUCTURES_SIGMA, LINE_BATCH))).astype(np.int64)
+    voltages = _Choice(rng, LINE_VOLTAGES, LINE_BATCH)
+
+    return pd.DataFrame({'SAP_FUNC_LOC_NO': ['ETL.%06d' % number for number in numbers],
+                         'HOST_TLINE_NM': ['SYNTHETIC %06d %dKV' % (number, voltage) for number, voltage in zip(numbers, voltages)],
+                         'TLINE_MILES': np.round(n_structures/rng.uniform(*STRUCTURES_PER_MILE, LINE_BATCH), 2),
+                         'OUTAGE_DESIGNLIFE_MOD': _Choice(rng, OUTAGE_DESIGNLIFE_MODS, LINE_BATCH).astype(float),
+                         'N_STRUCTURES': n_structures,
+                         'MATERIAL_FLAG': _Choice(rng, MATERIAL_FLAGS, LINE_BATCH),
+                         'BUILD_YEAR': _BuildYears(rng, LINE_BATCH),
+                         'CORROSION_ZONE': _Choice(rng, CORROSION_ZONE_LABELS, LINE_BATCH)})
+
+
+def _FleetLineTraits(n_structures, seed):
+
+    #********************************************************************#
+    # Purpose: To generate line batches until they hold n_structures    #
+    #          structures; the last line is cut to fit. Returns the     #
+    #          lines with their traits and first structure row.         #
+    #********************************************************************#
+    batches = []
+    total = 0
+    while total < n_structures:
+        batches.append(_LineBatch(seed, len(batches)))
+        total += batches[-1]['N_STRUCTURES'].sum()
+    df_lines = pd.concat(batches, ignore_index=True) if batches else _LineBatch(seed, 0).iloc[:0]
+
+    first_row = np.cumsum(df_lines['N_STRUCTURES'].to_numpy()) - df_lines['N_STRUCTURES'].to_numpy()
+    df_lines = df_lines[first_row < n_structures].copy()
+    df_lines['FIRST_ROW'] = first_row[:len(df_lines)]
+    df_lines['N_STRUCTURES'] = np.minimum(df_lines['N_STRUCTURES'], n_structures - df_lines['FIRST_ROW'])
+
+    return df_lines
+
+
+def FleetLines(n_structures, seed=0):
+
+    #********************************************************************#
+    # Purpose: To return the CSV_TLine rows (datasource.TLINE_COLUMNS)  #
+    #          of the lines carrying a fleet of n_structures.           #
+    #********************************************************************#
+    return _FleetLineTraits(n_structures, seed)[list(datasource.TLINE_COLUMNS)].reset_index(drop=True)
+
+
+def _StructureBlock(seed, block, df_lines):
+
+    #********************************************************************#
+    # Purpose: To generate the BLOCK_ROWS structure rows of block       #
+    #          joined with their lines, in the column order of the      #
+    #          structure query. A whole block is always drawn, so its   #
+    #          rows do not depend on the fleet size.                    #
+    #********************************************************************#
+    rng = np.random.default_rng([seed, 2, block])
+    n = BLOCK_ROWS
+    rows = np.arange(block*BLOCK_ROWS, (block + 1)*BLOCK_ROWS)
+    line = np.searchsorted(df_lines['FIRST_ROW'].to_numpy(), rows, side='right') - 1
+    position = rows - df_lines['FIRST_ROW'].to_numpy()[line]   # Structure number along the line.
+
+    material = df_lines['MATERIAL_FLAG'].to_numpy()[line]
+    mixed = rng.random(n) < MATERIAL_MIXING
+    material = np.where(mixed, _Choice(rng, MATERIAL_FLAGS, n), material)
+
+    build_year = df_lines['BUILD_YEAR'].to_numpy()[line]
+    replaced = rng.random(n) < REPLACED_SHARE
+    installed_year = np.where(replaced, rng.integers(build_year, INSTALLED_YEAR_RANGE[1] + 1), build_year)
+
+    zone = np.where(rng.random(n) < LINE_ZONE_SHARE, df_lines['CORROSION_ZONE'].to_numpy()[line],
+                    _Choice(rng, CORROSION_ZONE_LABELS, n))
+
+    df = pd.DataFrame({'SAP_EQUIP_ID': 40000000 + rows,
+                       'ETGIS_ID': ['S%09d' % row for row in rows],
+                       'STRUCTURE_NO': ['%03d/%03d' % (k // 10, k % 10) for k in position],
+                       'WEAR_FATIGUE_RED_FAC': np.where(rng.random(n) < WEAR_FATIGUE_SHARE,
+                                                        np.round(rng.uniform(*WEAR_FATIGUE_RANGE, n), 3), 0.0),
+                       'SAP_FUNC_LOC_NO': df_lines['SAP_FUNC_LOC_NO'].to_numpy()[line],
+                       'AGRICULTURE': _Choice(rng, AGRICULTURE_LABELS, n),
+                       'WETLAND_TYPE': _Choice(rng, WETLAND_LABELS, n),
+                       'CORROSION_ZONE': zone,
+                       'INSTALLED_YEAR': installed_year.astype(np.int64),
+                       'MATERIAL_FLAG': material})
+
+    is_wood = material == 'WOOD'
+    older = installed_year < CODE_AGE_SPLIT_YEAR
+    cumulative_newer = np.cumsum(CODE_PROBABILITIES_NEWER)/np.sum(CODE_PROBABILITIES_NEWER)
+    cumulative_older = np.cumsum(CODE_PROBABILITIES_OLDER)/np.sum(CODE_PROBABILITIES_OLDER)
+    for theme, nan_share in PRONTO_NAN_SHARE.items():
+        draws = rng.random(n)
+        codes = np.array(PRONTO_CODES, dtype=float)[np.minimum(np.where(older, np.searchsorted(cumulative_older, draws, side='right'),
+                                                                        np.searchsorted(cumulative_newer, draws, side='right')),
+                                                               len(PRONTO_CODES) - 1)]
+        missing = rng.random(n) < nan_share
+        if theme in STEEL_ONLY_THEMES:
+            missing |= is_wood
+        elif theme in WOOD_ONLY_THEMES:
+            missing |= ~is_wood
+        codes[missing] = np.nan
+        df[theme] = codes
+
+    df['WSIP_SCOPE_IND'] = np.where(rng.random(n) < WSIP_SCOPE_SHARE, 'Y', 'N')
+    df['HOST_TLINE_NM'] = df_lines['HOST_TLINE_NM'].to_numpy()[line]
+    df['SPLICES'] = rng.poisson(SPLICES_MEAN, n).astype(float)
+    df['TLINE_MILES'] = df_lines['TLINE_MILES'].to_numpy()[line]
+    df['OUTAGE_DESIGNLIFE_MOD'] = df_lines['OUTAGE_DESIGNLIFE_MOD'].to_numpy()[line]
+
+    return df
+
+
+def IterFleetChunks(n_structures, seed=0):
+
+    #********************************************************************#
+    # Purpose: To yield the rows of a fleet of n_structures as          #
+    #          DataFrames of up to BLOCK_ROWS rows, shaped like the     #
+    #          structure query result (index 0-based per chunk).        #
+    #********************************************************************#
+    n_blocks = -(-n_structures // BLOCK_ROWS)
+    df_lines = _FleetLineTraits(n_blocks*BLOCK_ROWS, seed)
+    for block in range(n_blocks):
+        df_block = _StructureBlock(seed, block, df_lines)
+        yield df_block.iloc[:n_structures - block*BLOCK_ROWS].copy() if block == n_blocks - 1 else df_block
+
+
+def GenerateFleet(n_structures, seed=0):
+
+    #********************************************************************#
+    # Purpose: To return a whole fleet of n_structures as one           #
+    #          DataFrame shaped like the structure query result.        #
+    #********************************************************************#
+    chunks = list(IterFleetChunks(n_structures, seed))
+    if not chunks:
+        return _StructureBlock(seed, 0, _FleetLineTraits(BLOCK_ROWS, seed)).iloc[:0]
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+def WriteFleetSQLite(path, n_structures, seed=0):
+
+    #********************************************************************#
+    # Purpose: To write a fleet to the CSV_Structure and CSV_TLine      #
+    #          tables of a SQLite file (replacing them). Returns the    #
+    #          data source for it.                                      #
+    #********************************************************************#
+    source = datasource.CreateSQLiteSource(path, df_tline=FleetLines(n_structures, seed))
+    connection = sqlite3.connect(path)
+    try:
+        for df_chunk in IterFleetChunks(n_structures, seed):
+            df_chunk[list(datasource.STRUCTURE_COLUMNS)].to_sql('CSV_Structure', connection, if_exists='append', index=False)
+        connection.commit()
+    finally:
+        connection.close()
+
+    return source
+
+
+def WriteFleetParquet(path, n_structures, seed=0):
+
+    #********************************************************************#
+    # Purpose: To write a fleet (joined rows) to a Parquet dataset      #
+    #          partitioned by HOST_TLINE_NM, replacing any dataset at   #
+    #          path. Returns the parquetwriter summary.                 #
+    #********************************************************************#
+    writer = parquetwriter.OpenParquetWriter(path)
+    for df_chunk in IterFleetChunks(n_structures, seed):
+        parquetwriter.WriteParquetChunk(writer, df_chunk)
+
+    return parquetwriter.CloseParquetWriter(writer)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit("usage: python fleet.py n_structures <file.sqlite | directory.parquet> [seed]")
+    n_structures, path = int(sys.argv[1]), sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    start = time.perf_counter()
+    if path.endswith('.parquet'):
+        WriteFleetParquet(path, n_structures, seed)
+    else:
+        WriteFleetSQLite(path, n_structures, seed)
+    print("Wrote %d structures on %d lines (seed %d) to %s in %.1f s"
+          % (n_structures, len(FleetLines(n_structures, seed)), seed, path, time.perf_counter() - start))
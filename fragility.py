@@ -0,0 +1,559 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Probability of failure (p_f) kernels for the fragility curve
+calculations in reliability_model3_draft_18Mar2020.py.
+
+Key functions:
+ComputeDistributionParameters - mean_<COMPONENT> and stddev_<COMPONENT>
+            (and mu) of every structure from its Pronto-theme strength
+            ratio, design ratio and cov.
+ComputeProbabilityFailureMatrix - p_f for every structure at every wind
+            speed (structures x speeds) in a single pass. Each component
+            CDF is evaluated once over the whole wind-speed grid and shared
+            by the series-system product and the maximum term.
+WindSpeedGrid - Wind speeds (mph) at which p_f is evaluated, from
+            start/stop/step or an explicit list (default 0 to 120 mph in 1 mph
+            steps).
+IterProbabilityFailureChunks - p_f in row chunks sized to a memory budget,
+            so a fine grid over the full fleet is never held in RAM at once.
+ComputeCrossingWindSpeeds - Wind speed at which each structure's p_f first
+            reaches each of a list of thresholds, found with a vectorized
+            bracketed root-finder on the p_f expression (no dense grid).
+ComputeForecastProbabilityFailure - p_f of every structure at its own
+            forecast wind speed (one evaluation per structure), with the
+            forecast table joined on SAP_EQUIP_ID or ETGIS_ID.
+ProbabilityFailureFrame - Wrap the p_f matrix as one contiguous float
+            block with the _<wspeed>_mph column labels, ready to be attached
+            to df0 in a single operation.
+TabulateCDF - Component CDFs evaluated once per distinct parameter pair,
+            looked up by the sweep.
+LogNormCDFClosedForm - Closed-form lognormal CDF on precomputed
+            per-structure parameters (scipy.special.ndtr), used in place of
+            the scipy.stats.lognorm.cdf dispatch by default.
+
+Note: p_f is calculated with the positional arguments used since the first
+draft, lognorm.cdf(wspeed, mean, stddev), i.e. shape s = mean, loc = stddev
+and scale = 1. Both CDF backends keep that parameterization.
+
+Performance: the CDF is the cost of the sweep (ndtr alone is about 5-9 ns
+per value), so TabulateCDF evaluates it once per distinct (shape, loc) pair
+of a component instead of once per structure. The parameters come from the
+Pronto codes, material, MCE scores and the age in whole years, so pairs
+repeat across a fleet: on 100,000 structures of fleet.py the eight
+components hold 4,000-36,000 distinct pairs each, and the sweep over 121
+speeds takes about 0.5 s on one CPU, against 5.3-5.8 s for the original
+loop of 121 ComputeProbabilityFailureLogNorm calls through
+scipy.stats.lognorm (10-12x). Results are bit-identical with and without
+the tables. Parameters that never repeat (e.g. a continuous random cov) get
+no tables and run at about 4x. Skipping the cells where the CDF is exactly
+0 (speed <= loc) or saturates at 1 saves nothing here: about 98% of the
+cells of the default grid lie strictly between.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+# Components entering p_f, in the argument order of
+# ComputeProbabilityFailureLogNorm (mean_<COMPONENT>, stddev_<COMPONENT>):
+COMPONENTS = ['ANCHOR', 'GUY', 'FOUNDATION', 'STUB_SPLICE', 'STRUCT_ATTACH', 'CONDUCTOR', 'OGW', 'HI']
+
+# Pronto theme of each component: themes that always use mu_steel, and themes
+# using mu_steel for STEEL structures and mu_wood otherwise:
+STEEL_MU_THEMES = {'ANCHOR': 'ANCHOR_CD', 'GUY': 'GUY_CD', 'CONDUCTOR': 'CONDUCTOR_CD', 'OGW': 'OGW_CD', 'HI': 'HARDWARE_INSUL_CD'}
+MATERIAL_MU_THEMES = {'FOUNDATION': 'FOUNDATION_CD', 'STUB_SPLICE': 'STUB_SPLICE_CD', 'STRUCT_ATTACH': 'STRUCT_ATTACH_CD'}
+
+# Default wind-speed grid (mph), inclusive of the stop value:
+WSPEED_START = 0
+WSPEED_STOP = 120
+WSPEED_STEP = 1
+
+# Float arrays alive per p_f cell while a block is evaluated (output, survival
+# product, maximum CDF, component CDF and its temporaries, and the CDF tables
+# of TabulateCDF); used to size chunks.
+ARRAYS_PER_CELL = 8
+
+# Structures per block of the p_f sweep: the block's working arrays and the
+# CDF table rows it gathers stay within the CPU cache.
+BLOCK_ROWS = 256
+
+# CDF tables (TabulateCDF): a component is tabulated when its distinct
+# (shape, loc) pairs number at most TABULATE_MAX_FRACTION of the structures,
+# and the tables hold at most TABULATE_MAX_ROWS rows per structure in all.
+TABULATE_MAX_FRACTION = 0.5
+TABULATE_MAX_ROWS = 2
+
+# Bracket (mph) and tolerances for ComputeCrossingWindSpeeds:
+CROSSING_WSPEED_MIN = 0
+CROSSING_WSPEED_MAX = 500
+CROSSING_WSPEED_TOL = 1e-6
+CROSSING_MAX_ITERATIONS = 100
+
+# Forecast table columns used by ComputeForecastProbabilityFailure:
+FORECAST_KEYS = ['SAP_EQUIP_ID', 'ETGIS_ID']
+FORECAST_WSPEED_COLUMN = 'FORECAST_WSPEED'
+
+# Lognormal CDF implementations ('closed_form' or 'scipy'):
+DEFAULT_CDF_BACKEND = 'closed_form'
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def ComputeDistributionParameters(df0, mu_steel, mu_wood):
+
+    #********************************************************************#
+    # Purpose: To calculate the lognormal parameters of every component #
+    #          (mean = strength_ratio*design_ratio*mu, stddev = mean    #
+    #          times cov) from the <THEME>_strength_ratio, _design_ratio #
+    #          and _cov columns of df0. Returns a DataFrame with the    #
+    #          mean_/stddev_ columns and mu, in the script's column     #
+    #          order.                                                   #
+    #********************************************************************#
+    columns = {}
+    for component, theme in STEEL_MU_THEMES.items():
+        ratio = df0[theme + '_strength_ratio'].to_numpy(dtype=float) * df0[theme + '_design_ratio'].to_numpy(dtype=float)
+        columns['mean_' + component] = ratio * mu_steel
+        columns['stddev_' + component] = ratio * df0[theme + '_cov'].to_numpy(dtype=float) * mu_steel
+
+    mu = np.where(df0['MATERIAL_FLAG'].to_numpy() == 'STEEL', mu_steel, mu_wood)
+    columns['mu'] = mu
+    for component, theme in MATERIAL_MU_THEMES.items():
+        ratio = df0[theme + '_strength_ratio'].to_numpy(dtype=float) * df0[theme + '_design_ratio'].to_numpy(dtype=float)
+        columns['mean_' + component] = ratio * mu
+        columns['stddev_' + component] = ratio * df0[theme + '_cov'].to_numpy(dtype=float) * mu
+
+    return pd.DataFrame(columns, index=df0.index)
+
+
+def ComponentParameters(df0):
+
+    #********************************************************************#
+    # Purpose: To collect the mean_<COMPONENT> and stddev_<COMPONENT>   #
+    #          columns of df0 into a dict of float arrays.              #
+    #********************************************************************#
+    component_parameters = {}
+    for component in COMPONENTS:
+        component_parameters['mean_' + component] = np.asarray(df0['mean_' + component], dtype=float)
+        component_parameters['stddev_' + component] = np.asarray(df0['stddev_' + component], dtype=float)
+
+    return component_parameters
+
+
+def WindSpeedGrid(start=WSPEED_START, stop=WSPEED_STOP, step=WSPEED_STEP, wspeeds=None):
+
+    #********************************************************************#
+    # Purpose: To assemble the wind speeds (mph) at which p_f is        #
+    #          calculated. An explicit list in wspeeds takes precedence #
+    #          over start/stop/step; stop is included in the grid, as   #
+    #          range(0,121) included 120 mph.                           #
+    #********************************************************************#
+    if wspeeds is not None:
+        grid = np.asarray(wspeeds, dtype=float).ravel()
+    else:
+        if step <= 0:
+            raise ValueError("Wind speed step must be positive, got %s" % step)
+        n_speeds = int(np.floor((stop - start)/step + 1e-9)) + 1
+        grid = np.round(start + step*np.arange(n_speeds), 9)   # Drop floating-point drift from fractional steps.
+
+    if grid.size == 0:
+        raise ValueError("Wind speed grid is empty")
+
+    return grid
+
+
+def ChunkRowsForBudget(n_speeds, memory_budget_bytes):
+
+    #********************************************************************#
+    # Purpose: To return the number of structures per chunk such that   #
+    #          the p_f working arrays of one chunk fit in               #
+    #          memory_budget_bytes (at least one structure).            #
+    #********************************************************************#
+    bytes_per_row = n_speeds*np.dtype(float).itemsize*ARRAYS_PER_CELL
+
+    return max(1, int(memory_budget_bytes // bytes_per_row))
+
+
+def PrepareCDFParameters(component_parameters, backend=DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To precompute, once per structure and component, the     #
+    #          parameters used by the selected CDF backend. Returns     #
+    #          {component: (first, loc)} where first is the shape s     #
+    #          ('scipy') or 1/s ('closed_form', NaN where s <= 0 as     #
+    #          scipy treats such shapes as invalid).                    #
+    #********************************************************************#
+    if backend not in CDF_BACKENDS:
+        raise ValueError("Unknown CDF backend '%s'; expected one of %s" % (backend, sorted(CDF_BACKENDS)))
+
+    cdf_parameters = {}
+    for component in COMPONENTS:
+        shape = np.asarray(component_parameters['mean_' + component], dtype=float)
+        loc = np.asarray(component_parameters['stddev_' + component], dtype=float)
+        if backend == 'closed_form':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                shape = np.where(shape > 0, 1/shape, np.nan)
+        cdf_parameters[component] = (shape, loc)
+
+    return cdf_parameters
+
+
+def LogNormCDFScipy(wspeeds, shape, loc, out=None):
+
+    #********************************************************************#
+    # Purpose: Lognormal CDF through scipy.stats.lognorm (reference).   #
+    #          scipy.stats is imported here: it takes longer to import  #
+    #          than the rest of the model, and the default backend does #
+    #          not need it. The result is copied into out when given.   #
+    #********************************************************************#
+    from scipy.stats import lognorm
+
+    cdf = lognorm.cdf(wspeeds, shape, loc)
+    if out is None:
+        return cdf
+    out[...] = cdf
+    return out
+
+
+def LogNormCDFClosedForm(wspeeds, inv_shape, loc, out=None):
+
+    #********************************************************************#
+    # Purpose: Lognormal CDF Phi(log(x - loc)/s) with 1/s precomputed,  #
+    #          evaluated directly with scipy.special.ndtr, every step   #
+    #          in place in one array (out when given). Returns 0 for    #
+    #          x <= loc and NaN for NaN or invalid parameters, as       #
+    #          scipy.stats.lognorm.cdf does.                            #
+    #********************************************************************#
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.subtract(wspeeds, loc, out=out)
+        np.maximum(z, 0, out=z)
+        np.log(z, out=z)
+        z *= inv_shape
+    return ndtr(z, out=z)
+
+
+CDF_BACKENDS = {'closed_form': LogNormCDFClosedForm,
+                'scipy': LogNormCDFScipy}
+
+
+def ComputeProbabilityFailureAt(wspeeds, cdf_parameters, index, backend=DEFAULT_CDF_BACKEND, cdf_tables=None):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f at wspeeds for the structures selected  #
+    #          by index (applied to the per-structure parameter arrays; #
+    #          wspeeds must broadcast against the selection). Each      #
+    #          component CDF is evaluated once into one reused buffer;  #
+    #          the survival product and the maximum CDF are accumulated #
+    #          in place, and p_f is returned in the survival array, so  #
+    #          a call allocates three result-sized arrays in all. A     #
+    #          component in cdf_tables {component: (table, table_rows)} #
+    #          takes its CDF rows from the table instead (see           #
+    #          TabulateCDF).                                            #
+    #********************************************************************#
+    cdf_function = CDF_BACKENDS[backend]
+
+    survival = None     # Running product of (1 - CDF) over the components.
+    cdf_max = None      # Running maximum of the component CDFs.
+    cdf = None          # CDF of the current component, then 1 - CDF.
+    for component in COMPONENTS:
+        if cdf_tables is not None and component in cdf_tables:
+            table, table_rows = cdf_tables[component]
+            cdf = np.take(table, table_rows, axis=0, out=cdf)
+        else:
+            first, loc = cdf_parameters[component]
+            cdf = cdf_function(wspeeds, first[index], loc[index], out=cdf)
+
+        if survival is None:
+            cdf_max = cdf.copy()
+            survival = np.subtract(1, cdf)
+        else:
+            np.maximum(cdf_max, cdf, out=cdf_max)
+            np.subtract(1, cdf, out=cdf)
+            survival *= cdf
+
+    prob_fail = np.subtract(1, survival, out=survival)
+    prob_fail += cdf_max
+    prob_fail /= 2
+
+    return prob_fail
+
+
+def TabulateCDF(wspeeds, cdf_parameters, rows, backend=DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To evaluate the CDF of each component once per distinct  #
+    #          (shape, loc) pair among the structures in the slice      #
+    #          'rows' (structures of the same age, material, codes and  #
+    #          MCE scores share their parameters) at every wind speed   #
+    #          in wspeeds (a 1 x speeds array). Returns {component:     #
+    #          (table, inverse)}: the CDFs of the distinct pairs and,   #
+    #          for each structure, its table row (indexed like the      #
+    #          parameter arrays; only the entries of rows are set).     #
+    #          Components with more than TABULATE_MAX_FRACTION distinct #
+    #          pairs per structure are left out (a table saves little   #
+    #          there), and so are the rest once the tables hold         #
+    #          TABULATE_MAX_ROWS per structure.                         #
+    #********************************************************************#
+    cdf_function = CDF_BACKENDS[backend]
+    n_rows = rows.stop - rows.start
+
+    distinct = {}
+    for component in COMPONENTS:
+        # Distinct pairs by their bit patterns (so NaN parameters group too),
+        # each represented by one of its structures:
+        first, loc = (np.ascontiguousarray(values[rows], dtype=float) for values in cdf_parameters[component])
+        first_codes, _ = pd.factorize(first.view(np.int64))
+        loc_codes, loc_bits = pd.factorize(loc.view(np.int64))
+        pair_codes, pairs = pd.factorize(first_codes*len(loc_bits) + loc_codes)
+        representative = np.empty(len(pairs), dtype=np.intp)
+        representative[pair_codes] = np.arange(n_rows)
+        inverse = np.empty(len(cdf_parameters[component][1]), dtype=np.intp)
+        inverse[rows] = pair_codes
+        distinct[component] = (first[representative], loc[representative], inverse)
+
+    cdf_tables = {}
+    table_rows = 0
+    for component in sorted(COMPONENTS, key=lambda component: len(distinct[component][0])):
+        first, loc, inverse = distinct[component]
+        table_rows += len(first)
+        if len(first) > TABULATE_MAX_FRACTION*n_rows or table_rows > TABULATE_MAX_ROWS*n_rows:
+            break
+        table = np.empty((len(first), wspeeds.shape[-1]))
+        for start in range(0, len(first), BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            cdf_function(wspeeds, first[block, np.newaxis], loc[block, np.newaxis], out=table[block])
+        cdf_tables[component] = (table, inverse)
+
+    return cdf_tables
+
+
+def ComputeProbabilityFailureBlock(wspeeds, cdf_parameters, rows, backend=DEFAULT_CDF_BACKEND, cdf_tables=None):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f for the structures in the slice 'rows'  #
+    #          at every wind speed in wspeeds (a 1 x speeds array),     #
+    #          taking the CDFs of the components in cdf_tables (from    #
+    #          TabulateCDF over rows or a range holding them) from      #
+    #          their tables.                                            #
+    #********************************************************************#
+    if cdf_tables is not None:
+        cdf_tables = {component: (table, inverse[rows]) for component, (table, inverse) in cdf_tables.items()}
+
+    return ComputeProbabilityFailureAt(wspeeds, cdf_parameters, (rows, np.newaxis), backend, cdf_tables)
+
+
+def ComputeProbabilityFailureMatrix(wspeeds, component_parameters, block_rows=BLOCK_ROWS, backend=DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f for every structure at every wind speed #
+    #          in wspeeds. component_parameters holds the per-structure #
+    #          mean_<COMPONENT> / stddev_<COMPONENT> arrays (a dict or  #
+    #          df0). Returns a float array of shape                     #
+    #          (structures, len(wspeeds)), equal to calling             #
+    #          ComputeProbabilityFailureLogNorm once per wind speed.    #
+    #          Structures are processed block_rows at a time so the     #
+    #          working arrays stay cache-sized.                         #
+    #********************************************************************#
+    wspeeds = np.asarray(wspeeds, dtype=float)[np.newaxis, :]
+    cdf_parameters = PrepareCDFParameters(component_parameters, backend)
+    n_structures = len(cdf_parameters[COMPONENTS[0]][1])
+
+    cdf_tables = TabulateCDF(wspeeds, cdf_parameters, slice(0, n_structures), backend)
+
+    prob_fail = np.empty((n_structures, wspeeds.shape[1]))
+    for start in range(0, n_structures, block_rows):
+        rows = slice(start, min(start + block_rows, n_structures))
+        prob_fail[rows] = ComputeProbabilityFailureBlock(wspeeds, cdf_parameters, rows, backend, cdf_tables)
+
+    return prob_fail
+
+
+def IterProbabilityFailureChunks(wspeeds, component_parameters, memory_budget_bytes, backend=DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f chunk by chunk of structures. Yields    #
+    #          (rows, prob_fail) where rows is the slice of structures  #
+    #          and prob_fail its (rows x speeds) matrix; chunk size is  #
+    #          chosen by ChunkRowsForBudget from memory_budget_bytes.   #
+    #********************************************************************#
+    wspeeds = np.asarray(wspeeds, dtype=float)
+    cdf_parameters = PrepareCDFParameters(component_parameters, backend)
+    n_structures = len(cdf_parameters[COMPONENTS[0]][1])
+    chunk_rows = ChunkRowsForBudget(len(wspeeds), memory_budget_bytes)
+    block_rows = min(BLOCK_ROWS, chunk_rows)
+
+    for start in range(0, n_structures, chunk_rows):
+        rows = slice(start, min(start + chunk_rows, n_structures))
+        cdf_tables = TabulateCDF(wspeeds[np.newaxis, :], cdf_parameters, rows, backend)
+        prob_fail = np.empty((rows.stop - rows.start, len(wspeeds)))
+        for block_start in range(rows.start, rows.stop, block_rows):
+            block = slice(block_start, min(block_start + block_rows, rows.stop))
+            prob_fail[block.start - rows.start:block.stop - rows.start] = \
+                ComputeProbabilityFailureBlock(wspeeds[np.newaxis, :], cdf_parameters, block, backend, cdf_tables)
+        yield rows, prob_fail
+
+
+def ProbabilityFailureLabel(wspeed):
+
+    #********************************************************************#
+    # Purpose: To return the df0 column label for p_f at wspeed, e.g.   #
+    #          '_0_mph' or '_0.25_mph' (whole-number speeds keep the    #
+    #          integer format).                                         #
+    #********************************************************************#
+    return "_" + np.format_float_positional(float(wspeed), trim='-') + "_mph"
+
+
+def ProbabilityFailureFrame(prob_fail, wspeeds, index=None, dtype=None):
+
+    #********************************************************************#
+    # Purpose: To wrap the (structures x speeds) p_f matrix in a        #
+    #          DataFrame holding it as a single float block (no copy    #
+    #          unless dtype, e.g. np.float32, differs), labelled        #
+    #          _<wspeed>_mph, so it can be attached to df0 in one       #
+    #          pd.concat instead of one column insert per speed.        #
+    #********************************************************************#
+    if dtype is not None:
+        prob_fail = prob_fail.astype(dtype, copy=False)
+    return pd.DataFrame(prob_fail, index=index, columns=[ProbabilityFailureLabel(w) for w in wspeeds], copy=False)
+
+
+def ComputeCrossingWindSpeeds(component_parameters, thresholds, wspeed_min=CROSSING_WSPEED_MIN, wspeed_max=CROSSING_WSPEED_MAX,
+                              tol=CROSSING_WSPEED_TOL, memory_budget_bytes=256*2**20, backend=DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To find, for every structure and every p_f threshold,    #
+    #          the wind speed (mph) at which p_f reaches the threshold. #
+    #          p_f is non-decreasing in wind speed; the crossing is     #
+    #          bracketed in closed form from the component quantiles    #
+    #          (within [wspeed_min, wspeed_max]) and located with a     #
+    #          vectorized Illinois (modified false position) iteration  #
+    #          to within tol mph. Returns a (structures x thresholds)   #
+    #          array: wspeed_min where p_f(wspeed_min) already reaches  #
+    #          the threshold, NaN where it is not reached by            #
+    #          wspeed_max or the parameters are invalid.                #
+    #********************************************************************#
+    thresholds = np.asarray(thresholds, dtype=float).ravel()
+    if ((thresholds <= 0) | (thresholds >= 1)).any():
+        raise ValueError("p_f thresholds must lie strictly between 0 and 1, got %s" % thresholds)
+    cdf_parameters = PrepareCDFParameters(component_parameters, backend)
+    n_structures = len(cdf_parameters[COMPONENTS[0]][1])
+    chunk_rows = ChunkRowsForBudget(len(thresholds), memory_budget_bytes)
+
+    crossing = np.full((n_structures, len(thresholds)), np.nan)
+    for start in range(0, n_structures, chunk_rows):
+        rows = np.arange(start, min(start + chunk_rows, n_structures))
+        structure_index = np.repeat(rows, len(thresholds))
+        target = np.tile(thresholds, len(rows))
+
+        # Closed-form bracket from the largest component CDF M:
+        # M <= p_f <= (len(COMPONENTS) + 1)*M/2, so p_f reaches the threshold
+        # between the first component quantiles at 2*threshold/(len(COMPONENTS) + 1)
+        # and at threshold.
+        a = np.full(len(target), np.inf)
+        b = np.full(len(target), np.inf)
+        q_lower = ndtri(2*target/(len(COMPONENTS) + 1))
+        q_upper = ndtri(target)
+        for component in COMPONENTS:
+            shape = np.asarray(component_parameters['mean_' + component], dtype=float)[structure_index]
+            loc = np.asarray(component_parameters['stddev_' + component], dtype=float)[structure_index]
+            with np.errstate(invalid='ignore', over='ignore'):
+                a = np.fmin(a, loc + np.exp(shape*q_lower))
+                b = np.fmin(b, loc + np.exp(shape*q_upper))
+        a = np.clip(a, wspeed_min, wspeed_max)
+        b = np.clip(b, wspeed_min, wspeed_max)
+
+        # f = p_f - threshold, with f(a) < 0 <= f(b) on the active bracket.
+        fa = ComputeProbabilityFailureAt(a, cdf_parameters, structure_index, backend) - target
+        fb = ComputeProbabilityFailureAt(b, cdf_parameters, structure_index, backend) - target
+
+        # Where round-off (e.g. loc + exp(s*q) == loc for large s) leaves the
+        # closed-form upper end short of the threshold, fall back to wspeed_max.
+        widen = np.flatnonzero((fb < 0) & (b < wspeed_max))
+        if len(widen):
+            b[widen] = wspeed_max
+            fb[widen] = ComputeProbabilityFailureAt(b[widen], cdf_parameters, structure_index[widen], backend) - target[widen]
+
+        result = np.full(len(target), np.nan)
+        result[fa >= 0] = a[fa >= 0]
+        active = np.flatnonzero((fa < 0) & (fb >= 0))
+        a, b, fa, fb = a[active], b[active], fa[active], fb[active]
+        side = np.zeros(len(active), dtype=np.int8)     # Endpoint retained on the last step (-1: a, +1: b).
+
+        for iteration in range(CROSSING_MAX_ITERATIONS):
+            if len(active) == 0:
+                break
+            c = (a*fb - b*fa)/(fb - fa)
+            c = np.where((c > a) & (c < b), c, (a + b)/2)    # Guard against round-off leaving the bracket.
+            fc = ComputeProbabilityFailureAt(c, cdf_parameters, structure_index[active], backend) - target[active]
+
+            # Illinois step: halve the retained endpoint's f when the same end is replaced twice.
+            upper = fc >= 0
+            fa = np.where(upper & (side == 1), fa/2, fa)
+            fb = np.where(~upper & (side == -1), fb/2, fb)
+            a, fa = np.where(upper, a, c), np.where(upper, fa, fc)
+            b, fb = np.where(upper, c, b), np.where(upper, fc, fb)
+            side = np.where(upper, 1, -1).astype(np.int8)
+
+            done = (b - a <= tol) | (fc == 0)
+            result[active[done]] = np.where(fc[done] == 0, c[done], b[done])
+            keep = ~done
+            active, a, b, fa, fb, side = active[keep], a[keep], b[keep], fa[keep], fb[keep], side[keep]
+
+        result[active] = b      # Not converged within CROSSING_MAX_ITERATIONS: upper end of the bracket.
+        crossing[rows] = result.reshape(len(rows), len(thresholds))
+
+    return crossing
+
+
+def CrossingWindSpeedLabel(threshold):
+
+    #********************************************************************#
+    # Purpose: To return the column label for the crossing wind speed   #
+    #          of a p_f threshold, e.g. 'wspeed_at_p_f_0.01'.           #
+    #********************************************************************#
+    return "wspeed_at_p_f_" + np.format_float_positional(float(threshold), trim='-')
+
+
+def CrossingWindSpeedFrame(crossing, thresholds, index=None):
+
+    #********************************************************************#
+    # Purpose: To wrap the (structures x thresholds) output of          #
+    #          ComputeCrossingWindSpeeds in a DataFrame labelled        #
+    #          wspeed_at_p_f_<threshold>.                               #
+    #********************************************************************#
+    return pd.DataFrame(crossing, index=index, columns=[CrossingWindSpeedLabel(t) for t in thresholds], copy=False)
+
+
+def ComputeForecastProbabilityFailure(df0, df_forecast, key='SAP_EQUIP_ID', wspeed_column=FORECAST_WSPEED_COLUMN,
+                                      component_parameters=None, backend=DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f for every structure in df0 only at its  #
+    #          own forecast wind speed. df_forecast holds one row per   #
+    #          structure with the join key (SAP_EQUIP_ID or ETGIS_ID)   #
+    #          and the forecast wind speed (mph) in wspeed_column.      #
+    #          Returns a DataFrame indexed like df0 with the columns    #
+    #          FORECAST_WSPEED and p_f_forecast; both are NaN for       #
+    #          structures without a forecast.                           #
+    #********************************************************************#
+    if key not in FORECAST_KEYS:
+        raise ValueError("Forecast join key must be one of %s, got '%s'" % (FORECAST_KEYS, key))
+    forecast_keys = pd.Index(df_forecast[key])
+    if forecast_keys.has_duplicates:
+        raise ValueError("Duplicate %s values in the forecast table: %s" % (key, sorted(forecast_keys[forecast_keys.duplicated()].unique(), key=str)[:20]))
+
+    # Join: position of each structure's key in the forecast table (-1 when absent).
+    position = forecast_keys.get_indexer(df0[key])
+    found = position >= 0
+    forecast_wspeed = np.full(len(df0), np.nan)
+    forecast_wspeed[found] = np.asarray(df_forecast[wspeed_column], dtype=float)[position[found]]
+
+    if component_parameters is None:
+        component_parameters = ComponentParameters(df0)
+    cdf_parameters = PrepareCDFParameters(component_parameters, backend)
+    prob_fail = ComputeProbabilityFailureAt(forecast_wspeed, cdf_parameters, slice(None), backend)
+
+    return pd.DataFrame({FORECAST_WSPEED_COLUMN: forecast_wspeed, 'p_f_forecast': prob_fail}, index=df0.index)
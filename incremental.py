@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Incremental re-scoring for reliability_model3_draft_18Mar2020.py.
+
+Every structure's input row is fingerprinted (64-bit hash of all of its
+input columns) and the active parameter set is fingerprinted as a whole.
+The outputs of a run are cached together with those fingerprints; on the
+next run, structures whose input fingerprint is found in a cache built with
+the same parameter fingerprint reuse their cached outputs and only new or
+changed structures are recomputed. A parameter change invalidates the whole
+cache.
+
+Key functions:
+RowFingerprints - Input fingerprint of every structure.
+ParameterFingerprint - Fingerprint of the active parameter set.
+LoadCache / SaveCache - Read and write the cache file (pandas pickle).
+MatchCache - Position of every structure in the cache (-1 for a miss).
+CachedOutput - Cached output rows for the structures that hit.
+IterIncrementalChunks - Output rows chunk by chunk in population order,
+            p_f calculated for the misses and taken from the cache for the
+            hits.
+RunSummary - Hit/miss counts and the estimated time saved.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import fragility
+import parallel
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+CACHE_VERSION = 1       # Bump when the model equations change to invalidate existing caches.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def RowFingerprints(df0, columns=None):
+
+    #********************************************************************#
+    # Purpose: To hash every row of df0 (restricted to columns, default #
+    #          all input columns) into a uint64 fingerprint. Equal      #
+    #          input rows give equal fingerprints, independent of the   #
+    #          row's position in the query result.                      #
+    #********************************************************************#
+    if columns is not None:
+        df0 = df0[columns]
+
+    return pd.util.hash_pandas_object(df0, index=False).to_numpy()
+
+
+def ParameterFingerprint(*parameter_values):
+
+    #********************************************************************#
+    # Purpose: To fingerprint the active parameter set (constants       #
+    #          tables, scalar model parameters, the run year, the wind  #
+    #          speed grid, ...). Returns a hex digest string.           #
+    #********************************************************************#
+    digest = hashlib.sha256()
+    digest.update(repr(CACHE_VERSION).encode())
+    for value in parameter_values:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+            digest.update(repr(list(value.index)).encode())
+            digest.update(pd.util.hash_pandas_object(value.astype(str), index=False).to_numpy().tobytes())
+        elif isinstance(value, np.ndarray):
+            digest.update(repr((value.dtype.str, value.shape)).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b'|')
+
+    return digest.hexdigest()
+
+
+def LoadCache(path, parameter_fingerprint):
+
+    #********************************************************************#
+    # Purpose: To load the cache written by the previous run. Returns   #
+    #          None when there is no cache or it was built with a       #
+    #          different parameter fingerprint.                         #
+    #********************************************************************#
+    if path is None or not os.path.exists(path):
+        return None
+
+    cache = pd.read_pickle(path)
+    if cache['parameter_fingerprint'] != parameter_fingerprint:
+        print("Incremental cache", path, "was built with different parameters; recomputing all structures")
+        return None
+
+    return cache
+
+
+def SaveCache(path, parameter_fingerprint, fingerprints, df_output, seconds_per_structure):
+
+    #********************************************************************#
+    # Purpose: To write the outputs of this run (rows aligned with      #
+    #          fingerprints) for reuse by the next run. The file is     #
+    #          written under a temporary name and then renamed.         #
+    #********************************************************************#
+    cache = {'parameter_fingerprint': parameter_fingerprint,
+             'fingerprints': np.asarray(fingerprints, dtype=np.uint64),
+             'df_output': df_output.reset_index(drop=True),
+             'seconds_per_structure': seconds_per_structure}
+    pd.to_pickle(cache, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def MatchCache(cache, fingerprints):
+
+    #********************************************************************#
+    # Purpose: To return, for every fingerprint, its row position in    #
+    #          the cache, or -1 when the structure is new or changed    #
+    #          (or there is no cache).                                  #
+    #********************************************************************#
+    if cache is None:
+        return np.full(len(fingerprints), -1)
+
+    cached_fingerprints = pd.Index(cache['fingerprints'])
+    if not cached_fingerprints.has_duplicates:
+        return cached_fingerprints.get_indexer(fingerprints)
+
+    # Identical input rows have identical outputs, so the first copy will do:
+    first = ~cached_fingerprints.duplicated()
+    positions = cached_fingerprints[first].get_indexer(fingerprints)
+    return np.where(positions >= 0, np.flatnonzero(first)[np.maximum(positions, 0)], -1)
+
+
+def CachedOutput(cache, positions, index):
+
+    #********************************************************************#
+    # Purpose: To return the cached output rows at positions, indexed   #
+    #          by index (the structures' rows in the current df0).      #
+    #********************************************************************#
+    df_cached = cache['df_output'].iloc[positions]
+    df_cached.index = index
+
+    return df_cached
+
+
+def IterIncrementalChunks(df_output, component_parameters, wspeeds, index, cache_positions, cache, memory_budget_bytes,
+                          backend=fragility.DEFAULT_CDF_BACKEND, pool=None, dtype=None):
+
+    #********************************************************************#
+    # Purpose: To assemble the output rows of the whole population      #
+    #          chunk by chunk, in population order. df_output and       #
+    #          component_parameters hold the misses only (structures    #
+    #          with cache_positions < 0); their p_f is calculated, the  #
+    #          hits are taken from the cache and given their index      #
+    #          labels in the population index. Yields (rows, df_chunk,  #
+    #          prob_fail) where rows is the slice of the population,    #
+    #          df_chunk its output rows and prob_fail its p_f matrix.   #
+    #          With a process pool (parallel.StartPool) the p_f of each #
+    #          chunk is split across the pool's workers. dtype (e.g.    #
+    #          np.float32) is the dtype of the p_f columns of df_chunk; #
+    #          prob_fail stays float64.                                 #
+    #********************************************************************#
+    wspeeds = np.asarray(wspeeds, dtype=float)
+    labels = [fragility.ProbabilityFailureLabel(w) for w in wspeeds]
+    cache_positions = np.asarray(cache_positions)
+    miss_rows = np.flatnonzero(cache_positions < 0)
+    chunk_rows = fragility.ChunkRowsForBudget(len(wspeeds), memory_budget_bytes)
+
+    for start in range(0, len(cache_positions), chunk_rows):
+        rows = slice(start, min(start + chunk_rows, len(cache_positions)))
+        misses = slice(*np.searchsorted(miss_rows, [rows.start, rows.stop]))
+        hits = np.flatnonzero(cache_positions[rows] >= 0)
+
+        prob_fail = parallel.ComputeProbabilityFailureMatrixParallel(
+            pool, wspeeds, {name: values[misses] for name, values in component_parameters.items()},
+            block_rows=min(fragility.BLOCK_ROWS, chunk_rows), backend=backend)
+        df_chunk = pd.concat([df_output.iloc[misses], fragility.ProbabilityFailureFrame(prob_fail, wspeeds, index=df_output.index[misses], dtype=dtype)], axis=1)
+
+        if len(hits) > 0:
+            df_cached = CachedOutput(cache, cache_positions[rows][hits], index[rows][hits])
+            df_chunk = pd.concat([df_chunk, df_cached])
+            order = np.argsort(np.r_[miss_rows[misses] - rows.start, hits], kind='stable')
+            df_chunk = df_chunk.iloc[order]
+            prob_fail = df_chunk[labels].to_numpy(dtype=float)
+
+        yield rows, df_chunk, prob_fail
+
+
+def RunSummary(n_hits, n_misses, compute_seconds, cache):
+
+    #********************************************************************#
+    # Purpose: To summarise an incremental run: cache hits and misses   #
+    #          and the time saved, estimated as hits x seconds per      #
+    #          structure. The per-structure time is measured on full    #
+    #          runs (no usable cache) and carried forward in the cache, #
+    #          since small incremental runs are dominated by fixed      #
+    #          overheads.                                               #
+    #********************************************************************#
+    if cache is not None:
+        seconds_per_structure = cache['seconds_per_structure']
+    elif n_misses > 0:
+        seconds_per_structure = compute_seconds/n_misses
+    else:
+        seconds_per_structure = 0.0
+
+    return {'hits': n_hits,
+            'misses': n_misses,
+            'compute_seconds': compute_seconds,
+            'seconds_per_structure': seconds_per_structure,
+            'estimated_seconds_saved': n_hits*seconds_per_structure}
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Transmission-line level (series system) probability of failure,
+aggregated from the structure-level p_f of reliability_model3_draft_18Mar2020.py.
+
+A line fails if any of its structures fails, so for every line and wind speed
+    p_f_line = 1 - prod(1 - p_f)
+over the line's structures. The product is accumulated as a sum of
+log-survival terms log(1 - p_f) with a segmented reduction over structures
+sorted by line, which stays numerically stable for long lines and allows the
+structure-level p_f to be aggregated chunk by chunk.
+
+Key functions:
+LineCodes - Integer line code of every structure plus the line table
+            (SAP_FUNC_LOC_NO, HOST_TLINE_NM, N_STRUCTURES).
+LineLogSurvival - Per-line sums of log(1 - p_f) for a (structures x speeds)
+            block of p_f.
+AccumulateLineLogSurvival - Running per-line log-survival sums over chunks
+            of structures whose lines are not known in advance.
+LineProbabilityFailureFrame - Compact lines x speeds p_f table from the
+            accumulated log-survival sums.
+ComputeLineProbabilityFailure - One-shot aggregation of a full p_f matrix.
+"""
+
+import numpy as np
+import pandas as pd
+
+import fragility
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+LINE_KEY = 'SAP_FUNC_LOC_NO'        # Join key between CSV_Structure and CSV_TLine.
+LINE_NAME = 'HOST_TLINE_NM'
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def LineCodes(df0, line_key=LINE_KEY, line_name=LINE_NAME):
+
+    #********************************************************************#
+    # Purpose: To assign every structure the integer code of its line   #
+    #          (-1 where the line key is missing). Returns the codes    #
+    #          and a DataFrame indexed by line key holding the line     #
+    #          name (first value per line) and the structure count.     #
+    #********************************************************************#
+    line_codes, line_keys = pd.factorize(df0[line_key])
+    df_lines = pd.DataFrame(index=pd.Index(line_keys, name=line_key))
+
+    valid = line_codes >= 0
+    if line_name in df0.columns:
+        first_valid = np.unique(line_codes[valid], return_index=True)[1]
+        df_lines[line_name] = df0[line_name].to_numpy()[np.flatnonzero(valid)[first_valid]]
+    df_lines['N_STRUCTURES'] = np.bincount(line_codes[valid], minlength=len(line_keys))
+
+    return line_codes, df_lines
+
+
+def LineLogSurvival(prob_fail, line_codes, n_lines, block_rows=2048):
+
+    #********************************************************************#
+    # Purpose: To sum log(1 - p_f) over the structures of every line    #
+    #          for a (structures x speeds) block of p_f. Structures     #
+    #          are sorted by line code and reduced segment by segment   #
+    #          (np.add.reduceat), block_rows sorted rows at a time;     #
+    #          rows with a negative code are ignored. Returns an        #
+    #          (n_lines x speeds) array that can be added up across     #
+    #          chunks of structures.                                    #
+    #********************************************************************#
+    prob_fail = np.asarray(prob_fail, dtype=float)
+    if prob_fail.ndim == 1:
+        prob_fail = prob_fail[:, np.newaxis]
+    line_codes = np.asarray(line_codes)
+
+    log_survival = np.zeros((n_lines, prob_fail.shape[1]))
+    order = np.argsort(line_codes, kind='stable')
+    order = order[line_codes[order] >= 0]
+    if len(order) == 0:
+        return log_survival
+
+    for block_start in range(0, len(order), block_rows):
+        block = order[block_start:block_start + block_rows]
+        codes_block = line_codes[block]
+        starts = np.flatnonzero(np.r_[True, codes_block[1:] != codes_block[:-1]])
+        # Sorted codes are unique per segment, so the fancy-indexed += does not collide:
+        log_survival[codes_block[starts]] += np.add.reduceat(np.log1p(-prob_fail[block]), starts, axis=0)
+
+    return log_survival
+
+
+def AccumulateLineLogSurvival(line_totals, df_chunk, prob_fail, line_key=LINE_KEY, line_name=LINE_NAME):
+
+    #********************************************************************#
+    # Purpose: To add a chunk of structures (df_chunk with its p_f      #
+    #          block) to the running line totals (df_lines,             #
+    #          log_survival), or start them when line_totals is None.   #
+    #          Lines first seen in this chunk are appended, so the line #
+    #          order is the order of first appearance, as for a single  #
+    #          LineCodes call on the whole population.                  #
+    #********************************************************************#
+    line_codes, df_lines_chunk = LineCodes(df_chunk, line_key, line_name)
+    log_survival_chunk = LineLogSurvival(prob_fail, line_codes, len(df_lines_chunk))
+    if line_totals is None:
+        return df_lines_chunk, log_survival_chunk
+
+    df_lines, log_survival = line_totals
+    new_lines = ~df_lines_chunk.index.isin(df_lines.index)
+    if new_lines.any():
+        df_lines = pd.concat([df_lines, df_lines_chunk[new_lines].assign(N_STRUCTURES=0)])
+        log_survival = np.vstack([log_survival, np.zeros((new_lines.sum(), log_survival.shape[1]))])
+
+    positions = df_lines.index.get_indexer(df_lines_chunk.index)
+    log_survival[positions] += log_survival_chunk
+    n_structures = df_lines['N_STRUCTURES'].to_numpy().copy()
+    n_structures[positions] += df_lines_chunk['N_STRUCTURES'].to_numpy()
+    df_lines['N_STRUCTURES'] = n_structures
+
+    return df_lines, log_survival
+
+
+def LineProbabilityFailureFrame(log_survival, df_lines, wspeeds):
+
+    #********************************************************************#
+    # Purpose: To convert accumulated log-survival sums into the line   #
+    #          p_f table (1 - exp(sum)), labelled _<wspeed>_mph and     #
+    #          joined to the line name and structure count.             #
+    #********************************************************************#
+    prob_fail_line = -np.expm1(log_survival)
+    df_prob_fail = fragility.ProbabilityFailureFrame(prob_fail_line, wspeeds, index=df_lines.index)
+
+    return pd.concat([df_lines, df_prob_fail], axis=1)
+
+
+def ComputeLineProbabilityFailure(df0, prob_fail, wspeeds, line_key=LINE_KEY, line_name=LINE_NAME):
+
+    #********************************************************************#
+    # Purpose: To aggregate a full (structures x speeds) p_f matrix     #
+    #          (rows aligned with df0) into the lines x speeds table.   #
+    #********************************************************************#
+    line_codes, df_lines = LineCodes(df0, line_key, line_name)
+    log_survival = LineLogSurvival(prob_fail, line_codes, len(df_lines))
+
+    return LineProbabilityFailureFrame(log_survival, df_lines, wspeeds)
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Run metrics for reliability_model3_draft_18Mar2020.py: nested named
+stage timers with row counts, throughput and peak memory, exported as one
+JSON record per run.
+
+A run recorder is a dict. Stages are named, and a stage started while
+another is running is nested under it (path 'write/csv'). A stage
+entered several times (once per chunk) is accumulated: calls, seconds and
+rows add up and the peak memory is the largest seen. Per stage:
+    seconds                 wall-clock time
+    rows                    structures processed (when the stage reports them)
+    structures_per_second   rows/seconds
+    peak_rss_mb             peak resident memory of the process while the stage
+                            ran (worker processes are not included)
+Peak memory per stage needs Linux (the peak is reset through
+/proc/self/clear_refs at each stage start); elsewhere it is the process peak
+so far, and the record says so ('peak_rss_scope': 'process').
+
+With a profile directory, top-level stages are also run under cProfile and
+tracemalloc (see profiling.py); otherwise profiling is not even imported.
+
+Key functions:
+StartRun - Recorder for a run (the run clock starts here), optionally
+            profiling every top-level stage.
+StartStage / EndStage - Time a stage (for script-level blocks).
+Stage - The same as a context manager.
+TimedIterator - Time each step of an iterator as a stage (e.g. fetching query
+            chunks), counting its rows.
+FinishRun - The run's metrics record.
+WriteMetrics - Write a record as JSON (or append it to a .jsonl file).
+PrintSummary - Print a record as a table.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import platform
+import time
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+METRICS_VERSION = 1
+STAGE_SEPARATOR = '/'
+CLEAR_REFS_PATH = '/proc/self/clear_refs'
+STATUS_PATH = '/proc/self/status'
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _ReadPeakRSS():
+
+    #********************************************************************#
+    # Purpose: To read the peak resident memory (bytes) of the process  #
+    #          since the last reset (VmHWM), or since it started.       #
+    #          Returns None when it cannot be read.                     #
+    #********************************************************************#
+    try:
+        with open(STATUS_PATH) as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])*1024
+    except (OSError, ValueError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if platform.system() == 'Darwin' else peak*1024 # bytes on macOS, kB elsewhere
+
+    return None
+
+
+def _ResetPeakRSS():
+
+    #********************************************************************#
+    # Purpose: To reset the process peak resident memory to the         #
+    #          current one (Linux). Returns False where not supported.  #
+    #********************************************************************#
+    try:
+        with open(CLEAR_REFS_PATH, 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def StartRun(name, profile_directory=None):
+
+    #********************************************************************#
+    # Purpose: To start recording the metrics of a run; with            #
+    #          profile_directory, top-level stages are also profiled    #
+    #          into that directory.                                     #
+    #********************************************************************#
+    profiler = None
+    if profile_directory is not None:
+        import profiling
+        profiler = profiling.StartProfiler(profile_directory)
+
+    return {'name': name,
+            'started': datetime.datetime.now().isoformat(timespec='seconds'),
+            'start': time.perf_counter(),
+            'peak_rss_scope': 'stage' if _ResetPeakRSS() else 'process',
+            'stages': {},       # path -> accumulated metrics, in order of first start
+            'stack': [],        # running stages, innermost last
+            'profiler': profiler}
+
+
+def StartStage(recorder, name):
+
+    #********************************************************************#
+    # Purpose: To start the stage name, nested under the innermost      #
+    #          running stage.                                           #
+    #********************************************************************#
+    stack = recorder['stack']
+    peak = _ReadPeakRSS()
+    if stack and peak is not None:
+        stack[-1]['peak'] = max(stack[-1]['peak'] or 0, peak)
+    if recorder['peak_rss_scope'] == 'stage':
+        _ResetPeakRSS()
+
+    path = STAGE_SEPARATOR.join([entry['name'] for entry in stack] + [name])
+    if path not in recorder['stages']:
+        recorder['stages'][path] = {'stage': path, 'depth': len(stack), 'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_rss': None}
+    if recorder['profiler'] is not None and not stack:
+        import profiling
+        profiling.ProfileStageStart(recorder['profiler'], path)
+    stack.append({'name': name, 'path': path, 'start': time.perf_counter(), 'peak': _ReadPeakRSS()})
+
+
+def EndStage(recorder, name, rows=0, calls=1):
+
+    #********************************************************************#
+    # Purpose: To end the stage name (the innermost running stage),     #
+    #          adding rows structures to its count.                     #
+    #********************************************************************#
+    stack = recorder['stack']
+    if not stack or stack[-1]['name'] != name:
+        raise ValueError("Stage '%s' is not the running stage (%s)" % (name, stack[-1]['path'] if stack else 'none'))
+
+    entry = stack.pop()
+    seconds = time.perf_counter() - entry['start']
+    if recorder['profiler'] is not None and not stack:
+        import profiling
+        profiling.ProfileStageEnd(recorder['profiler'], entry['path'])
+    peak = _ReadPeakRSS()
+    if peak is not None:
+        peak = max(entry['peak'] or 0, peak)
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'] or 0, peak)
+
+    stage = recorder['stages'][entry['path']]
+    stage['calls'] += calls
+    stage['seconds'] += seconds
+    stage['rows'] += rows
+    if peak is not None:
+        stage['peak_rss'] = max(stage['peak_rss'] or 0, peak)
+
+
+@contextlib.contextmanager
+def Stage(recorder, name, rows=0):
+
+    #********************************************************************#
+    # Purpose: Context manager form of StartStage/EndStage. Yields a    #
+    #          dict whose 'rows' the block can set.                     #
+    #********************************************************************#
+    counts = {'rows': rows, 'calls': 1}
+    StartStage(recorder, name)
+    try:
+        yield counts
+    finally:
+        EndStage(recorder, name, counts['rows'], counts['calls'])
+
+
+def TimedIterator(recorder, name, iterable, count_rows=len):
+
+    #********************************************************************#
+    # Purpose: To yield the items of iterable, timing the production of #
+    #          each one as a call of stage name with count_rows(item)   #
+    #          rows. Only the step itself is timed, not the caller's    #
+    #          work on the item.                                        #
+    #********************************************************************#
+    iterator = iter(iterable)
+    while True:
+        with Stage(recorder, name) as counts:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                counts['calls'] = 0
+                return
+            counts['rows'] = count_rows(item)
+        yield item
+
+
+def FinishRun(recorder, **info):
+
+    #********************************************************************#
+    # Purpose: To end the run and return its metrics record (a dict of  #
+    #          JSON types). info (run settings and counts) is stored    #
+    #          with it.                                                 #
+    #********************************************************************#
+    while recorder['stack']:
+        EndStage(recorder, recorder['stack'][-1]['name'])
+    seconds = time.perf_counter() - recorder['start']
+    profile_files = None
+    if recorder['profiler'] is not None:
+        import profiling
+        profile_files = profiling.WriteProfiles(recorder['profiler'])
+
+    stages = []
+    for stage in recorder['stages'].values():
+        stages.append({'stage': stage['stage'],
+                       'depth': stage['depth'],
+                       'calls': stage['calls'],
+                       'seconds': stage['seconds'],
+                       'rows': stage['rows'],
+                       'structures_per_second': stage['rows']/stage['seconds'] if stage['rows'] and stage['seconds'] > 0 else None,
+                       'peak_rss_mb': stage['peak_rss']/2**20 if stage['peak_rss'] is not None else None})
+
+    # Run peak: the stage peaks cover everything up to the last reset.
+    peaks = [stage['peak_rss'] for stage in recorder['stages'].values() if stage['peak_rss'] is not None] + [_ReadPeakRSS() or 0]
+    peak = max(peaks)/2**20 if max(peaks) > 0 else None
+
+    return {'version': METRICS_VERSION,
+            'run': recorder['name'],
+            'started': recorder['started'],
+            'finished': datetime.datetime.now().isoformat(timespec='seconds'),
+            'seconds': seconds,
+            'host': platform.node(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'peak_rss_mb': peak,
+            'peak_rss_scope': recorder['peak_rss_scope'],
+            'info': info,
+            'profile_files': profile_files,
+            'stages': stages}
+
+
+def WriteMetrics(record, path):
+
+    #********************************************************************#
+    # Purpose: To write record to path as JSON; a .jsonl path gets the  #
+    #          record appended as one line, to keep a run history.      #
+    #********************************************************************#
+    if path.endswith('.jsonl'):
+        with open(path, 'a') as metrics_file:
+            metrics_file.write(json.dumps(record, default=str) + '\n')
+    else:
+        with open(path, 'w') as metrics_file:
+            json.dump(record, metrics_file, indent=1, default=str)
+
+
+def PrintSummary(record):
+
+    #********************************************************************#
+    # Purpose: To print the stages of record as an indented table.      #
+    #********************************************************************#
+    print("%-32s %6s %10s %10s %12s %9s" % ('stage', 'calls', 'seconds', 'rows', 'structures/s', 'peak MB'))
+    for stage in record['stages']:
+        print("%-32s %6d %10.3f %10d %12s %9s" % ('  '*stage['depth'] + stage['stage'].split(STAGE_SEPARATOR)[-1], stage['calls'],
+                                               stage['seconds'], stage['rows'],
+                                               '%.0f' % stage['structures_per_second'] if stage['structures_per_second'] else '',
+                                               '%.0f' % stage['peak_rss_mb'] if stage['peak_rss_mb'] is not None else ''))
+    print("Run %s: %.3f s, peak memory %s MB" % (record['run'], record['seconds'],
+                                               '%.0f' % record['peak_rss_mb'] if record['peak_rss_mb'] is not None else 'n/a'))
@@ -0,0 +1,507 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Library API of the fragility curve model of
+reliability_model3_draft_18Mar2020.py.
+
+Importing this module only defines functions: nothing connects to a
+database, runs or writes anything. The calculation steps can be used on
+any DataFrame with the columns of the structure query (datasource.py):
+    ModelParameters             the inputs not read from the structure query
+                                (MCE corrosion scores, component constants,
+                                r_spl, r_cor, mu_steel, mu_wood)
+    ComputeFactors              Pronto-theme factors
+    ComputeDistributionParams   mean_/stddev_ of every component
+    ComputeFragility            p_f at each wind speed of a grid
+and RunModel is the full run of the script on top of them (data source,
+chunking, incremental cache, outputs and run metrics), driven by a settings
+dict (DEFAULT_SETTINGS).
+
+The database drivers and writers (pyodbc, sqlalchemy, pyarrow) and
+scipy.stats are imported only by the runs that use them, so tools that only
+need the kernels start without them.
+
+Key functions:
+ModelParameters - Model inputs (a dict) from a parameters module.
+SyntheticParameters - Model inputs from tables.SYNTHETIC_PARAMETERS, for
+            synthetic fleets (benchmarks, tests).
+ComputeFactors / ComputeDistributionParams / ComputeFragility - The
+            calculation steps.
+ScoreStructures - All three steps: the output rows of a set of structures.
+CheckSettings - Reject unknown settings and combinations a run cannot honour.
+RunModel - Run the model with a settings dict; returns the run metrics
+            record.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import compact # Compact dtypes of the structure rows and outputs
+import datasource # Structure/line data sources (SQL Server or a local SQLite file)
+import factors # Columnar Pronto-theme factor calculations
+import fragility # Probability of failure kernels
+import incremental # Fingerprints and cache for incremental re-scoring
+import lines # Line-level (series system) probability of failure
+import metrics # Stage timers and the run metrics record
+import parallel # Process pool for the p_f sweep
+import tables # Hard-coded input tables (MCE corrosion scores, component constants)
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+# Settings of a run (see the INPUT section of reliability_model3_draft_18Mar2020.py):
+DEFAULT_SETTINGS = {'write_csv': True,
+                    'write_db': False,
+                    'db_url': None,                     # SQLAlchemy URL instead of the Exponent database
+                    'write_parquet': False,
+                    'filename_parquet': 'df0_calculations.parquet',
+                    'write_curve_store': False,
+                    'dirname_curve_store': 'fragility_curve_store',
+                    'filename_metrics': 'reliability_metrics.json',
+                    'wspeed_start': fragility.WSPEED_START,
+                    'wspeed_stop': fragility.WSPEED_STOP,
+                    'wspeed_step': fragility.WSPEED_STEP,
+                    'wspeed_list': None,
+                    'memory_budget_mb': 512,
+                    'workers': 1,
+                    'filename_forecast': None,
+                    'forecast_key': 'SAP_EQUIP_ID',
+                    'filename_incremental_cache': None,
+                    'sql_chunksize': None,
+                    'data_source': 'sqlserver',
+                    'filename_sqlite': 'reliability_inputs.sqlite',
+                    'dirname_profile': None,
+                    'compact_dtypes': False,            # Categorical labels, small-integer Pronto codes (see compact.py)
+                    'float32_outputs': False}           # Factors, mean_/stddev_ and p_f stored as float32
+
+# Outputs of a wind-speed grid run only; forecast mode writes its csv alone:
+GRID_ONLY_SETTINGS = {'write_db': 'the database table',
+                      'write_parquet': 'Parquet output',
+                      'write_curve_store': 'the p_f curve store',
+                      'filename_incremental_cache': 'the incremental cache'}
+
+# Output files:
+FILENAME_CSV = 'df0_calculations.csv'
+FILENAME_FORECAST_CSV = 'df0_forecast_calculations.csv'
+FILENAME_LINE_CSV = 'df_line_calculations.csv'
+DB_TABLE = 'test_Reliability'
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def ModelParameters(parameters_module=None):
+
+    #********************************************************************#
+    # Purpose: To collect the model inputs that do not come from the    #
+    #          structure query: the MCE corrosion scores, the component #
+    #          constants and the values of parameters_module (default   #
+    #          parameters.py). Returns a dict.                          #
+    #********************************************************************#
+    if parameters_module is None:
+        import parameters as parameters_module # Module of hard-coded values not pulled from database
+
+    # (Needs updating) Hard-coded values will be read from the database tables; see tables.py.
+    df_MCE_corrosion_scores_indexed = tables.MCECorrosionScores().set_index('ROW_LABELS')
+
+    return {'mce_corrosion_scores': df_MCE_corrosion_scores_indexed,
+            'mce_scores': factors.CompileMCEScores(df_MCE_corrosion_scores_indexed),
+            'reliability_calcs_constants': tables.ReliabilityCalcsConstants(parameters_module),
+            'steel_pronto_themes': parameters_module.steel_pronto_themes,
+            'r_spl': parameters_module.r_spl,
+            'r_cor': parameters_module.r_cor,
+            'mu_steel': parameters_module.mu_steel,
+            'mu_wood': parameters_module.mu_wood}
+
+
+def SyntheticParameters():
+
+    #********************************************************************#
+    # Purpose: To collect the model inputs with the placeholder values  #
+    #          of tables.SYNTHETIC_PARAMETERS in place of parameters.py #
+    #          (which needs the production database configuration).    #
+    #********************************************************************#
+    return ModelParameters(tables.SYNTHETIC_PARAMETERS)
+
+
+def ComputeFactors(df0, model_parameters, now_year=None):
+
+    #********************************************************************#
+    # Purpose: To return df0 with the Pronto-theme factor columns       #
+    #          (des_life_adjustment, des_life_adjusted, strength_ratio, #
+    #          design_ratio, cov) added. Ages are taken at now_year     #
+    #          (default the current year).                              #
+    #********************************************************************#
+    if now_year is None:
+        now_year = datetime.datetime.now().year
+    df_theme_factors = factors.ComputeThemeFactors(df0, model_parameters['reliability_calcs_constants'], model_parameters['mce_scores'],
+                                                   model_parameters['steel_pronto_themes'], now_year,
+                                                   model_parameters['r_spl'], model_parameters['r_cor'])
+
+    return pd.concat([df0, df_theme_factors], axis=1)
+
+
+def ComputeDistributionParams(df0, model_parameters):
+
+    #********************************************************************#
+    # Purpose: To return df0 (with the factor columns) with the mean_   #
+    #          and stddev_ columns of every component and mu added.     #
+    #********************************************************************#
+    df_distribution = fragility.ComputeDistributionParameters(df0, model_parameters['mu_steel'], model_parameters['mu_wood'])
+
+    return pd.concat([df0, df_distribution], axis=1)
+
+
+def ComputeFragility(df0, wspeeds=None, backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f of every structure of df0 (with the     #
+    #          distribution columns) at each of wspeeds (default grid   #
+    #          0-120 mph). Returns a DataFrame of the _<wspeed>_mph     #
+    #          columns on df0's index.                                  #
+    #********************************************************************#
+    if wspeeds is None:
+        wspeeds = fragility.WindSpeedGrid()
+    prob_fail = fragility.ComputeProbabilityFailureMatrix(wspeeds, fragility.ComponentParameters(df0), backend=backend)
+
+    return fragility.ProbabilityFailureFrame(prob_fail, wspeeds, index=df0.index)
+
+
+def ScoreStructures(df0, model_parameters, wspeeds=None, now_year=None):
+
+    #********************************************************************#
+    # Purpose: To run the calculation steps on the structures of df0    #
+    #          (structure query columns). Returns the output rows as    #
+    #          written by a run: the calculated columns and p_f at each #
+    #          wind speed, without the input columns of tables.DROP_LIST.#
+    #********************************************************************#
+    df0 = ComputeDistributionParams(ComputeFactors(df0, model_parameters, now_year), model_parameters)
+
+    return pd.concat([df0.drop(columns=tables.DROP_LIST), ComputeFragility(df0, wspeeds)], axis=1)
+
+
+def ReliabilityColumnTypes(wspeeds):
+
+    #********************************************************************#
+    # Purpose: To return the SQL Server column types of the             #
+    #          test_Reliability table (p_f columns follow the           #
+    #          wind-speed grid). sqlalchemy is imported here.           #
+    #********************************************************************#
+    from sqlalchemy.dialects.mssql import DECIMAL, VARCHAR, DATETIME, INTEGER
+
+    dtype_DB = {'SAP_EQUIP_ID' : INTEGER,
+                'ETGIS_ID' : VARCHAR(50) ,
+                'STRUCTURE_NO' : VARCHAR(50) ,
+                'SAP_FUNC_LOC_NO' : VARCHAR(50) ,
+                'HOST_TLINE_NM' : VARCHAR(100),
+                'WSIP_SCOPE_IND' : VARCHAR(1)}
+    for theme in ['ANCHOR_CD', 'GUY_CD', 'FOUNDATION_CD', 'STUB_SPLICE_CD', 'STRUCT_ATTACH_CD', 'CONDUCTOR_CD', 'OGW_CD', 'HARDWARE_INSUL_CD']:
+        dtype_DB[theme + '_des_life_adjustment'] = DECIMAL(18, 15)
+        dtype_DB[theme + '_des_life_adjusted'] = DECIMAL(18, 15)
+        dtype_DB[theme + '_strength_ratio'] = DECIMAL(8, 6)
+        dtype_DB[theme + '_design_ratio'] = DECIMAL(8, 6)
+        dtype_DB[theme + '_cov'] = DECIMAL(18, 15)
+    for component in ['ANCHOR', 'GUY', 'CONDUCTOR', 'OGW', 'HI']:
+        dtype_DB['mean_' + component] = DECIMAL(6, 3)
+        dtype_DB['stddev_' + component] = DECIMAL(20, 15)
+    dtype_DB['mu'] = DECIMAL(6, 3)
+    for component in ['FOUNDATION', 'STUB_SPLICE', 'STRUCT_ATTACH']:
+        dtype_DB['mean_' + component] = DECIMAL(6, 3)
+        dtype_DB['stddev_' + component] = DECIMAL(20, 15)
+    for wspeed in wspeeds:
+        dtype_DB[fragility.ProbabilityFailureLabel(wspeed)] = DECIMAL(16, 15)
+    dtype_DB['DATETIME'] = DATETIME
+
+    return dtype_DB
+
+
+def _OpenEngine(db_url):
+
+    #********************************************************************#
+    # Purpose: To create the SQLAlchemy engine of the output database:  #
+    #          db_url, or the Exponent database (config.py) when None.  #
+    #********************************************************************#
+    from sqlalchemy import create_engine
+
+    if (db_url is None):
+        import urllib.parse
+        import config # Configuration file with Exponent database info
+        params = urllib.parse.quote_plus(driver = '{SQL Server}', server = config.ExpoServer, database = config.ExpoDatabase, trusted_connection = 'yes')
+        return create_engine("mssql+pyodbc:///?odbc_connect=%s" % params, fast_executemany=True)
+
+    return create_engine(db_url)
+
+
+def CheckSettings(settings):
+
+    #********************************************************************#
+    # Purpose: To raise a ValueError for unknown settings and for       #
+    #          outputs requested in forecast mode (filename_forecast),  #
+    #          which writes only df0_forecast_calculations.csv.         #
+    #********************************************************************#
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError("Unknown settings %s" % sorted(unknown))
+    settings = dict(DEFAULT_SETTINGS, **settings)
+
+    if settings['filename_forecast'] is not None:
+        requested = [name for key, name in GRID_ONLY_SETTINGS.items() if settings[key] not in (False, None)]
+        if requested:
+            raise ValueError("Forecast mode writes only %s; it cannot write %s" % (FILENAME_FORECAST_CSV, ", ".join(requested)))
+
+
+def RunModel(settings=None, parameters_module=None):
+
+    #********************************************************************#
+    # Purpose: To run the model: read the structures from the data      #
+    #          source, calculate them chunk by chunk and write the      #
+    #          outputs selected in settings (DEFAULT_SETTINGS for the   #
+    #          keys left out). Returns the run metrics record.          #
+    #********************************************************************#
+    CheckSettings(settings or {}) # Before anything is opened.
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    writeCSV = settings['write_csv']
+    writeDB = settings['write_db']
+    writeParquet = settings['write_parquet']
+    writeCurveStore = settings['write_curve_store']
+    filename_forecast = settings['filename_forecast']
+    filename_incremental_cache = settings['filename_incremental_cache']
+    memory_budget_mb = settings['memory_budget_mb']
+    compact_dtypes = settings['compact_dtypes']
+    float32_outputs = settings['float32_outputs']
+    output_dtype = compact.OUTPUT_FLOAT_DTYPE if float32_outputs else None
+
+    run_metrics = metrics.StartRun('reliability_model3', settings['dirname_profile']) # Run clock and stage timers (see metrics.py).
+    metrics.StartStage(run_metrics, 'setup')
+
+    # Database import: the connection is opened when the run starts reading
+    # structures (below), not here.
+    source = datasource.OpenDataSource(settings['data_source'], settings['filename_sqlite'] if settings['data_source'] == 'sqlite' else None)
+    structure_query = datasource.StructureQuery(source)
+    model_parameters = ModelParameters(parameters_module)
+
+    now = datetime.datetime.now() # Identify the current date-time-year.
+    wspeeds = fragility.WindSpeedGrid(settings['wspeed_start'], settings['wspeed_stop'], settings['wspeed_step'], settings['wspeed_list'])
+    chunk_rows = fragility.ChunkRowsForBudget(len(wspeeds), memory_budget_mb*2**20)
+
+    drop_list = tables.DROP_LIST # Input columns not written to the outputs.
+
+    # Date and time at which script was run
+    run_datetime = datetime.datetime.now()
+
+    db_writer = None
+    if (writeDB):
+        import dbwriter # Bulk writer for the test_Reliability table
+        # Output chunks go to a staging table that replaces test_Reliability once all are written:
+        db_writer = dbwriter.OpenBulkWriter(_OpenEngine(settings['db_url']), DB_TABLE, ReliabilityColumnTypes(wspeeds))
+
+    if (filename_forecast is not None):
+        print("Calculating p_f at forecast wind speeds from", filename_forecast)
+        df_forecast = pd.read_csv(filename_forecast)
+    else:
+        print("Calculating p_f at", len(wspeeds), "wind speeds in chunks of", chunk_rows, "structures")
+
+    # Incremental re-scoring: structures whose input row is unchanged since the
+    # cached run (made with the same parameter set) are taken from the cache. The
+    # structure query fixes the input columns, so it is part of the parameter set.
+    parameter_fingerprint = incremental.ParameterFingerprint(structure_query, model_parameters['reliability_calcs_constants'],
+                                                             model_parameters['mce_corrosion_scores'], model_parameters['steel_pronto_themes'],
+                                                             model_parameters['r_spl'], model_parameters['r_cor'], model_parameters['mu_steel'],
+                                                             model_parameters['mu_wood'], now.year, wspeeds, drop_list,
+                                                             fragility.DEFAULT_CDF_BACKEND)
+    if (compact_dtypes or float32_outputs):
+        # Cached outputs hold the dtypes of the run that made them:
+        parameter_fingerprint = incremental.ParameterFingerprint(parameter_fingerprint, compact_dtypes, float32_outputs)
+    cache = None
+    if (filename_incremental_cache is not None):
+        cache = incremental.LoadCache(filename_incremental_cache, parameter_fingerprint)
+    fingerprint_chunks = []
+    cache_chunks = []
+
+    pool = parallel.StartPool(settings['workers'], chunk_rows, len(wspeeds)) if filename_forecast is None else None
+    if (writeParquet):
+        import parquetwriter # Parquet output partitioned by transmission line
+        parquet_writer = parquetwriter.OpenParquetWriter(settings['filename_parquet'])
+    if (writeCurveStore):
+        import curvestore # Memory-mapped p_f curve store with ID indexes
+        curve_writer = curvestore.OpenCurveStoreWriter(settings['dirname_curve_store'], wspeeds)
+
+    metrics.EndStage(run_metrics, 'setup')
+    output_chunk_number = 0 # Output chunks written so far; the first one replaces the csv/table, later ones append.
+    n_structures = 0
+    n_misses = 0
+    compute_seconds = 0.0   # Calculation time without output writing, for the incremental time-saved estimate.
+    line_totals = None      # Running per-line log-survival sums (see lines.AccumulateLineLogSurvival).
+
+    # One pass per query chunk (a single chunk holding every structure unless
+    # sql_chunksize is set); each chunk is written out and released before the
+    # next one is pulled.
+    df0_chunks = datasource.IterStructures(source, chunksize=settings['sql_chunksize']) # Rows are fetched as the loop consumes them.
+    for df0 in metrics.TimedIterator(run_metrics, 'ingest', df0_chunks):
+        # Number the structures across query chunks (each chunk arrives with its own 0-based index):
+        df0.index = pd.RangeIndex(n_structures, n_structures + len(df0))
+        n_structures += len(df0)
+        if (compact_dtypes):
+            with metrics.Stage(run_metrics, 'compact', len(df0)):
+                df0 = compact.CompactStructures(df0)
+        compute_startTime = datetime.datetime.now()
+
+        #---------------------------------------------#
+        # Incremental re-scoring: reuse cached outputs #
+        #---------------------------------------------#
+        # df0 keeps only the new or changed structures; population_index keeps
+        # the whole chunk.
+        metrics.StartStage(run_metrics, 'incremental_match')
+        fingerprints = incremental.RowFingerprints(df0)
+        cache_positions = incremental.MatchCache(cache, fingerprints)
+        population_index = df0.index
+        if (filename_incremental_cache is not None):
+            fingerprint_chunks.append(fingerprints)
+        if (cache is not None):
+            df0 = df0[cache_positions < 0]
+            print("Incremental cache:", len(df0), "new or changed structures of", len(population_index))
+        n_misses += len(df0)
+        metrics.EndStage(run_metrics, 'incremental_match', len(population_index))
+
+        #-------------------------------------------#
+        # Begin Pronto-theme dependent calculations #
+        #-------------------------------------------#
+        # All structures and all Pronto themes are calculated as whole-array
+        # operations (see factors.py). WOOD structures reference STRUCTURE_CD,
+        # FRAME_ATTACH_CD and CROSSARMS_CD in place of FOUNDATION_CD,
+        # STRUCT_ATTACH_CD and STUB_SPLICE_CD; UNKNOWN and OTHER material types are
+        # calculated as STEEL for now.
+        metrics.StartStage(run_metrics, 'factors')
+        df0 = ComputeFactors(df0, model_parameters, now.year)
+        metrics.EndStage(run_metrics, 'factors', len(df0))
+
+        #---------------------------------------------------------------#
+        # Begin probability of failure (p_f) calculations at windspeeds #
+        #---------------------------------------------------------------#
+        # mean_ and stddev_ of each component from its Pronto theme: ANCHOR, GUY,
+        # CONDUCTOR, OGW and HI always use mu_steel; FOUNDATION, STUB_SPLICE and
+        # STRUCT_ATTACH use mu_steel for STEEL structures and mu_wood otherwise.
+        metrics.StartStage(run_metrics, 'distribution')
+        df0 = ComputeDistributionParams(df0, model_parameters)
+        metrics.EndStage(run_metrics, 'distribution', len(df0))
+
+        compute_seconds += (datetime.datetime.now() - compute_startTime).total_seconds()
+
+        if (filename_forecast is not None):
+            # p_f at each structure's forecast wind speed only:
+            metrics.StartStage(run_metrics, 'forecast')
+            df_output = df0.drop(columns= drop_list)
+            df_output = pd.concat([df_output, fragility.ComputeForecastProbabilityFailure(df0, df_forecast, key=settings['forecast_key'])], axis=1)
+            if (float32_outputs):
+                df_output = compact.CompactOutputs(df_output)
+            df_output['DATETIME'] = run_datetime
+            metrics.EndStage(run_metrics, 'forecast', len(df_output))
+            if (writeCSV):
+                print("Writing to csv, chunk", output_chunk_number)
+                with metrics.Stage(run_metrics, 'write'), metrics.Stage(run_metrics, 'csv', len(df_output)):
+                    df_output.to_csv(FILENAME_FORECAST_CSV, mode='w' if output_chunk_number == 0 else 'a', header=(output_chunk_number == 0))
+            output_chunk_number += 1
+
+        else:
+            # p_f (structures x wind speeds) is calculated one row chunk at a time; each
+            # chunk is attached to its df0 rows as one contiguous block and written out
+            # before the next chunk is calculated. Structures found in the incremental
+            # cache are slotted into their chunk from the cache instead.
+            # Line-level p_f is accumulated chunk by chunk as log-survival sums per line.
+            df_output = df0.drop(columns= drop_list)
+            if (float32_outputs):
+                df_output = compact.CompactOutputs(df_output)
+            compute_startTime = datetime.datetime.now()
+            p_f_chunks = incremental.IterIncrementalChunks(df_output, fragility.ComponentParameters(df0), wspeeds, population_index,
+                                                          cache_positions, cache, memory_budget_mb*2**20, pool=pool, dtype=output_dtype)
+            for rows, df_chunk, prob_fail_chunk in metrics.TimedIterator(run_metrics, 'sweep', p_f_chunks, lambda item: len(item[1])):
+                with metrics.Stage(run_metrics, 'lines', len(df_chunk)):
+                    line_totals = lines.AccumulateLineLogSurvival(line_totals, df_chunk, prob_fail_chunk)
+                if (filename_incremental_cache is not None):
+                    cache_chunks.append(df_chunk)
+                compute_seconds += (datetime.datetime.now() - compute_startTime).total_seconds()
+
+                df_chunk['DATETIME'] = run_datetime
+
+                metrics.StartStage(run_metrics, 'write')
+                if (writeCSV):
+                    # Output data calculations to csv:
+                    print("Writing to csv, chunk", output_chunk_number)
+                    with metrics.Stage(run_metrics, 'csv', len(df_chunk)):
+                        df_chunk.to_csv(FILENAME_CSV, mode='w' if output_chunk_number == 0 else 'a', header=(output_chunk_number == 0))
+
+                if (writeParquet):
+                    print("Writing to parquet, chunk", output_chunk_number)
+                    with metrics.Stage(run_metrics, 'parquet', len(df_chunk)):
+                        parquetwriter.WriteParquetChunk(parquet_writer, df_chunk)
+
+                if (writeCurveStore):
+                    with metrics.Stage(run_metrics, 'curve_store', len(df_chunk)):
+                        curvestore.WriteCurveChunk(curve_writer, df_chunk, prob_fail_chunk)
+
+                if (writeDB and db_writer is not None):
+                    print("Writing to database, chunk", output_chunk_number)
+                    with metrics.Stage(run_metrics, 'db', len(df_chunk)):
+                        try:
+                            dbwriter.WriteBulkChunk(db_writer, df_chunk)
+                        except Exception as error:
+                            # (Needs updating) add error handling
+                            print("Error writing to database; test_Reliability left unchanged:", error)
+                            dbwriter.AbortBulkWriter(db_writer)
+                            db_writer = None
+                metrics.EndStage(run_metrics, 'write', len(df_chunk))
+                output_chunk_number += 1
+                compute_startTime = datetime.datetime.now()
+
+        del df0, df_output # Release the chunk before the next one is pulled.
+
+    parallel.ClosePool(pool)
+    datasource.CloseDataSource(source)
+    metrics.StartStage(run_metrics, 'write')
+    if (writeParquet):
+        parquet_summary = parquetwriter.CloseParquetWriter(parquet_writer)
+        print("Wrote", parquet_summary['rows'], "rows to", settings['filename_parquet'], "in", parquet_summary['files'], "files,",
+              round(parquet_summary['seconds'], 1), "s")
+    if (writeCurveStore):
+        print("Wrote p_f curves of", curvestore.CloseCurveStoreWriter(curve_writer), "structures to", settings['dirname_curve_store'])
+    if (writeDB and db_writer is not None):
+        try:
+            db_summary = dbwriter.CommitBulkWriter(db_writer)
+            print("Wrote", db_summary['rows'], "rows to test_Reliability in", round(db_summary['seconds'], 1), "s,",
+                  round(db_summary['rows_per_second']), "rows/s")
+        except Exception as error:
+            print("Error replacing test_Reliability; previous table left in place:", error)
+            dbwriter.AbortBulkWriter(db_writer)
+    metrics.EndStage(run_metrics, 'write')
+    print("Processed", n_structures, "structures in", output_chunk_number, "output chunks")
+
+    if (filename_forecast is None and line_totals is not None):
+        # Line-level p_f: 1 - prod(1 - p_f) over the structures of each line (SAP_FUNC_LOC_NO):
+        metrics.StartStage(run_metrics, 'line_output')
+        df_line_output = lines.LineProbabilityFailureFrame(line_totals[1], line_totals[0], wspeeds)
+        df_line_output['DATETIME'] = run_datetime
+        if (writeCSV):
+            print("Writing line-level p_f to csv")
+            df_line_output.to_csv(FILENAME_LINE_CSV)
+        metrics.EndStage(run_metrics, 'line_output', len(df_line_output))
+
+    if (filename_incremental_cache is not None):
+        incremental_summary = incremental.RunSummary(n_structures - n_misses, n_misses, compute_seconds, cache)
+        print("Incremental re-scoring:", incremental_summary['hits'], "cache hits,", incremental_summary['misses'],
+              "recalculated, estimated time saved", round(incremental_summary['estimated_seconds_saved'], 1), "s")
+        with metrics.Stage(run_metrics, 'incremental_save', n_structures):
+            incremental.SaveCache(filename_incremental_cache, parameter_fingerprint, np.concatenate(fingerprint_chunks),
+                                  pd.concat(cache_chunks).drop(columns='DATETIME'), incremental_summary['seconds_per_structure'])
+
+    # Run metrics: per-stage time, structures, throughput and peak memory:
+    run_record = metrics.FinishRun(run_metrics, structures=n_structures, recalculated=n_misses, output_chunks=output_chunk_number,
+                                   wind_speeds=len(wspeeds), chunk_rows=chunk_rows, workers=settings['workers'],
+                                   data_source=settings['data_source'], sql_chunksize=settings['sql_chunksize'],
+                                   forecast=filename_forecast is not None, compact_dtypes=compact_dtypes,
+                                   float32_outputs=float32_outputs)
+    metrics.PrintSummary(run_record)
+    if (settings['filename_metrics'] is not None):
+        metrics.WriteMetrics(run_record, settings['filename_metrics'])
+
+    return run_record
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Process-pool execution of the p_f sweep of
+reliability_model3_draft_18Mar2020.py across structures.
+
+A pool holds two multiprocessing.shared_memory blocks sized for one chunk of
+structures: the per-structure CDF parameters (inputs) and the p_f matrix
+(output). Worker processes are forked after the blocks are mapped, so every
+worker sees both; a task is only a range of rows, and nothing but row
+numbers and the wind-speed grid is pickled per task. Every element of p_f
+is computed by the same kernel as the serial sweep (fragility.TabulateCDF
+over the task's rows, then fragility.ComputeProbabilityFailureBlock), so
+results are identical.
+
+Workers are started with the 'fork' start method. The workers find the
+shared blocks through _SHARED, a module global holding numpy views over the
+mapped memory. A forked worker inherits those views. A spawned worker
+re-imports this module with _SHARED empty and would have to attach the
+blocks by name, which this module does not do. Where 'fork' is not
+available (Windows), StartPool returns None and the sweep runs serially.
+
+Only the p_f sweep is split across the workers. The Pronto-theme factors
+(model.ComputeFactors) and the distribution parameters
+(model.ComputeDistributionParams) run serially in the parent. On 100,000
+structures they take 0.08 s and 0.01 s (benchmark.py), against 0.5 s for
+the sweep. Their inputs include the string label columns, which cannot be
+placed in the shared float blocks and would have to be pickled to the
+workers. A pickle round trip of those rows alone takes 0.12 s, so
+splitting the factors would cost more than it saves.
+
+Key functions:
+StartPool - Shared-memory blocks plus a forked process pool for chunks of up
+            to capacity_rows structures.
+ClosePool - Shut the pool down and release the shared memory.
+ComputeProbabilityFailureMatrixParallel - fragility.ComputeProbabilityFailureMatrix
+            split across the pool's workers.
+
+Run as a script for a scaling benchmark on synthetic structures:
+    python parallel.py [n_structures] [worker counts ...]
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import fragility
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+START_METHOD = 'fork'   # Workers inherit the shared-memory mappings; see module docstring.
+TASKS_PER_WORKER = 4    # Row ranges per worker and chunk, for load balancing.
+N_CDF_ARRAYS = 2*len(fragility.COMPONENTS)  # (first, loc) per component.
+
+_SHARED = {}            # Arrays over the shared memory of the current pool (inherited by the workers).
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def StartPool(workers, capacity_rows, n_speeds):
+
+    #********************************************************************#
+    # Purpose: To create the shared-memory blocks for up to             #
+    #          capacity_rows structures at n_speeds wind speeds and a   #
+    #          pool of workers processes. Returns the pool (a dict), or #
+    #          None when workers <= 1 or 'fork' is not available.       #
+    #********************************************************************#
+    if workers <= 1:
+        return None
+    if START_METHOD not in multiprocessing.get_all_start_methods():
+        print("Start method '%s' not available; calculating p_f serially" % START_METHOD)
+        return None
+    if _SHARED:
+        raise ValueError("A process pool is already running; close it with ClosePool first")
+
+    capacity_rows = max(1, capacity_rows)
+    shm_inputs = shared_memory.SharedMemory(create=True, size=N_CDF_ARRAYS*capacity_rows*8)
+    shm_prob_fail = shared_memory.SharedMemory(create=True, size=capacity_rows*max(1, n_speeds)*8)
+    _SHARED['inputs'] = np.ndarray((N_CDF_ARRAYS, capacity_rows), dtype=float, buffer=shm_inputs.buf)
+    _SHARED['prob_fail'] = np.ndarray(capacity_rows*max(1, n_speeds), dtype=float, buffer=shm_prob_fail.buf)
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+
+    return {'executor': executor,
+            'workers': workers,
+            'capacity_rows': capacity_rows,
+            'n_speeds': n_speeds,
+            'shared_memory': [shm_inputs, shm_prob_fail]}
+
+
+def ClosePool(pool):
+
+    #********************************************************************#
+    # Purpose: To shut the workers down and release the shared memory.  #
+    #********************************************************************#
+    if pool is None:
+        return
+
+    pool['executor'].shutdown()
+    _SHARED.clear()
+    for shm in pool['shared_memory']:
+        shm.close()
+        shm.unlink()
+
+
+def _SharedViews(n_rows, n_speeds):
+
+    #********************************************************************#
+    # Purpose: To view the shared blocks as the CDF parameters of       #
+    #          n_rows structures and their (n_rows x n_speeds) p_f.     #
+    #********************************************************************#
+    inputs = _SHARED['inputs'][:, :n_rows]
+    cdf_parameters = {}
+    for i, component in enumerate(fragility.COMPONENTS):
+        cdf_parameters[component] = (inputs[2*i], inputs[2*i + 1])
+    prob_fail = _SHARED['prob_fail'][:n_rows*n_speeds].reshape(n_rows, n_speeds)
+
+    return cdf_parameters, prob_fail
+
+
+def _ComputeRows(start, stop, n_rows, wspeeds, block_rows, backend):
+
+    #********************************************************************#
+    # Purpose: Worker task: p_f of rows start:stop written in place     #
+    #          into the shared p_f matrix, block_rows at a time, with   #
+    #          the CDF tables of those rows.                            #
+    #********************************************************************#
+    wspeeds = np.asarray(wspeeds, dtype=float)[np.newaxis, :]
+    cdf_parameters, prob_fail = _SharedViews(n_rows, wspeeds.shape[1])
+    cdf_tables = fragility.TabulateCDF(wspeeds, cdf_parameters, slice(start, stop), backend)
+    for block_start in range(start, stop, block_rows):
+        rows = slice(block_start, min(block_start + block_rows, stop))
+        prob_fail[rows] = fragility.ComputeProbabilityFailureBlock(wspeeds, cdf_parameters, rows, backend, cdf_tables)
+
+    return stop - start
+
+
+def ComputeProbabilityFailureMatrixParallel(pool, wspeeds, component_parameters, block_rows=fragility.BLOCK_ROWS,
+                                            backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate the (structures x speeds) p_f matrix with   #
+    #          the pool's workers; same arguments and result as         #
+    #          fragility.ComputeProbabilityFailureMatrix, which is used #
+    #          instead when pool is None. The CDF parameters are        #
+    #          prepared once here and copied into shared memory; the    #
+    #          workers write p_f into shared memory, which is copied    #
+    #          out before the next call reuses it.                      #
+    #********************************************************************#
+    if pool is None:
+        return fragility.ComputeProbabilityFailureMatrix(wspeeds, component_parameters, block_rows, backend)
+
+    wspeeds = np.asarray(wspeeds, dtype=float)
+    cdf_parameters = fragility.PrepareCDFParameters(component_parameters, backend)
+    n_rows = len(cdf_parameters[fragility.COMPONENTS[0]][1])
+    if n_rows > pool['capacity_rows'] or len(wspeeds) != pool['n_speeds']:
+        raise ValueError("Chunk of %d structures x %d speeds does not fit the pool (%d x %d)"
+                         % (n_rows, len(wspeeds), pool['capacity_rows'], pool['n_speeds']))
+
+    shared_parameters, prob_fail = _SharedViews(n_rows, len(wspeeds))
+    for component in fragility.COMPONENTS:
+        shared_parameters[component][0][:] = cdf_parameters[component][0]
+        shared_parameters[component][1][:] = cdf_parameters[component][1]
+
+    # Row ranges aligned to block_rows so the blocks match the serial sweep:
+    n_tasks = pool['workers']*TASKS_PER_WORKER
+    task_rows = max(block_rows, -(-n_rows // n_tasks // block_rows)*block_rows)
+    futures = [pool['executor'].submit(_ComputeRows, start, min(start + task_rows, n_rows), n_rows,
+                                       tuple(wspeeds), block_rows, backend)
+               for start in range(0, n_rows, task_rows)]
+    for future in futures:
+        future.result()
+
+    return prob_fail.copy()
+
+
+def _Benchmark(n_structures, worker_counts, n_speeds=121):
+
+    #********************************************************************#
+    # Purpose: To time the p_f sweep of n_structures synthetic          #
+    #          structures at 1 mph steps for each worker count, and     #
+    #          check every result against the serial sweep.             #
+    #********************************************************************#
+    rng = np.random.default_rng(0)
+    component_parameters = {}
+    for component in fragility.COMPONENTS:
+        mean = rng.uniform(0.3, 1.5, n_structures)
+        component_parameters['mean_' + component] = mean
+        component_parameters['stddev_' + component] = mean*rng.uniform(5, 60, n_structures)
+    wspeeds = fragility.WindSpeedGrid(0, n_speeds - 1, 1)
+
+    start = time.perf_counter()
+    prob_fail_serial = fragility.ComputeProbabilityFailureMatrix(wspeeds, component_parameters)
+    seconds_serial = time.perf_counter() - start
+    print("%d structures x %d speeds on %d CPUs" % (n_structures, len(wspeeds), os.cpu_count()))
+    print("workers  seconds  speedup  identical")
+    print("serial   %7.2f" % seconds_serial)
+    for workers in worker_counts:
+        pool = StartPool(workers, n_structures, len(wspeeds))
+        try:
+            ComputeProbabilityFailureMatrixParallel(pool, wspeeds, component_parameters) # Warm-up: starts the workers.
+            start = time.perf_counter()
+            prob_fail = ComputeProbabilityFailureMatrixParallel(pool, wspeeds, component_parameters)
+            seconds = time.perf_counter() - start
+        finally:
+            ClosePool(pool)
+        print("%-7d  %7.2f  %7.2f  %s" % (workers, seconds, seconds_serial/seconds,
+                                          np.array_equal(prob_fail, prob_fail_serial, equal_nan=True)))
+
+
+if __name__ == '__main__':
+    n_structures = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    worker_counts = [int(workers) for workers in sys.argv[2:]] or [1, 2, 4, 8]
+    _Benchmark(n_structures, worker_counts)
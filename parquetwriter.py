@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Columnar (Parquet) output of reliability_model3_draft_18Mar2020.py,
+partitioned by transmission line.
+
+Output chunks are appended to a hive-partitioned Parquet dataset
+(<path>/HOST_TLINE_NM=<line>/part-<chunk>-<i>.parquet). Columns are stored
+with compact types: repetitive text columns (line numbers, scope flags)
+dictionary-encoded, identifiers as plain strings, floats as float64 (p_f
+values are kept exactly); Parquet's dictionary and run-length encodings keep
+constant and small-range numeric columns (design ratios, ids) small on disk. Column statistics (min/max/null count) are written
+for every row group, so readers can prune partitions by line and row groups
+by value and read only the columns they need:
+
+    ReadParquetOutput('df0_calculations.parquet', columns=['SAP_EQUIP_ID', '_90_mph'],
+                      line_names=['LINE A'])
+
+Requires pyarrow.
+
+Key functions:
+OpenParquetWriter - Writer state (a dict) for one output dataset; an
+            existing dataset at the path is replaced.
+WriteParquetChunk - Append a DataFrame chunk to the dataset.
+CloseParquetWriter - Finish the dataset; returns rows, files and seconds.
+CompactArrowTable - DataFrame to Arrow table with compact column types.
+ReadParquetOutput - Read selected columns and lines back as a DataFrame.
+
+Run as a script to compare with the CSV output on a synthetic fleet:
+    python parquetwriter.py [n_structures] [n_lines]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+PARTITION_COLUMN = 'HOST_TLINE_NM'
+COMPRESSION = 'snappy'
+ROW_GROUP_ROWS = 64*1024    # Rows per row group (unit of statistics-based pruning).
+DICTIONARY_MAX_RATIO = 0.5  # Text columns with at most this share of distinct values are dictionary-encoded.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def OpenParquetWriter(path, partition_column=PARTITION_COLUMN, compression=COMPRESSION):
+
+    #********************************************************************#
+    # Purpose: To start writing the partitioned dataset at path. An     #
+    #          existing dataset there (a directory written by an        #
+    #          earlier run) is removed first, as the CSV output is      #
+    #          overwritten.                                             #
+    #********************************************************************#
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet output")
+    if os.path.isfile(path):
+        raise ValueError("Parquet output path %s is a file; expected a dataset directory" % path)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+
+    return {'path': path,
+            'partition_column': partition_column,
+            'compression': compression,
+            'schema': None,
+            'chunks': 0,
+            'rows': 0,
+            'files': 0,
+            'seconds': 0.0}
+
+
+def CompactArrowTable(df, schema=None):
+
+    #********************************************************************#
+    # Purpose: To convert df (index dropped) to an Arrow table with     #
+    #          compact column types: repetitive text dictionary-encoded #
+    #          (unique identifiers stay plain strings, as per-file      #
+    #          dictionaries of them would have to be merged on read),   #
+    #          numbers kept as they are. With schema (from an earlier   #
+    #          chunk) the table is cast to it, so every file of a       #
+    #          dataset has the same column types.                       #
+    #********************************************************************#
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            columns[name] = pa.Array.from_pandas(series)
+            continue
+        # Text (also for all-null chunks, so later chunks can be cast to the same type):
+        missing = series.isna().to_numpy()
+        values = pa.array(np.where(missing, None, series.astype(str).to_numpy(dtype=object)), type=pa.string())
+        if schema is not None:
+            dictionary = pa.types.is_dictionary(schema.field(name).type)
+        else:
+            dictionary = series.nunique() <= DICTIONARY_MAX_RATIO*len(series)
+        columns[name] = values.dictionary_encode() if dictionary else values
+    table = pa.table(columns)
+    if schema is not None:
+        table = table.cast(schema)
+
+    return table
+
+
+def WriteParquetChunk(writer, df_chunk):
+
+    #********************************************************************#
+    # Purpose: To append df_chunk to the dataset, one file per line     #
+    #          present in the chunk. The first chunk fixes the column   #
+    #          types.                                                   #
+    #********************************************************************#
+    start = time.perf_counter()
+    table = CompactArrowTable(df_chunk, writer['schema'])
+    if writer['schema'] is None:
+        writer['schema'] = table.schema
+
+    written = []
+    ds.write_dataset(table, writer['path'], format='parquet',
+                     partitioning=ds.partitioning(pa.schema([table.schema.field(writer['partition_column'])]), flavor='hive'),
+                     basename_template='part-%d-{i}.parquet' % writer['chunks'],
+                     existing_data_behavior='overwrite_or_ignore',
+                     file_options=ds.ParquetFileFormat().make_write_options(compression=writer['compression'], write_statistics=True),
+                     max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, max(1, table.num_rows)),
+                     file_visitor=written.append)
+
+    writer['chunks'] += 1
+    writer['rows'] += table.num_rows
+    writer['files'] += len(written)
+    writer['seconds'] += time.perf_counter() - start
+
+
+def CloseParquetWriter(writer):
+
+    #********************************************************************#
+    # Purpose: To finish the dataset. Returns {'rows', 'files',         #
+    #          'seconds'} for the whole write.                          #
+    #********************************************************************#
+    return {'rows': writer['rows'], 'files': writer['files'], 'seconds': writer['seconds']}
+
+
+def ReadParquetOutput(path, columns=None, line_names=None, partition_column=PARTITION_COLUMN):
+
+    #********************************************************************#
+    # Purpose: To read columns (default all) of the structures on       #
+    #          line_names (default all lines) from the dataset; only    #
+    #          the partitions of those lines and the selected columns   #
+    #          are read.                                                #
+    #********************************************************************#
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet output")
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    row_filter = None
+    if line_names is not None:
+        row_filter = ds.field(partition_column).isin(list(line_names))
+
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+
+def _Benchmark(n_structures, n_lines, n_speeds=121):
+
+    #********************************************************************#
+    # Purpose: To write a synthetic output table as CSV and as the      #
+    #          partitioned Parquet dataset, and time writing, reading   #
+    #          everything, and reading one line's p_f at one speed.     #
+    #********************************************************************#
+    rng = np.random.default_rng(0)
+    line_names = np.array(['LINE %04d' % i for i in range(n_lines)])
+    df_output = pd.DataFrame({'SAP_EQUIP_ID': np.arange(n_structures),
+                              'ETGIS_ID': ['G%08d' % i for i in range(n_structures)],
+                              'SAP_FUNC_LOC_NO': rng.integers(0, n_lines, n_structures).astype(str),
+                              'WSIP_SCOPE_IND': rng.choice(['Y', 'N'], n_structures)})
+    df_output[PARTITION_COLUMN] = line_names[df_output['SAP_FUNC_LOC_NO'].astype(int)]
+    prob_fail = np.sort(rng.random((n_structures, n_speeds))**8, axis=1)
+    df_output = pd.concat([df_output, pd.DataFrame(prob_fail, columns=['_%d_mph' % w for w in range(n_speeds)])], axis=1)
+    chunk_rows = 100000
+    one_line, one_column = line_names[0], '_90_mph'
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'df0_calculations.csv')
+        parquet_path = os.path.join(directory, 'df0_calculations.parquet')
+
+        start = time.perf_counter()
+        for chunk_start in range(0, n_structures, chunk_rows):
+            df_output.iloc[chunk_start:chunk_start + chunk_rows].to_csv(csv_path, mode='w' if chunk_start == 0 else 'a', header=(chunk_start == 0))
+        seconds_csv_write = time.perf_counter() - start
+
+        writer = OpenParquetWriter(parquet_path)
+        for chunk_start in range(0, n_structures, chunk_rows):
+            WriteParquetChunk(writer, df_output.iloc[chunk_start:chunk_start + chunk_rows])
+        summary = CloseParquetWriter(writer)
+
+        start = time.perf_counter()
+        df_csv = pd.read_csv(csv_path, index_col=0)
+        seconds_csv_read = time.perf_counter() - start
+        start = time.perf_counter()
+        df_csv_line = pd.read_csv(csv_path, usecols=['SAP_EQUIP_ID', PARTITION_COLUMN, one_column])
+        df_csv_line = df_csv_line[df_csv_line[PARTITION_COLUMN] == one_line]
+        seconds_csv_line = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df_parquet = ReadParquetOutput(parquet_path)
+        seconds_parquet_read = time.perf_counter() - start
+        start = time.perf_counter()
+        df_parquet_line = ReadParquetOutput(parquet_path, columns=['SAP_EQUIP_ID', one_column], line_names=[one_line])
+        seconds_parquet_line = time.perf_counter() - start
+
+        size_csv = os.path.getsize(csv_path)
+        size_parquet = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(parquet_path) for name in names)
+        df_parquet = df_parquet.sort_values('SAP_EQUIP_ID').reset_index(drop=True)
+        identical = np.array_equal(df_parquet[df_csv.columns[-n_speeds:]].to_numpy(), prob_fail)
+        line_identical = np.array_equal(np.sort(df_parquet_line['SAP_EQUIP_ID'].to_numpy()), np.sort(df_csv_line['SAP_EQUIP_ID'].to_numpy()))
+
+    print("%d structures x %d columns, %d lines" % (n_structures, df_output.shape[1], n_lines))
+    print("          size MB  write s  read all s  read 1 line x 1 speed s")
+    print("csv      %8.1f %8.2f %11.2f %11.3f" % (size_csv/2**20, seconds_csv_write, seconds_csv_read, seconds_csv_line))
+    print("parquet  %8.1f %8.2f %11.2f %11.3f   (%d files; p_f identical: %s, line rows identical: %s)"
+          % (size_parquet/2**20, summary['seconds'], seconds_parquet_read, seconds_parquet_line, summary['files'], identical, line_identical))
+
+
+if __name__ == '__main__':
+    n_structures = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    _Benchmark(n_structures, n_lines)
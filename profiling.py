@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Opt-in CPU and memory profiling of the stages of
+reliability_model3_draft_18Mar2020.py (run with --profile).
+
+When a run recorder (metrics.StartRun) is given a profile directory, every
+top-level stage is run under cProfile and tracemalloc; stages nested in it
+(e.g. write/csv) are part of their parent's profile, as only one profiler can
+be active at a time. A stage entered once per chunk accumulates into one
+profile. On FinishRun the directory receives:
+    <stage>.prof        cProfile statistics (pstats / snakeviz / gprof2dot)
+    <stage>.txt         the top functions by cumulative time
+    allocations.txt     per stage: peak traced Python memory and the top
+                        source lines by memory allocated (net, still held
+                        at the end of the stage)
+Without a profile directory nothing here is imported or run.
+
+Key functions:
+StartProfiler - Profiler state (a dict); starts tracemalloc.
+ProfileStageStart / ProfileStageEnd - Profile one call of a top-level stage.
+WriteProfiles - Write the files above and stop tracemalloc.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+TOP_N = 25              # Functions / source lines listed per stage.
+TRACEMALLOC_FRAMES = 1  # Frames kept per allocation (1: the allocating line).
+ALLOCATIONS_FILE = 'allocations.txt'
+# Allocations of the profiler itself, left out of the report:
+IGNORED_FILES = {tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>'}
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def StartProfiler(directory, top_n=TOP_N):
+
+    #********************************************************************#
+    # Purpose: To start profiling into directory (created if needed).   #
+    #********************************************************************#
+    os.makedirs(directory, exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    return {'directory': directory,
+            'top_n': top_n,
+            'profiles': {},         # stage -> cProfile.Profile
+            'allocations': {},      # stage -> {source line: [bytes, blocks]}
+            'traced_peaks': {},     # stage -> peak traced bytes
+            'snapshot': None}       # tracemalloc snapshot at the start of the running stage
+
+
+def ProfileStageStart(profiler, stage):
+
+    #********************************************************************#
+    # Purpose: To start profiling a call of the top-level stage.        #
+    #********************************************************************#
+    if stage not in profiler['profiles']:
+        profiler['profiles'][stage] = cProfile.Profile()
+        profiler['allocations'][stage] = {}
+        profiler['traced_peaks'][stage] = 0
+    profiler['snapshot'] = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    profiler['profiles'][stage].enable()
+
+
+def ProfileStageEnd(profiler, stage):
+
+    #********************************************************************#
+    # Purpose: To stop profiling the call of stage and add the memory   #
+    #          it allocated (per source line) to the stage's totals.    #
+    #********************************************************************#
+    profiler['profiles'][stage].disable()
+    profiler['traced_peaks'][stage] = max(profiler['traced_peaks'][stage], tracemalloc.get_traced_memory()[1])
+
+    allocations = profiler['allocations'][stage]
+    for statistic in tracemalloc.take_snapshot().compare_to(profiler['snapshot'], 'lineno'):
+        frame = statistic.traceback[0]
+        if statistic.size_diff > 0 and frame.filename not in IGNORED_FILES:
+            totals = allocations.setdefault('%s:%d' % (frame.filename, frame.lineno), [0, 0])
+            totals[0] += statistic.size_diff
+            totals[1] += statistic.count_diff
+    profiler['snapshot'] = None
+
+
+def WriteProfiles(profiler):
+
+    #********************************************************************#
+    # Purpose: To write the per-stage profiles and the allocation       #
+    #          report, and stop tracemalloc. Returns the file paths.    #
+    #********************************************************************#
+    paths = []
+    for stage, profile in profiler['profiles'].items():
+        name = stage.replace('/', '_')
+        path = os.path.join(profiler['directory'], name + '.prof')
+        profile.dump_stats(path)
+        paths.append(path)
+
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats('cumulative').print_stats(profiler['top_n'])
+        path = os.path.join(profiler['directory'], name + '.txt')
+        with open(path, 'w') as report:
+            report.write(text.getvalue())
+        paths.append(path)
+
+    path = os.path.join(profiler['directory'], ALLOCATIONS_FILE)
+    with open(path, 'w') as report:
+        for stage, allocations in profiler['allocations'].items():
+            report.write("%s: peak traced memory %.1f MB\n" % (stage, profiler['traced_peaks'][stage]/2**20))
+            top = sorted(allocations.items(), key=lambda item: item[1][0], reverse=True)[:profiler['top_n']]
+            for line, (size, count) in top:
+                report.write("  %10.1f KB %9d blocks  %s\n" % (size/2**10, count, line))
+            report.write("\n")
+    paths.append(path)
+    tracemalloc.stop()
+
+    return paths
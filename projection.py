@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Multi-year aging projection of the reliability model: p_f of every
+structure in each of the coming years, in one pass instead of one run per
+year.
+
+Age enters the model only through the cov growth term
+AGE_YEARS**2/design_life_adjusted**2, i.e. only through stddev_<COMPONENT>.
+Everything else is calculated once and shared by all years: the MCE scores,
+reduction factors, design life adjustments, strength ratios, mean_<COMPONENT>
+and the CDF shape parameters. With AGE_YEARS given a leading year axis, the
+batched evaluation of sweep.py yields p_f as years x structures x speeds.
+Structures are processed in row chunks sized to a memory budget. The
+result is either the full array or per-year summaries. Each year's p_f
+equals a run of the model with now set to that year.
+
+Key functions:
+ProjectionYears - The projected years (default now+1 ... now+20).
+PrepareProjectionInputs - The shared (age-independent) arrays of a set of
+            structures and their ages in each projected year.
+IterProjectionChunks - p_f (years x rows x speeds) chunk by chunk of
+            structures.
+ProjectProbabilityFailure - The full years x structures x speeds array
+            (optionally into a caller's array, e.g. a np.memmap).
+RunAgingProjection - Tidy summary per year and wind speed: year,
+            years_ahead, wspeed, structures, mean_p_f, max_p_f,
+            expected_failures.
+
+Run as a script to compare with one model.ScoreStructures call per year on
+a synthetic fleet:
+    python projection.py [n_structures] [years_ahead]
+"""
+
+import datetime
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import fragility
+import sweep
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+YEARS_AHEAD = 20    # Default projection: now+1 ... now+20.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def ProjectionYears(now_year=None, years_ahead=YEARS_AHEAD):
+
+    #********************************************************************#
+    # Purpose: To return the projected years now_year+1 ...             #
+    #          now_year+years_ahead (now_year defaults to the current   #
+    #          year).                                                   #
+    #********************************************************************#
+    if now_year is None:
+        now_year = datetime.datetime.now().year
+    if years_ahead < 1:
+        raise ValueError("The projection needs at least one year ahead, got %s" % years_ahead)
+
+    return np.arange(now_year + 1, now_year + years_ahead + 1)
+
+
+def PrepareProjectionInputs(df0, model_parameters, years):
+
+    #********************************************************************#
+    # Purpose: To calculate the age-independent arrays of the           #
+    #          structures of df0 once (see sweep.PrepareSweepInputs),   #
+    #          with age_years given for each of years (years x          #
+    #          structures).                                             #
+    #********************************************************************#
+    years = np.asarray(years)
+    if years.ndim != 1 or len(years) == 0:
+        raise ValueError("Projection years must be a non-empty list of years")
+
+    inputs = sweep.PrepareSweepInputs(df0, model_parameters, years[0])
+    inputs['age_years'] = years.astype(float)[:, np.newaxis] - df0['INSTALLED_YEAR'].to_numpy(dtype=float)
+
+    return inputs
+
+
+def IterProjectionChunks(inputs, model_parameters, wspeeds, memory_budget_bytes, backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f of every structure in inputs (see       #
+    #          PrepareProjectionInputs) in each projected year. Yields  #
+    #          (rows, prob_fail) with prob_fail of shape                #
+    #          (years, rows, speeds).                                   #
+    #********************************************************************#
+    stacked, constants = sweep.StackParameterSets(model_parameters, [{}])
+
+    return sweep.IterBatchChunks(inputs, stacked, constants, len(inputs['age_years']), wspeeds, memory_budget_bytes, backend)
+
+
+def ProjectProbabilityFailure(df0, model_parameters, years, wspeeds=None, memory_budget_mb=512, out=None,
+                              backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To return p_f of every structure of df0 in each of years #
+    #          at each of wspeeds (default grid 0-120 mph), as an array #
+    #          of shape (years, structures, speeds). out may be a       #
+    #          preallocated array of that shape (e.g. a np.memmap for   #
+    #          fleets whose projection does not fit in memory).         #
+    #********************************************************************#
+    if wspeeds is None:
+        wspeeds = fragility.WindSpeedGrid()
+    inputs = PrepareProjectionInputs(df0, model_parameters, years)
+    shape = (len(years), len(df0), len(wspeeds))
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise ValueError("Output array has shape %s, the projection %s" % (out.shape, shape))
+
+    for rows, prob_fail in IterProjectionChunks(inputs, model_parameters, wspeeds, memory_budget_mb*2**20, backend):
+        out[:, rows] = prob_fail
+
+    return out
+
+
+def RunAgingProjection(df0, model_parameters, years_ahead=YEARS_AHEAD, wspeeds=None, now_year=None, memory_budget_mb=512,
+                       backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To project the structures of df0 (with the structure     #
+    #          query columns) over now_year+1 ... now_year+years_ahead. #
+    #          Returns a tidy DataFrame with one row per year and wind  #
+    #          speed. The full array is never held in memory.           #
+    #********************************************************************#
+    if wspeeds is None:
+        wspeeds = fragility.WindSpeedGrid()
+    wspeeds = np.asarray(wspeeds, dtype=float)
+    years = ProjectionYears(now_year, years_ahead)
+
+    inputs = PrepareProjectionInputs(df0, model_parameters, years)
+    summary = sweep.SummarizeChunks(IterProjectionChunks(inputs, model_parameters, wspeeds, memory_budget_mb*2**20, backend),
+                                    len(years), len(wspeeds))
+
+    df_summary = pd.DataFrame({'year': np.repeat(years, len(wspeeds)),
+                               'years_ahead': np.repeat(years - years[0] + 1, len(wspeeds)),
+                               'wspeed': np.tile(wspeeds, len(years))})
+    for column, values in summary.items():
+        df_summary[column] = values
+
+    return df_summary
+
+
+def _Benchmark(n_structures, years_ahead):
+
+    #********************************************************************#
+    # Purpose: To time a projection of a synthetic fleet against one    #
+    #          model.ScoreStructures call per year, and check that the  #
+    #          p_f of every year is the same.                           #
+    #********************************************************************#
+    import fleet
+    import model
+
+    model_parameters = model.SyntheticParameters()
+    df0 = fleet.GenerateFleet(n_structures)
+    wspeeds = fragility.WindSpeedGrid()
+    years = ProjectionYears(years_ahead=years_ahead)
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in wspeeds]
+
+    start = time.perf_counter()
+    RunAgingProjection(df0, model_parameters, years_ahead, wspeeds)
+    seconds_summary = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prob_fail = ProjectProbabilityFailure(df0, model_parameters, years, wspeeds)
+    seconds_array = time.perf_counter() - start
+
+    start = time.perf_counter()
+    identical = True
+    for k, year in enumerate(years):
+        df_output = model.ScoreStructures(df0, model_parameters, wspeeds, year)
+        identical &= np.array_equal(df_output[labels].to_numpy(), prob_fail[k], equal_nan=True)
+    seconds_reruns = time.perf_counter() - start
+
+    print("%d structures x %d years x %d speeds" % (n_structures, len(years), len(wspeeds)))
+    print("  projection, per-year summaries %8.3f s" % seconds_summary)
+    print("  projection, full array         %8.3f s" % seconds_array)
+    print("  one run per year               %8.3f s" % seconds_reruns)
+    print("  p_f identical to the runs:", identical)
+
+
+if __name__ == '__main__':
+    _Benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+               int(sys.argv[2]) if len(sys.argv) > 2 else YEARS_AHEAD)
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Batched parameter sweeps (sensitivity studies) of the reliability
+model over mu_steel, mu_wood, r_cor, r_spl and the per-theme component
+constants, without rerunning the model once per parameter set.
+
+A sweep reads the structures once and calculates the parameter-independent
+work once: MCE score lookups, ages, material masks, strength and design
+ratios. The parameter-dependent parts are then evaluated for all K parameter
+sets at once, as arrays with a leading parameter-set dimension:
+reduction factors, design life adjustments, cov, mean_/stddev_ and p_f
+(K x structures x speeds). Structures are processed in row chunks sized so
+that the K x rows x speeds working arrays stay cache-sized and within a
+memory budget. Only summary metrics are kept, so the full tensor is never
+held in memory.
+
+A parameter set is a dict of the values that differ from the base
+parameters (model.ModelParameters). Its keys are mu_steel, mu_wood, r_cor,
+r_spl, and a Pronto theme column of the component constants (e.g.
+'ANCHOR_CD') mapped to its [cov, cov_D, design life] list. ParameterGrid
+builds the sets of a full factorial design.
+
+The result is a tidy DataFrame with one row per parameter set and wind
+speed:
+    parameter_set       position of the set in the batch
+    <swept parameters>  the value each swept scalar takes in the set
+    wspeed              wind speed (mph)
+    structures          structures with a defined p_f at that speed
+    mean_p_f, max_p_f   mean and maximum p_f over the structures
+    expected_failures   sum of p_f (expected number of failed structures)
+
+Key functions:
+ParameterGrid - Parameter sets of every combination of the given values.
+PrepareSweepInputs - The parameter-independent arrays of a set of structures.
+IterSweepChunks - p_f of every parameter set, chunk by chunk of structures.
+StackParameterSets / BatchComponentParameters / IterBatchChunks /
+            SummarizeChunks - The batched evaluation and its summaries, for
+            any leading batch axis (also used by projection.py).
+RunParameterSweep - The summary table of a batch of parameter sets.
+
+Run as a script to compare with one read of the structures and one
+model.ScoreStructures call per parameter set on a synthetic fleet:
+    python sweep.py [n_structures] [n_parameter_sets]
+"""
+
+import datetime
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import factors
+import fragility
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+SCALAR_PARAMETERS = ['mu_steel', 'mu_wood', 'r_cor', 'r_spl']
+
+# Largest chunk in p_f cells (parameter sets x structures x speeds), 2048
+# rows of the 121-speed grid, so the working arrays stay cache-sized:
+BLOCK_CELLS = 2048*121
+
+# Pronto theme of each p_f component (the themes the sweep calculates):
+COMPONENT_THEMES = dict(fragility.STEEL_MU_THEMES, **fragility.MATERIAL_MU_THEMES)
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def ParameterGrid(**values):
+
+    #********************************************************************#
+    # Purpose: To return the parameter sets (a list of dicts) of every  #
+    #          combination of the listed values, e.g.                   #
+    #          ParameterGrid(mu_steel=[1.0, 1.1], r_cor=[0.2, 0.3]).    #
+    #********************************************************************#
+    names = list(values)
+
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values[name] for name in names))]
+
+
+def StackParameterSets(model_parameters, parameter_sets):
+
+    #********************************************************************#
+    # Purpose: To stack the K parameter sets (overrides of              #
+    #          model_parameters) into arrays: {name: (K, 1)} for the    #
+    #          scalars and {theme: (K, 3)} for the component constants  #
+    #          (cov, cov_D, design life) of every theme in use.         #
+    #********************************************************************#
+    if len(parameter_sets) == 0:
+        raise ValueError("The parameter sweep needs at least one parameter set")
+    df_constants = model_parameters['reliability_calcs_constants']
+    for parameter_set in parameter_sets:
+        unknown = set(parameter_set) - set(SCALAR_PARAMETERS) - set(df_constants.columns)
+        if unknown:
+            raise ValueError("Unknown sweep parameters %s; expected %s or a Pronto theme of %s" % (sorted(unknown), SCALAR_PARAMETERS,
+                                                                                                 list(df_constants.columns)))
+
+    stacked = {}
+    for name in SCALAR_PARAMETERS:
+        stacked[name] = np.array([float(parameter_set.get(name, model_parameters[name])) for parameter_set in parameter_sets])[:, np.newaxis]
+    constants = {}
+    for theme in df_constants.columns:
+        base = df_constants[theme].to_numpy(dtype=float)[:3]
+        constants[theme] = np.array([np.asarray(parameter_set.get(theme, base), dtype=float) for parameter_set in parameter_sets])
+        if constants[theme].shape != (len(parameter_sets), 3):
+            raise ValueError("Constants of %s must be [cov, cov_D, design life]" % theme)
+
+    return stacked, constants
+
+
+def PrepareSweepInputs(df0, model_parameters, now_year):
+
+    #********************************************************************#
+    # Purpose: To calculate the parameter-independent arrays of the     #
+    #          structures of df0 once: reduction factor inputs before   #
+    #          scaling by r_spl / r_cor, age, material masks and, for   #
+    #          each component theme, strength ratio times design ratio. #
+    #          Returns a dict of arrays (one entry per structure).      #
+    #********************************************************************#
+    scores = factors.LookupMCEScores(df0, model_parameters['mce_scores'])
+    is_steel, is_wood, is_other = factors.MaterialMasks(df0)
+
+    inputs = {'outage_density': -df0['OUTAGE_DESIGNLIFE_MOD'].to_numpy(dtype=float),
+              'splice_share': np.minimum(df0['SPLICES'].to_numpy(dtype=float)/5, 1),  # splice_density = r_spl*splice_share
+              'wear_fatigue': df0['WEAR_FATIGUE_RED_FAC'].to_numpy(dtype=float),
+              'soil_score': np.maximum(scores['AGRICULTURE'], scores['WETLAND_TYPE'])/2,
+              'atmospheric_score': np.maximum(scores['WETLAND_TYPE'], scores['CORROSION_ZONE'])/2,
+              'age_years': now_year - df0['INSTALLED_YEAR'].to_numpy(dtype=float),
+              'is_steel': is_steel,
+              'is_wood': is_wood,
+              'is_other': is_other}
+    for theme in COMPONENT_THEMES.values():
+        codes = factors.ThemeProntoCodes(df0, theme, is_wood)
+        inputs['ratio_' + theme] = factors.ComputeStrengthRatio(codes) * np.ones(len(df0), dtype=np.int64)
+
+    return inputs
+
+
+def BatchComponentParameters(inputs, rows, stacked, constants):
+
+    #********************************************************************#
+    # Purpose: To calculate mean_/stddev_ of every component for the    #
+    #          structures in the slice rows under every parameter set.  #
+    #          Returns a dict of (K, rows) arrays, as                   #
+    #          fragility.ComponentParameters would for each set. An     #
+    #          input with a leading axis (e.g. age_years over several   #
+    #          years, see projection.py) broadcasts through.            #
+    #********************************************************************#
+    chunk = {name: values[..., rows] for name, values in inputs.items()}
+    r_cor = stacked['r_cor']
+    structure_factors = {'outage_density': chunk['outage_density'],
+                         'splice_density': stacked['r_spl']*chunk['splice_share'],
+                         'wear_fatigue': chunk['wear_fatigue'],
+                         'soil_corrosivity': np.nan_to_num(chunk['soil_score']*r_cor, nan=0.0),
+                         'atmospheric_corrosivity': np.nan_to_num(chunk['atmospheric_score']*r_cor, nan=0.0)}
+    is_wood = chunk['is_wood']
+    mu_steel = stacked['mu_steel']
+    mu_material = np.where(chunk['is_steel'], mu_steel, stacked['mu_wood'])
+
+    component_parameters = {}
+    for component, theme in COMPONENT_THEMES.items():
+        design_life_adjustment = factors.ComputeThemeDesignLifeAdjustment(theme, structure_factors, is_wood, chunk['is_other'])
+        theme_constants = constants[theme]
+        wood_constants = constants[factors.WOOD_THEME_MAP.get(theme, theme)]
+        cov_new = np.where(is_wood, wood_constants[:, 0:1], theme_constants[:, 0:1])
+        cov_design = np.where(is_wood, wood_constants[:, 1:2], theme_constants[:, 1:2])
+        design_life = np.where(is_wood, wood_constants[:, 2:3], theme_constants[:, 2:3])
+        design_life_adjusted = design_life*design_life_adjustment
+        cov = cov_new + (cov_design - cov_new)*(chunk['age_years']**2/design_life_adjusted**2)
+
+        mu = mu_steel if component in fragility.STEEL_MU_THEMES else mu_material
+        ratio = chunk['ratio_' + theme]
+        component_parameters['mean_' + component] = ratio * mu
+        component_parameters['stddev_' + component] = ratio * cov * mu
+
+    return component_parameters
+
+
+def IterBatchChunks(inputs, stacked, constants, n_batch, wspeeds, memory_budget_bytes, backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f of every structure in inputs for a      #
+    #          batch of n_batch evaluations (the leading axis of the    #
+    #          component parameters). Yields (rows, prob_fail): the     #
+    #          slice of structures and their (n_batch, rows, speeds)    #
+    #          p_f, with rows chosen so the working arrays stay         #
+    #          cache-sized and fit in memory_budget_bytes.              #
+    #********************************************************************#
+    wspeeds = np.asarray(wspeeds, dtype=float)
+    n_structures = len(inputs['outage_density'])
+    chunk_rows = fragility.ChunkRowsForBudget(n_batch*len(wspeeds), memory_budget_bytes)
+    chunk_rows = max(1, min(BLOCK_CELLS//(n_batch*len(wspeeds)), chunk_rows))
+
+    for start in range(0, n_structures, chunk_rows):
+        rows = slice(start, min(start + chunk_rows, n_structures))
+        cdf_parameters = fragility.PrepareCDFParameters(BatchComponentParameters(inputs, rows, stacked, constants), backend)
+        yield rows, fragility.ComputeProbabilityFailureAt(wspeeds, cdf_parameters, (Ellipsis, np.newaxis), backend)
+
+
+def IterSweepChunks(inputs, model_parameters, parameter_sets, wspeeds, memory_budget_bytes, backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To calculate p_f of every structure in inputs (see       #
+    #          PrepareSweepInputs) under each of the K parameter sets.  #
+    #          Yields (rows, prob_fail) with prob_fail of shape         #
+    #          (K, rows, speeds), see IterBatchChunks.                  #
+    #********************************************************************#
+    stacked, constants = StackParameterSets(model_parameters, parameter_sets)
+
+    return IterBatchChunks(inputs, stacked, constants, len(parameter_sets), wspeeds, memory_budget_bytes, backend)
+
+
+def SummarizeChunks(chunks, n_batch, n_speeds):
+
+    #********************************************************************#
+    # Purpose: To reduce the (n_batch, rows, speeds) p_f chunks over    #
+    #          the structures. Returns a dict of flat arrays (batch by  #
+    #          batch, speeds within a batch): structures, mean_p_f,     #
+    #          max_p_f and expected_failures (NaN p_f left out).        #
+    #********************************************************************#
+    structures = np.zeros((n_batch, n_speeds), dtype=np.int64)
+    totals = np.zeros((n_batch, n_speeds))
+    maxima = np.full((n_batch, n_speeds), np.nan)
+    for rows, prob_fail in chunks:
+        undefined = np.isnan(prob_fail)
+        structures += prob_fail.shape[1] - undefined.sum(axis=1)
+        totals += np.where(undefined, 0, prob_fail).sum(axis=1)
+        maxima = np.fmax(maxima, np.fmax.reduce(prob_fail, axis=1))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_p_f = totals/structures
+
+    return {'structures': structures.ravel(),
+            'mean_p_f': mean_p_f.ravel(),
+            'max_p_f': maxima.ravel(),
+            'expected_failures': totals.ravel()}
+
+
+def RunParameterSweep(df0, model_parameters, parameter_sets, wspeeds=None, now_year=None, memory_budget_mb=512,
+                      backend=fragility.DEFAULT_CDF_BACKEND):
+
+    #********************************************************************#
+    # Purpose: To evaluate the structures of df0 (structure query       #
+    #          columns) under each parameter set. Returns the tidy      #
+    #          summary DataFrame (one row per parameter set and wind    #
+    #          speed, see the module docstring).                        #
+    #********************************************************************#
+    if wspeeds is None:
+        wspeeds = fragility.WindSpeedGrid()
+    if now_year is None:
+        now_year = datetime.datetime.now().year
+    wspeeds = np.asarray(wspeeds, dtype=float)
+    n_sets = len(parameter_sets)
+
+    inputs = PrepareSweepInputs(df0, model_parameters, now_year)
+    summary = SummarizeChunks(IterSweepChunks(inputs, model_parameters, parameter_sets, wspeeds, memory_budget_mb*2**20, backend),
+                              n_sets, len(wspeeds))
+
+    swept = [name for name in SCALAR_PARAMETERS if any(name in parameter_set for parameter_set in parameter_sets)]
+    df_summary = pd.DataFrame({'parameter_set': np.repeat(np.arange(n_sets), len(wspeeds))})
+    for name in swept:
+        df_summary[name] = np.repeat([parameter_set.get(name, model_parameters[name]) for parameter_set in parameter_sets], len(wspeeds))
+    df_summary['wspeed'] = np.tile(wspeeds, n_sets)
+    for column, values in summary.items():
+        df_summary[column] = values
+
+    return df_summary
+
+
+def _Benchmark(n_structures, n_sets):
+
+    #********************************************************************#
+    # Purpose: To time a sweep of about n_sets parameter sets (a        #
+    #          mu_steel x r_cor grid) on a synthetic fleet in a SQLite  #
+    #          data source against one read and model.ScoreStructures   #
+    #          call per set, and check that both give the same          #
+    #          summaries.                                               #
+    #********************************************************************#
+    import tempfile
+    import datasource
+    import fleet
+    import model
+
+    model_parameters = model.SyntheticParameters()
+    now_year = datetime.datetime.now().year
+    wspeeds = fragility.WindSpeedGrid()
+    parameter_sets = ParameterGrid(mu_steel=model_parameters['mu_steel']*np.linspace(0.9, 1.1, max(1, n_sets//2)),
+                                   r_cor=model_parameters['r_cor']*np.array([1.0, 1.2]))
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in wspeeds]
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = fleet.WriteFleetSQLite(os.path.join(directory, 'fleet.sqlite'), n_structures)
+
+        start = time.perf_counter()
+        df_summary = RunParameterSweep(datasource.ReadStructures(source), model_parameters, parameter_sets, wspeeds, now_year)
+        datasource.CloseDataSource(source)
+        seconds_sweep = time.perf_counter() - start
+
+        start = time.perf_counter()
+        deviation = 0.0
+        for k, parameter_set in enumerate(parameter_sets):
+            df_output = model.ScoreStructures(datasource.ReadStructures(source), dict(model_parameters, **parameter_set), wspeeds, now_year)
+            datasource.CloseDataSource(source)
+            mean_p_f = df_output[labels].mean().to_numpy()
+            deviation = max(deviation, np.nanmax(np.abs(mean_p_f - df_summary.loc[df_summary['parameter_set'] == k, 'mean_p_f'].to_numpy())))
+        seconds_reruns = time.perf_counter() - start
+
+    print("%d structures x %d parameter sets x %d speeds (reading the fleet included)" % (n_structures, len(parameter_sets), len(wspeeds)))
+    print("  sweep            %8.3f s" % seconds_sweep)
+    print("  one run per set  %8.3f s" % seconds_reruns)
+    print("  max |mean p_f| difference %.3g" % deviation)
+
+
+if __name__ == '__main__':
+    _Benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+               int(sys.argv[2]) if len(sys.argv) > 2 else 8)
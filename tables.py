@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Hard-coded input tables of reliability_model3_draft_18Mar2020.py,
+shared by the script and by the tools that run its stages outside it
+(benchmarks).
+
+Key functions:
+MCECorrosionScores - The MCE corrosion scores DataFrame (one row per
+            classification label in ROW_LABELS, 'ERROR_MCE_N/A' where a
+            label has no score in a column).
+ReliabilityCalcsConstants - The component-based constants DataFrame
+            (cov, cov_D and design life per Pronto theme) from a
+            parameters module.
+SYNTHETIC_PARAMETERS - A stand-in for the parameters module, for runs on
+            synthetic fleets (benchmarks, tests) where the production
+            parameters module and its database configuration are absent.
+"""
+
+import types
+
+import pandas as pd
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+# Input columns not carried into the outputs (the drop_list of the script):
+DROP_LIST = ['WEAR_FATIGUE_RED_FAC', 'AGRICULTURE', 'WETLAND_TYPE',
+             'CORROSION_ZONE', 'INSTALLED_YEAR', 'MATERIAL_FLAG', 'ANCHOR_CD', 'GUY_CD', 'STRUCTURE_CD',
+             'FOUNDATION_CD', 'CROSSARMS_CD', 'FRAME_ATTACH_CD', 'STRUCT_ATTACH_CD', 'STUB_SPLICE_CD',
+             'CONDUCTOR_CD', 'OGW_CD', 'HARDWARE_INSUL_CD', 'SPLICES','TLINE_MILES','OUTAGE_DESIGNLIFE_MOD']
+
+# Stand-in parameters module with the attributes the model reads from
+# parameters.py. The values are placeholders of a plausible magnitude
+# ([cov, cov_D, design life] per component), not calibrated inputs: runs
+# made with them are for timing and regression checks only.
+SYNTHETIC_PARAMETERS = types.SimpleNamespace(
+    steel_pronto_themes=['ANCHOR_CD', 'GUY_CD', 'FOUNDATION_CD', 'STUB_SPLICE_CD', 'STRUCT_ATTACH_CD',
+                         'CONDUCTOR_CD', 'OGW_CD', 'HARDWARE_INSUL_CD'],
+    mu_steel=4.6,
+    mu_wood=4.4,
+    r_cor=0.2,
+    r_spl=0.1,
+    anchor_constants=[0.10, 0.30, 60],
+    guy_constants=[0.11, 0.31, 55],
+    foundation_constants=[0.12, 0.32, 70],
+    stub_splice_constants=[0.13, 0.33, 50],
+    framing_attachments_constants=[0.14, 0.34, 45],
+    structure_attachments_constants=[0.15, 0.35, 65],
+    conductor_constants=[0.16, 0.36, 80],
+    ogw_constants=[0.17, 0.37, 75],
+    hardware_insulators_constants=[0.18, 0.38, 40],
+    structure_constants=[0.19, 0.39, 50],
+    crossarms_constants=[0.20, 0.40, 35])
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def MCECorrosionScores():
+
+    #********************************************************************#
+    # Purpose: To assemble the MCE corrosion scores DataFrame (not yet  #
+    #          indexed to ROW_LABELS).                                  #
+    #********************************************************************#
+    # (Needs updating) Hard-coded values below will be read from the database tables.
+    # (Needs updating) Manually added "Vacant or Disturbed Land" and "Rural Residential Land"  and 'Semi-agricultural and Rural Commercial Land' and 'Farmland of Local Potential', 'Water Area', with agriculture scores 0 for testing.
+    df_MCE_corrosion_scores = pd.DataFrame()  # Initialize the Pandas DataFrame.
+    df_MCE_corrosion_scores['ROW_LABELS'] = ['heavy', 'intermediate', 'light', 'Estuarine and Marine Deepwater',
+                                             'Estuarine and Marine Wetland', 'Freshwater Emergent Wetland',
+                                             'Freshwater Forested/Shrub Wetland', 'Freshwater Pond', 'Lake', 'Riverine',
+                                             'other', 'Blank', 'None', 'Farmland of Local Importance',
+                                             'Farmland of Statewide Importance', 'Grazing Land',
+                                             'Irrigated Farmland (interim)', 'Local Potential',
+                                             'Nonagricultural and Natural Vegetation', 'Not Mapped', 'Other Land',
+                                             'Prime Farmland', 'Rural Residential and Rural Commercial',
+                                             'Unique Farmland',
+                                             'Urban and Built-up Land', 'Water', 'Confined Animal Agriculture',
+                                             'moderate',
+                                             'severe', 'Lower 1/3 of PG&E wind speed', 'Middle 1/3 of PG&E wind speed',
+                                             'Top 1/3 of PG&E wind speed', 'High', 'Med', 'Low',
+                                             'Vacant or Disturbed Land', 'Rural Residential Land', 'Farmland of Local Potential','Semi-agricultural and Rural Commercial Land', 'Water Area']
+    df_MCE_corrosion_scores['SNOWLOAD'] = [2, 1, 0, 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                           'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A','ERROR_MCE_N/A','ERROR_MCE_N/A']
+    df_MCE_corrosion_scores['WETLAND_TYPE'] = ['ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 2, 2, 1, 1, 1, 1, 1,
+                                               1, 0,
+                                               0, 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                               'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                               'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                               'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                               'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                               'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A','ERROR_MCE_N/A','ERROR_MCE_N/A']
+    df_MCE_corrosion_scores['AGRICULTURE'] = ['ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                              'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                              'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                              'ERROR_MCE_N/A', 2, 2, 1, 2, 1, 1, 1, 1, 2, 2, 1, 0, 2, 2,
+                                              'ERROR_MCE_N/A',
+                                              'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                              'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 0, 0, 0, 0, 0]
+    df_MCE_corrosion_scores['ATMOSPHERIC_CORROSION'] = ['ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A',
+                                                        0, 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 1, 2,
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A',
+                                                        'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A']
+    df_MCE_corrosion_scores['WIND_SPEED'] = ['ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 0, 1, 2, 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A',
+                                             'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A']
+    df_MCE_corrosion_scores['SOILS_RESISTIVITY'] = ['ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A',
+                                                    0,
+                                                    1, 2, 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A', 'ERROR_MCE_N/A']
+
+    return df_MCE_corrosion_scores
+
+
+def ReliabilityCalcsConstants(parameters):
+
+    #********************************************************************#
+    # Purpose: To assemble the DataFrame of component-based constants   #
+    #          (rows: cov, cov_D, design life) from the *_constants     #
+    #          lists of the parameters module.                          #
+    #********************************************************************#
+    # Columns are labelled like the Pronto codes in Eszter's data output, so
+    # the theme calculations (factors.ComputeThemeFactors) can look up each
+    # theme's constants by its Pronto code column name.
+    df_reliability_calcs_constants = pd.DataFrame() # Initialize the Pandas DataFrame to hold all of the component-based constants.
+    df_reliability_calcs_constants['ANCHOR_CD'] = parameters.anchor_constants
+    df_reliability_calcs_constants['GUY_CD'] = parameters.guy_constants
+    df_reliability_calcs_constants['FOUNDATION_CD'] = parameters.foundation_constants
+    df_reliability_calcs_constants['STUB_SPLICE_CD'] = parameters.stub_splice_constants
+    df_reliability_calcs_constants['FRAME_ATTACH_CD'] = parameters.framing_attachments_constants
+    df_reliability_calcs_constants['STRUCT_ATTACH_CD'] = parameters.structure_attachments_constants
+    df_reliability_calcs_constants['CONDUCTOR_CD'] = parameters.conductor_constants
+    df_reliability_calcs_constants['OGW_CD'] = parameters.ogw_constants
+    df_reliability_calcs_constants['HARDWARE_INSUL_CD'] = parameters.hardware_insulators_constants
+    df_reliability_calcs_constants['STRUCTURE_CD'] = parameters.structure_constants
+    df_reliability_calcs_constants['CROSSARMS_CD'] = parameters.crossarms_constants
+
+    return df_reliability_calcs_constants
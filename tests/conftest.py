@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Shared pytest setup: the model modules are flat top-level files of
+the repository root, which is put on sys.path here, and the small synthetic
+fleet and model inputs the tests run on.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fleet
+import model
+import tables
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+N_STRUCTURES = 300
+SEED = 3
+
+#-----------------------------------------------------------------------------#
+#                               FIXTURES                                      #
+#-----------------------------------------------------------------------------#
+
+@pytest.fixture(scope='session')
+def model_parameters():
+    # Placeholder parameter set (tables.SYNTHETIC_PARAMETERS).
+    return model.SyntheticParameters()
+
+
+@pytest.fixture
+def small_fleet():
+    # Structure query rows of a small synthetic fleet (a fresh copy per test).
+    return fleet.GenerateFleet(N_STRUCTURES, SEED)
+
+
+@pytest.fixture
+def fleet_sqlite(tmp_path):
+    # The small fleet as a SQLite data source (CSV_Structure and CSV_TLine).
+    path = str(tmp_path / 'fleet.sqlite')
+    fleet.WriteFleetSQLite(path, N_STRUCTURES, SEED)
+    return path
+
+
+@pytest.fixture
+def run_model(tmp_path, monkeypatch, fleet_sqlite):
+    # Runs model.RunModel on fleet_sqlite in its own directory (name) and
+    # returns the run record and the structure and line csv outputs
+    # without their DATETIME column.
+    def RunInDirectory(name, **settings):
+        directory = tmp_path / name
+        directory.mkdir()
+        monkeypatch.chdir(directory)
+        run_record = model.RunModel(dict({'data_source': 'sqlite', 'filename_sqlite': fleet_sqlite, 'filename_metrics': None}, **settings),
+                                    tables.SYNTHETIC_PARAMETERS)
+        df_output = pd.read_csv(model.FILENAME_CSV, index_col=0).drop(columns='DATETIME')
+        df_line_output = pd.read_csv(model.FILENAME_LINE_CSV, index_col=0).drop(columns='DATETIME')
+        return run_record, df_output, df_line_output
+
+    return RunInDirectory
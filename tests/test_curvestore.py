@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: The memory-mapped p_f curve store (curvestore.py): a store written
+chunk by chunk reads back every curve by SAP_EQUIP_ID and STRUCTURE_NO, and
+unknown IDs are reported together.
+"""
+
+import numpy as np
+import pytest
+
+import curvestore
+import fragility
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+WSPEEDS = fragility.WindSpeedGrid(0, 120, 5)
+CHUNK_BOUNDS = [0, 1, 37, 150, 300]
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+@pytest.fixture
+def curve_store(small_fleet, tmp_path):
+    # A store of random curves for the small fleet, written in uneven chunks.
+    prob_fail = np.random.default_rng(0).uniform(size=(len(small_fleet), len(WSPEEDS)))
+    path = str(tmp_path / 'store')
+    writer = curvestore.OpenCurveStoreWriter(path, WSPEEDS)
+    for start, stop in zip(CHUNK_BOUNDS[:-1], CHUNK_BOUNDS[1:]):
+        curvestore.WriteCurveChunk(writer, small_fleet.iloc[start:stop], prob_fail[start:stop])
+    assert curvestore.CloseCurveStoreWriter(writer) == len(small_fleet)
+
+    return curvestore.LoadCurveStore(path), prob_fail
+
+
+def test_lookup_by_sap_equip_id(curve_store, small_fleet):
+    store, prob_fail = curve_store
+    positions = [299, 0, 37, 36, 150]
+    ids = small_fleet['SAP_EQUIP_ID'].to_numpy()[positions]
+
+    df_curves = curvestore.LookupCurves(store, ids)
+
+    np.testing.assert_array_equal(store['wspeeds'], WSPEEDS)
+    assert list(df_curves.index) == list(ids)
+    np.testing.assert_array_equal(df_curves.to_numpy(), prob_fail[positions])
+
+
+def test_lookup_repeated_structure_no(curve_store, small_fleet):
+    store, prob_fail = curve_store
+    repeated = small_fleet['STRUCTURE_NO'][small_fleet['STRUCTURE_NO'].duplicated()].unique()[:3]
+
+    matched_ids, rows = curvestore.LookupRows(store, repeated, key='STRUCTURE_NO')
+
+    for structure_no in repeated:
+        expected = np.flatnonzero(small_fleet['STRUCTURE_NO'].to_numpy() == structure_no)
+        assert len(expected) > 1
+        np.testing.assert_array_equal(np.sort(rows[matched_ids == structure_no]), expected)
+    np.testing.assert_array_equal(curvestore.LookupCurves(store, repeated, key='STRUCTURE_NO').to_numpy(), prob_fail[rows])
+
+
+@pytest.mark.parametrize('ids, unknown', [([40000000.7], ['40000000.7']),
+                                          (['nope', 40000001], ['nope']),
+                                          ([40000001, 39999999, 40000300], ['39999999', '40000300']),
+                                          ([1e30, 40000001.0], ['1e+30'])])
+def test_unknown_sap_equip_ids(curve_store, ids, unknown):
+    store = curve_store[0]
+
+    with pytest.raises(ValueError, match="Unknown SAP_EQUIP_ID") as error:
+        curvestore.LookupRows(store, ids)
+    assert str(error.value).split(': ', 1)[1].split(', ') == unknown
+
+
+def test_whole_float_ids_are_found(curve_store):
+    store, prob_fail = curve_store
+
+    matched_ids, rows = curvestore.LookupRows(store, [40000002.0, '40000005'])
+
+    np.testing.assert_array_equal(matched_ids, [40000002, 40000005])
+    np.testing.assert_array_equal(rows, [2, 5])
+
+
+def test_unknown_key(curve_store):
+    with pytest.raises(ValueError, match="No ETGIS_ID index"):
+        curvestore.LookupRows(curve_store[0], [40000000], key='ETGIS_ID')
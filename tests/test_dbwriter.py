@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: The bulk database writer (dbwriter.py) against a SQLite file: a
+write in several chunks reads back equal, the commit replaces the target
+table, and a failed write leaves the previous table in place.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, exc, inspect
+
+import dbwriter
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+TABLE = 'test_Reliability'
+CHUNK_BOUNDS = [0, 1, 120, 250, 300]
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'reliability.db'))
+    yield engine
+    engine.dispose()
+
+
+def _OutputRows(n_rows, seed=0):
+
+    #********************************************************************#
+    # Purpose: To build output rows like df0_calculations: IDs, a label #
+    #          column, p_f columns with NaN and +-inf, and DATETIME.    #
+    #********************************************************************#
+    rng = np.random.default_rng(seed)
+    prob_fail = rng.random((n_rows, 5))
+    prob_fail[rng.random((n_rows, 5)) < 0.05] = np.nan
+    prob_fail[3, 0], prob_fail[4, 1] = np.inf, -np.inf
+    df_output = pd.DataFrame({'SAP_EQUIP_ID': np.arange(40000000, 40000000 + n_rows),
+                              'HOST_TLINE_NM': rng.choice(['LINE A', 'LINE B'], n_rows)})
+    df_output = pd.concat([df_output, pd.DataFrame(prob_fail, columns=['_%d_mph' % w for w in range(0, 25, 5)])], axis=1)
+    df_output['DATETIME'] = datetime.datetime(2020, 3, 18, 12, 0, 0)
+
+    return df_output
+
+
+def _WriteChunks(engine, df_output):
+
+    #********************************************************************#
+    # Purpose: To write df_output through a bulk writer in the chunks   #
+    #          of CHUNK_BOUNDS (batches of 50 rows) and commit it.      #
+    #********************************************************************#
+    writer = dbwriter.OpenBulkWriter(engine, TABLE, batch_rows=50)
+    for start, stop in zip(CHUNK_BOUNDS[:-1], CHUNK_BOUNDS[1:]):
+        dbwriter.WriteBulkChunk(writer, df_output.iloc[start:stop])
+
+    return dbwriter.CommitBulkWriter(writer)
+
+
+def test_chunked_write_reads_back_equal(engine):
+    df_output = _OutputRows(300)
+
+    summary = _WriteChunks(engine, df_output)
+    df_read = pd.read_sql_table(TABLE, engine)
+
+    assert summary['rows'] == 300
+    assert inspect(engine).get_table_names() == [TABLE]
+    # NaN and +-inf are stored as NULL, read back as NaN:
+    expected = df_output.copy()
+    expected.iloc[:, 2:7] = expected.iloc[:, 2:7].where(np.isfinite(expected.iloc[:, 2:7]))
+    pd.testing.assert_frame_equal(df_read, expected, check_dtype=False)
+    n_null = pd.read_sql_query('SELECT COUNT(*) FROM "%s" WHERE "_0_mph" IS NULL' % TABLE, engine).iloc[0, 0]
+    assert n_null == df_output['_0_mph'].isna().sum() + 1
+
+
+def test_commit_replaces_existing_table(engine):
+    pd.DataFrame({'OLD_COLUMN': [1, 2, 3]}).to_sql(TABLE, engine, index=False)
+    df_output = _OutputRows(300, seed=1)
+
+    _WriteChunks(engine, df_output)
+
+    df_read = pd.read_sql_table(TABLE, engine)
+    assert list(df_read.columns) == list(df_output.columns)
+    assert len(df_read) == 300
+    assert inspect(engine).get_table_names() == [TABLE]
+
+
+def test_failed_chunk_leaves_previous_table(engine):
+    df_previous = _OutputRows(10, seed=2)
+    df_previous.to_sql(TABLE, engine, index=False)
+    df_output = _OutputRows(300)
+    # A value the SQLite driver cannot bind fails the insert of the second chunk:
+    labels = list(df_output['HOST_TLINE_NM'].iloc[120:250])
+    labels[5] = {'not': 'bindable'}
+    df_bad = df_output.iloc[120:250].assign(HOST_TLINE_NM=pd.Series(labels, index=df_output.index[120:250], dtype=object))
+
+    writer = dbwriter.OpenBulkWriter(engine, TABLE)
+    dbwriter.WriteBulkChunk(writer, df_output.iloc[:120])
+    with pytest.raises(exc.StatementError):
+        dbwriter.WriteBulkChunk(writer, df_bad)
+    assert sorted(inspect(engine).get_table_names()) == [TABLE, TABLE + dbwriter.STAGING_SUFFIX]
+    dbwriter.AbortBulkWriter(writer)
+
+    assert inspect(engine).get_table_names() == [TABLE]
+    pd.testing.assert_frame_equal(pd.read_sql_table(TABLE, engine), df_previous, check_dtype=False)
+
+
+def test_column_mismatch_on_later_chunk(engine):
+    df_output = _OutputRows(300)
+
+    writer = dbwriter.OpenBulkWriter(engine, TABLE)
+    dbwriter.WriteBulkChunk(writer, df_output.iloc[:100])
+    with pytest.raises(ValueError, match='Chunk columns differ'):
+        dbwriter.WriteBulkChunk(writer, df_output.iloc[100:200].drop(columns='_5_mph'))
+    with pytest.raises(ValueError, match='Chunk columns differ'):
+        dbwriter.WriteBulkChunk(writer, df_output.iloc[100:200, ::-1])
+    dbwriter.AbortBulkWriter(writer)
+
+    assert inspect(engine).get_table_names() == []
+
+
+def test_commit_without_chunks_rejected(engine):
+    with pytest.raises(ValueError, match='Nothing was written'):
+        dbwriter.CommitBulkWriter(dbwriter.OpenBulkWriter(engine, TABLE))
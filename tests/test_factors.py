@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: The compiled MCE score lookup (factors.LookupMCEScores) against the
+per-row .loc lookup of the original script, and its batch report of unknown
+classification labels; the columnar Pronto-theme factors
+(factors.ComputeThemeFactors) against the original 'for entry' / 'for p'
+loop and its DLife_WoodSteel_* functions.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import factors
+import fleet
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+NOW_YEAR = 2020
+N_THEME_STRUCTURES = 4000       # Enough for OTHER structures next to STEEL, WOOD and UNKNOWN.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _PerRowScores(df0, df_MCE_corrosion_scores_indexed):
+
+    #********************************************************************#
+    # Purpose: The original lookup: one .loc per structure and          #
+    #          classification ('ERROR_MCE_N/A' read as NaN).            #
+    #********************************************************************#
+    looked_up = {}
+    for classification_column, score_column in factors.MCE_SCORE_COLUMNS.items():
+        scores = [df_MCE_corrosion_scores_indexed.loc[label, score_column] for label in df0[classification_column]]
+        looked_up[classification_column] = pd.to_numeric(pd.Series(scores, dtype=object), errors='coerce').to_numpy(dtype=float)
+
+    return looked_up
+
+
+def test_lookup_matches_per_row_loc(small_fleet, model_parameters):
+    looked_up = factors.LookupMCEScores(small_fleet, model_parameters['mce_scores'])
+    expected = _PerRowScores(small_fleet, model_parameters['mce_corrosion_scores'])
+
+    for classification_column in factors.MCE_SCORE_COLUMNS:
+        np.testing.assert_array_equal(looked_up[classification_column], expected[classification_column])
+
+
+def test_lookup_of_categorical_labels(small_fleet, model_parameters):
+    df0 = small_fleet.astype({column: 'category' for column in factors.MCE_SCORE_COLUMNS})
+    looked_up = factors.LookupMCEScores(df0, model_parameters['mce_scores'])
+    expected = factors.LookupMCEScores(small_fleet, model_parameters['mce_scores'])
+
+    for classification_column in factors.MCE_SCORE_COLUMNS:
+        np.testing.assert_array_equal(looked_up[classification_column], expected[classification_column])
+
+
+def test_unknown_labels_reported_in_one_batch(small_fleet, model_parameters):
+    # The per-row lookup stops with a KeyError at the first unknown label;
+    # the compiled lookup lists every unknown label of every column.
+    df0 = small_fleet
+    df0.loc[[0, 5], 'AGRICULTURE'] = ['Orchard', 'Vineyard']
+    df0.loc[7, 'AGRICULTURE'] = 'Orchard'
+    df0.loc[3, 'CORROSION_ZONE'] = 'extreme'
+
+    with pytest.raises(KeyError):
+        _PerRowScores(df0, model_parameters['mce_corrosion_scores'])
+
+    expected = {'AGRICULTURE': ['Orchard', 'Vineyard'], 'CORROSION_ZONE': ['extreme']}
+    assert factors.FindUnknownMCELabels(df0, model_parameters['mce_scores']) == expected
+    with pytest.raises(ValueError) as error:
+        factors.LookupMCEScores(df0, model_parameters['mce_scores'])
+    assert str(expected) in str(error.value)
+
+
+def test_missing_label_is_unknown(small_fleet, model_parameters):
+    df0 = small_fleet
+    df0['WETLAND_TYPE'] = df0['WETLAND_TYPE'].astype(object)
+    df0.loc[2, 'WETLAND_TYPE'] = None
+
+    assert factors.FindUnknownMCELabels(df0, model_parameters['mce_scores']) == {'WETLAND_TYPE': [None]}
+
+
+def test_duplicate_score_labels_rejected(model_parameters):
+    df_MCE_corrosion_scores_indexed = model_parameters['mce_corrosion_scores']
+    df_duplicated = pd.concat([df_MCE_corrosion_scores_indexed, df_MCE_corrosion_scores_indexed.iloc[:1]])
+
+    with pytest.raises(ValueError, match='Duplicate MCE corrosion score labels'):
+        factors.CompileMCEScores(df_duplicated)
+
+
+def _PerRowDesignLifeAdjustment(entry, outage, wear_fatigue, splice_density, soil_corrosivity, atmospheric_corrosivity):
+
+    #********************************************************************#
+    # Purpose: The design life adjustment of the original              #
+    #          DLife_WoodSteel_* function called for entry, one        #
+    #          structure at a time.                                    #
+    #********************************************************************#
+    if entry == 'CONDUCTOR_CD':
+        if outage < 0:
+            return (1-math.sqrt(wear_fatigue**2 + splice_density**2 + atmospheric_corrosivity**2))*(1-outage)
+        return 1-math.sqrt(wear_fatigue**2 + splice_density**2 + atmospheric_corrosivity**2 + outage**2)
+    if entry == 'ANCHOR_CD':
+        if outage < 0:
+            return (1-soil_corrosivity)*(1-outage)
+        return 1-math.sqrt(soil_corrosivity**2 + outage**2)
+    if entry == 'GUY_CD':
+        if outage < 0:
+            return (1-atmospheric_corrosivity)*(1-outage)
+        return 1-math.sqrt(atmospheric_corrosivity**2 + outage**2)
+    if entry in ('OGW_CD', 'HARDWARE_INSUL_CD'):
+        if outage < 0:
+            return 1-math.sqrt(soil_corrosivity**2 + atmospheric_corrosivity**2)*(1-outage)
+        return 1-math.sqrt(soil_corrosivity**2 + atmospheric_corrosivity**2 + outage**2)
+    if entry in ('FOUNDATION_CD', 'STRUCTURE_CD'):
+        if outage < 0:
+            return (1-math.sqrt(wear_fatigue**2 + soil_corrosivity**2 + atmospheric_corrosivity**2))*(1-outage)
+        return 1-math.sqrt(wear_fatigue**2 + soil_corrosivity**2 + atmospheric_corrosivity**2 + outage**2)
+    if outage < 0:
+        return (1-math.sqrt(wear_fatigue**2 + atmospheric_corrosivity**2))*(1-outage)
+    return 1-math.sqrt(wear_fatigue**2 + atmospheric_corrosivity**2 + outage**2)
+
+
+def _PerRowThemeFactors(df0, model_parameters, now_year):
+
+    #********************************************************************#
+    # Purpose: The original 'for entry' / 'for p' loop: WOOD reads the #
+    #          renamed theme, and the UNKNOWN/OTHER branch tests       #
+    #          entry == 'GUY', so GUY_CD takes the all-others formula. #
+    #********************************************************************#
+    df_reliability_calcs_constants = model_parameters['reliability_calcs_constants']
+    r_spl, r_cor = model_parameters['r_spl'], model_parameters['r_cor']
+    scores = _PerRowScores(df0, model_parameters['mce_corrosion_scores'])
+    rows = df0.to_dict('records')
+
+    columns = {}
+    for entry in model_parameters['steel_pronto_themes']:
+        values = {'des_life_adjustment': [], 'des_life_adjusted': [], 'strength_ratio': [], 'design_ratio': [], 'cov': []}
+        for p, row in enumerate(rows):
+            outage = -row['OUTAGE_DESIGNLIFE_MOD']
+            splice_density = min(row['SPLICES']/5*r_spl, r_spl)
+            soil_corrosivity = float(max(scores['AGRICULTURE'][p], scores['WETLAND_TYPE'][p]))/2*r_cor
+            if math.isnan(soil_corrosivity):
+                soil_corrosivity = 0
+            atmospheric_corrosivity = float(max(scores['WETLAND_TYPE'][p], scores['CORROSION_ZONE'][p]))/2*r_cor
+            if math.isnan(atmospheric_corrosivity):
+                atmospheric_corrosivity = 0
+
+            if row['MATERIAL_FLAG'] == 'WOOD':
+                entry_row = {'FOUNDATION_CD': 'STRUCTURE_CD', 'STRUCT_ATTACH_CD': 'FRAME_ATTACH_CD', 'STUB_SPLICE_CD': 'CROSSARMS_CD'}.get(entry, entry)
+                formula_entry = entry_row
+            elif row['MATERIAL_FLAG'] == 'STEEL':
+                entry_row = formula_entry = entry
+            else:
+                entry_row = entry
+                formula_entry = 'ALL_OTHERS' if entry == 'GUY_CD' else entry
+
+            AGE_YEARS = now_year - row['INSTALLED_YEAR']
+            design_life_adjustment = _PerRowDesignLifeAdjustment(formula_entry, outage, row['WEAR_FATIGUE_RED_FAC'], splice_density,
+                                                                 soil_corrosivity, atmospheric_corrosivity)
+            design_life_adjusted = df_reliability_calcs_constants.loc[2, entry_row]*design_life_adjustment
+            cov = df_reliability_calcs_constants.loc[0, entry_row] + (df_reliability_calcs_constants.loc[1, entry_row] - df_reliability_calcs_constants.loc[0, entry_row])*(AGE_YEARS**2/design_life_adjusted**2)
+
+            code = row[entry_row]
+            if code == 0 or math.isnan(code):
+                strength_ratio = 1
+            elif code == 2:
+                strength_ratio = 0.92
+            else:
+                strength_ratio = 1 - ((code-1)/6)
+
+            values['des_life_adjustment'].append(design_life_adjustment)
+            values['des_life_adjusted'].append(design_life_adjusted)
+            values['strength_ratio'].append(strength_ratio)
+            values['design_ratio'].append(1)
+            values['cov'].append(cov)
+        for name, column in values.items():
+            columns[entry + '_' + name] = column
+
+    return pd.DataFrame(columns, index=df0.index)
+
+
+def test_theme_factors_match_per_row_loop(model_parameters):
+    df0 = fleet.GenerateFleet(N_THEME_STRUCTURES, 3)
+    assert set(df0['MATERIAL_FLAG']) == {'STEEL', 'WOOD', 'UNKNOWN', 'OTHER'}
+
+    df_theme_factors = factors.ComputeThemeFactors(df0, model_parameters['reliability_calcs_constants'], model_parameters['mce_scores'],
+                                                   model_parameters['steel_pronto_themes'], NOW_YEAR,
+                                                   model_parameters['r_spl'], model_parameters['r_cor'])
+
+    pd.testing.assert_frame_equal(df_theme_factors, _PerRowThemeFactors(df0, model_parameters, NOW_YEAR), check_exact=True)
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Equivalence of the closed-form lognormal CDF backend with the
+scipy.stats.lognorm backend of fragility.ComputeProbabilityFailureMatrix, of
+the sweep with CDF tables (fragility.TabulateCDF) with the per-structure
+CDFs, of the threshold crossing speeds (fragility.ComputeCrossingWindSpeeds) with a
+per-structure root search on the original p_f expression, and p_f at
+forecast wind speeds (fragility.ComputeForecastProbabilityFailure).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import brentq
+from scipy.stats import lognorm
+
+import fragility
+import model
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+WSPEEDS = fragility.WindSpeedGrid()
+STRENGTH_RATIOS = [1, 0.92, 5/6, 0.5, 1/3]     # ComputeStrengthRatio of Pronto codes 0-5.
+THRESHOLDS = [0.01, 0.1, 0.5, 0.9, 0.99]
+N_CROSSING_STRUCTURES = 40                      # Structures checked with the per-structure root search.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _ComponentParameters(mean, stddev):
+
+    #********************************************************************#
+    # Purpose: To give every component the same mean_/stddev_ arrays.   #
+    #********************************************************************#
+    component_parameters = {}
+    for component in fragility.COMPONENTS:
+        component_parameters['mean_' + component] = np.asarray(mean, dtype=float)
+        component_parameters['stddev_' + component] = np.asarray(stddev, dtype=float)
+
+    return component_parameters
+
+
+def _RandomParameters(n_structures, mu, seed=0):
+
+    #********************************************************************#
+    # Purpose: To draw per-component parameters as the model forms      #
+    #          them: mean = strength_ratio*mu, stddev = mean*cov with   #
+    #          cov in 0.05-2.                                           #
+    #********************************************************************#
+    rng = np.random.default_rng(seed)
+    component_parameters = {}
+    for component in fragility.COMPONENTS:
+        mean = rng.choice(STRENGTH_RATIOS, n_structures)*mu
+        component_parameters['mean_' + component] = mean
+        component_parameters['stddev_' + component] = mean*rng.uniform(0.05, 2, n_structures)
+
+    return component_parameters
+
+
+def _AssertBackendsAgree(wspeeds, component_parameters):
+
+    #********************************************************************#
+    # Purpose: To compare the p_f of both CDF backends.                 #
+    #********************************************************************#
+    prob_fail_closed_form = fragility.ComputeProbabilityFailureMatrix(wspeeds, component_parameters, backend='closed_form')
+    prob_fail_scipy = fragility.ComputeProbabilityFailureMatrix(wspeeds, component_parameters, backend='scipy')
+
+    np.testing.assert_array_equal(np.isnan(prob_fail_closed_form), np.isnan(prob_fail_scipy))
+    np.testing.assert_allclose(prob_fail_closed_form, prob_fail_scipy, rtol=0, atol=1e-15)
+
+    return prob_fail_closed_form
+
+
+@pytest.mark.parametrize('mu', [0.5, 4.4, 4.6, 20, 100])
+def test_backends_agree_on_model_parameter_ranges(mu):
+    _AssertBackendsAgree(WSPEEDS, _RandomParameters(500, mu))
+
+
+def test_backends_agree_on_fractional_grid():
+    _AssertBackendsAgree(fragility.WindSpeedGrid(0, 120, 0.25), _RandomParameters(200, 4.6, seed=1))
+
+
+def test_backends_agree_on_invalid_shapes():
+    # s <= 0 is an invalid lognormal shape: NaN in both backends.
+    prob_fail = _AssertBackendsAgree(WSPEEDS, _ComponentParameters([0.0, -1.0, 4.6], [0.5, 0.5, 0.5]))
+    assert np.isnan(prob_fail[:2]).all()
+    assert not np.isnan(prob_fail[2]).any()
+
+
+def test_backends_agree_on_nan_parameters():
+    prob_fail = _AssertBackendsAgree(WSPEEDS, _ComponentParameters([np.nan, 4.6, 4.6], [0.5, np.nan, 0.5]))
+    assert np.isnan(prob_fail[:2]).all()
+    assert not np.isnan(prob_fail[2]).any()
+
+
+def test_backends_agree_at_and_below_loc():
+    # Wind speeds x <= loc have CDF 0, so p_f is 0 there.
+    loc = np.array([10.0, 60.0, 120.0])
+    prob_fail = _AssertBackendsAgree(WSPEEDS, _ComponentParameters([4.6, 4.6, 4.6], loc))
+    assert (prob_fail[WSPEEDS[np.newaxis, :] <= loc[:, np.newaxis]] == 0).all()
+    assert (prob_fail[WSPEEDS[np.newaxis, :] > loc[:, np.newaxis]] > 0).all()
+
+
+def test_backends_agree_on_negative_loc():
+    prob_fail = _AssertBackendsAgree(WSPEEDS, _ComponentParameters([4.6, 0.5, 100], [-0.5, -2.0, -10.0]))
+    assert (prob_fail > 0).all()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match='Unknown CDF backend'):
+        fragility.ComputeProbabilityFailureMatrix(WSPEEDS, _RandomParameters(5, 4.6), backend='erf')
+
+
+def _RepeatedParameters(n_structures, seed=0):
+
+    #********************************************************************#
+    # Purpose: To draw per-component parameters from a few pairs, as   #
+    #          structures of the same age and codes share them, with   #
+    #          NaN, invalid shapes and loc above the grid among them.  #
+    #********************************************************************#
+    pairs = np.array([[4.6, 0.5], [4.4, 1.3], [2.3, 0.45], [1.53, 9.4], [4.6, 130.0], [np.nan, 0.5], [4.6, np.nan], [0.0, 0.5], [-1.0, 2.0]])
+    rng = np.random.default_rng(seed)
+    component_parameters = {}
+    for component in fragility.COMPONENTS:
+        chosen = pairs[rng.integers(len(pairs), size=n_structures)]
+        component_parameters['mean_' + component] = chosen[:, 0]
+        component_parameters['stddev_' + component] = chosen[:, 1]
+
+    return component_parameters
+
+
+@pytest.mark.parametrize('backend', ['closed_form', 'scipy'])
+def test_cdf_tables_match_per_structure_cdfs(backend):
+    component_parameters = _RepeatedParameters(1000)
+    cdf_parameters = fragility.PrepareCDFParameters(component_parameters, backend)
+    rows = slice(100, 1000)
+
+    cdf_tables = fragility.TabulateCDF(WSPEEDS[np.newaxis, :], cdf_parameters, rows, backend)
+    prob_fail = fragility.ComputeProbabilityFailureBlock(WSPEEDS[np.newaxis, :], cdf_parameters, rows, backend, cdf_tables)
+    prob_fail_untabulated = fragility.ComputeProbabilityFailureBlock(WSPEEDS[np.newaxis, :], cdf_parameters, rows, backend)
+
+    assert sorted(cdf_tables) == sorted(fragility.COMPONENTS)
+    assert all(len(table) <= 9 for table, _ in cdf_tables.values())
+    np.testing.assert_array_equal(prob_fail, prob_fail_untabulated)
+    np.testing.assert_array_equal(fragility.ComputeProbabilityFailureMatrix(WSPEEDS, component_parameters, backend=backend)[rows], prob_fail)
+
+
+def test_cdf_tables_left_out_for_distinct_parameters():
+    cdf_parameters = fragility.PrepareCDFParameters(_RandomParameters(500, 4.6))
+
+    assert fragility.TabulateCDF(WSPEEDS[np.newaxis, :], cdf_parameters, slice(0, 500)) == {}
+
+
+def test_chunks_match_matrix_with_cdf_tables():
+    component_parameters = _RepeatedParameters(1000, seed=1)
+    prob_fail = fragility.ComputeProbabilityFailureMatrix(WSPEEDS, component_parameters)
+    memory_budget_bytes = 300*len(WSPEEDS)*8*fragility.ARRAYS_PER_CELL
+
+    for rows, prob_fail_chunk in fragility.IterProbabilityFailureChunks(WSPEEDS, component_parameters, memory_budget_bytes):
+        assert rows.stop - rows.start <= 300
+        np.testing.assert_array_equal(prob_fail_chunk, prob_fail[rows])
+
+
+def _PerRowProbabilityFailure(wspeed, row):
+
+    #********************************************************************#
+    # Purpose: The original p_f expression of one structure at one      #
+    #          wind speed, one scipy.stats.lognorm.cdf per component.   #
+    #********************************************************************#
+    cdf = [lognorm.cdf(wspeed, row['mean_' + component], row['stddev_' + component]) for component in fragility.COMPONENTS]
+
+    return ((1 - np.prod([1 - c for c in cdf])) + np.maximum.reduce(cdf))/2
+
+
+def _PerRowCrossing(row, threshold):
+
+    #********************************************************************#
+    # Purpose: The crossing speed of one structure by a scalar root     #
+    #          search, with the conventions of                          #
+    #          ComputeCrossingWindSpeeds (wspeed_min when already       #
+    #          reached, NaN when not reached by wspeed_max).            #
+    #********************************************************************#
+    def Excess(wspeed):
+        return _PerRowProbabilityFailure(wspeed, row) - threshold
+
+    if Excess(fragility.CROSSING_WSPEED_MIN) >= 0:
+        return fragility.CROSSING_WSPEED_MIN
+    if Excess(fragility.CROSSING_WSPEED_MAX) < 0:
+        return np.nan
+    return brentq(Excess, fragility.CROSSING_WSPEED_MIN, fragility.CROSSING_WSPEED_MAX, xtol=1e-10)
+
+
+def test_crossing_speeds_match_per_row_root_search(small_fleet, model_parameters):
+    df0 = model.ComputeDistributionParams(model.ComputeFactors(small_fleet, model_parameters), model_parameters)
+    df0 = df0.iloc[:N_CROSSING_STRUCTURES]
+
+    crossing = fragility.ComputeCrossingWindSpeeds(fragility.ComponentParameters(df0), THRESHOLDS)
+    expected = np.array([[_PerRowCrossing(row, threshold) for threshold in THRESHOLDS] for _, row in df0.iterrows()])
+
+    assert np.isfinite(expected).any() and np.isnan(expected).any()
+    np.testing.assert_array_equal(np.isnan(crossing), np.isnan(expected))
+    np.testing.assert_allclose(crossing, expected, rtol=0, atol=10*fragility.CROSSING_WSPEED_TOL)
+
+
+def test_crossing_speeds_are_non_decreasing_in_threshold(small_fleet, model_parameters):
+    df0 = model.ComputeDistributionParams(model.ComputeFactors(small_fleet, model_parameters), model_parameters)
+    crossing = fragility.ComputeCrossingWindSpeeds(fragility.ComponentParameters(df0), THRESHOLDS)
+
+    reached = np.isfinite(crossing)
+    assert (np.diff(np.where(reached, crossing, np.inf), axis=1) >= 0).all()
+
+
+def test_crossing_thresholds_outside_zero_one_rejected():
+    with pytest.raises(ValueError, match='strictly between 0 and 1'):
+        fragility.ComputeCrossingWindSpeeds(_RandomParameters(5, 4.6), [0.5, 1.0])
+
+
+def test_forecast_probability_failure_matches_grid(small_fleet, model_parameters):
+    df0 = model.ComputeDistributionParams(model.ComputeFactors(small_fleet, model_parameters), model_parameters)
+    forecast_wspeeds = np.arange(60, 75, dtype=float)
+    df_forecast = pd.DataFrame({'SAP_EQUIP_ID': df0['SAP_EQUIP_ID'].iloc[:15].to_numpy()[::-1], fragility.FORECAST_WSPEED_COLUMN: forecast_wspeeds})
+
+    df_result = fragility.ComputeForecastProbabilityFailure(df0, df_forecast)
+    prob_fail = fragility.ComputeProbabilityFailureMatrix(forecast_wspeeds, fragility.ComponentParameters(df0.iloc[:15]))
+
+    np.testing.assert_array_equal(df_result['p_f_forecast'].to_numpy()[:15], np.fliplr(prob_fail).diagonal())
+    assert df_result.iloc[15:].isna().all().all()
+
+
+def test_forecast_probability_failure_with_empty_forecast_table(small_fleet, model_parameters):
+    df0 = model.ComputeDistributionParams(model.ComputeFactors(small_fleet, model_parameters), model_parameters)
+    df_forecast = pd.DataFrame({'SAP_EQUIP_ID': pd.Series([], dtype=object), fragility.FORECAST_WSPEED_COLUMN: pd.Series([], dtype=float)})
+
+    df_result = fragility.ComputeForecastProbabilityFailure(df0, df_forecast)
+
+    assert df_result.index.equals(df0.index)
+    assert df_result.isna().all().all()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Incremental re-scoring (incremental.py through model.RunModel):
+cache hits and misses, and outputs identical to a full run.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+CHANGED_ROWIDS = [1, 2, 50, 51, 52, 120, 299, 300]
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _ChangeStructures(path, rowids):
+
+    #********************************************************************#
+    # Purpose: To change the input row of the structures rowids of the  #
+    #          SQLite fleet (installed five years earlier).             #
+    #********************************************************************#
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("UPDATE CSV_Structure SET INSTALLED_YEAR = INSTALLED_YEAR - 5 WHERE rowid IN (%s)" % ",".join(map(str, rowids)))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def test_unchanged_structures_are_cache_hits(run_model, fleet_sqlite, tmp_path):
+    filename_cache = str(tmp_path / 'cache.pkl')
+
+    run_record = run_model('first', filename_incremental_cache=filename_cache)[0]
+    assert run_record['info']['structures'] == 300
+    assert run_record['info']['recalculated'] == 300
+
+    _ChangeStructures(fleet_sqlite, CHANGED_ROWIDS)
+    run_record, df_output, df_line_output = run_model('incremental', filename_incremental_cache=filename_cache)
+    assert run_record['info']['structures'] == 300
+    assert run_record['info']['recalculated'] == len(CHANGED_ROWIDS)
+
+    _, df_output_full, df_line_output_full = run_model('full')
+    pd.testing.assert_frame_equal(df_output, df_output_full)
+    pd.testing.assert_frame_equal(df_line_output, df_line_output_full)
+
+    run_record = run_model('repeat', filename_incremental_cache=filename_cache)[0]
+    assert run_record['info']['recalculated'] == 0
+
+
+def test_changed_parameters_invalidate_the_cache(run_model, tmp_path):
+    filename_cache = str(tmp_path / 'cache.pkl')
+
+    run_model('first', filename_incremental_cache=filename_cache)
+    run_record, df_output, _ = run_model('other_grid', filename_incremental_cache=filename_cache, wspeed_step=2)
+
+    assert run_record['info']['recalculated'] == 300
+    assert df_output.columns[-1] == '_120_mph' and '_1_mph' not in df_output.columns
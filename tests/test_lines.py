@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Line-level p_f (lines.py) against the series-system definition
+1 - prod(1 - p_f) over each line's structures, evaluated line by line, and
+chunked accumulation against the one-shot aggregation.
+"""
+
+import numpy as np
+
+import fragility
+import lines
+import model
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+WSPEEDS = fragility.WindSpeedGrid(0, 120, 5)
+CHUNK_BOUNDS = [0, 1, 37, 150, 151, 300]        # Uneven chunks, including single structures.
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _ScoredFleet(df0, model_parameters):
+
+    #********************************************************************#
+    # Purpose: To return df0 and its (structures x speeds) p_f.         #
+    #********************************************************************#
+    df_output = model.ScoreStructures(df0, model_parameters, WSPEEDS)
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in WSPEEDS]
+
+    return df_output, df_output[labels].to_numpy()
+
+
+def _PerLineProbabilityFailure(df0, prob_fail):
+
+    #********************************************************************#
+    # Purpose: 1 - prod(1 - p_f) of every line, one line at a time.     #
+    #********************************************************************#
+    line_keys = df0[lines.LINE_KEY].to_numpy()
+    return {line_key: 1 - np.prod(1 - prob_fail[line_keys == line_key], axis=0) for line_key in df0[lines.LINE_KEY].dropna().unique()}
+
+
+def test_line_p_f_is_series_system(small_fleet, model_parameters):
+    df_output, prob_fail = _ScoredFleet(small_fleet, model_parameters)
+    df_line_output = lines.ComputeLineProbabilityFailure(df_output, prob_fail, WSPEEDS)
+    expected = _PerLineProbabilityFailure(df_output, prob_fail)
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in WSPEEDS]
+
+    assert list(df_line_output.index) == list(expected)
+    np.testing.assert_allclose(df_line_output[labels].to_numpy(), np.array(list(expected.values())), rtol=1e-12, atol=1e-15)
+    np.testing.assert_array_equal(df_line_output['N_STRUCTURES'].to_numpy(),
+                                  df_output[lines.LINE_KEY].value_counts(sort=False).loc[df_line_output.index].to_numpy())
+
+
+def test_chunked_accumulation_matches_one_shot(small_fleet, model_parameters):
+    df_output, prob_fail = _ScoredFleet(small_fleet, model_parameters)
+    df_line_output = lines.ComputeLineProbabilityFailure(df_output, prob_fail, WSPEEDS)
+
+    line_totals = None
+    for start, stop in zip(CHUNK_BOUNDS[:-1], CHUNK_BOUNDS[1:]):
+        line_totals = lines.AccumulateLineLogSurvival(line_totals, df_output.iloc[start:stop], prob_fail[start:stop])
+    df_line_chunked = lines.LineProbabilityFailureFrame(line_totals[1], line_totals[0], WSPEEDS)
+
+    assert list(df_line_chunked.index) == list(df_line_output.index)
+    np.testing.assert_array_equal(df_line_chunked['N_STRUCTURES'].to_numpy(), df_line_output['N_STRUCTURES'].to_numpy())
+    np.testing.assert_allclose(df_line_chunked.drop(columns=[lines.LINE_NAME, 'N_STRUCTURES']).to_numpy(),
+                               df_line_output.drop(columns=[lines.LINE_NAME, 'N_STRUCTURES']).to_numpy(), rtol=1e-12, atol=1e-15)
+
+
+def test_structures_without_line_key_are_left_out(small_fleet, model_parameters):
+    df_output, prob_fail = _ScoredFleet(small_fleet, model_parameters)
+    df_output[lines.LINE_KEY] = df_output[lines.LINE_KEY].astype(object)
+    df_output.loc[:9, lines.LINE_KEY] = None
+
+    df_line_output = lines.ComputeLineProbabilityFailure(df_output, prob_fail, WSPEEDS)
+    expected = _PerLineProbabilityFailure(df_output, prob_fail)
+
+    assert df_line_output['N_STRUCTURES'].sum() == len(df_output) - 10
+    np.testing.assert_allclose(df_line_output.loc[list(expected), fragility.ProbabilityFailureLabel(WSPEEDS[-1])].to_numpy(),
+                               [values[-1] for values in expected.values()], rtol=1e-12, atol=1e-15)
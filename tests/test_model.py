@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Whole runs of model.RunModel: a run streamed in sql_chunksize row
+chunks, or with its p_f sweep split across worker processes, writes the same
+structure and line outputs as the serial unchunked run, and a forecast run
+accepts an empty forecast table.
+"""
+
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import fragility
+import model
+import parallel
+import tables
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+@pytest.mark.parametrize('sql_chunksize', [1000, 100, 70])
+def test_chunked_run_equals_unchunked_run(run_model, sql_chunksize):
+    run_record, df_output, df_line_output = run_model('unchunked')
+    run_record_chunked, df_output_chunked, df_line_output_chunked = run_model('chunked', sql_chunksize=sql_chunksize)
+
+    assert run_record_chunked['info']['structures'] == run_record['info']['structures'] == 300
+    pd.testing.assert_frame_equal(df_output_chunked, df_output)
+    pd.testing.assert_frame_equal(df_line_output_chunked, df_line_output)
+
+
+def test_forecast_run_with_empty_forecast_table(fleet_sqlite, tmp_path, monkeypatch):
+    # A forecast cycle with no rows is valid input: every structure is written without a forecast.
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'forecast.csv').write_text("SAP_EQUIP_ID,%s\n" % fragility.FORECAST_WSPEED_COLUMN)
+
+    run_record = model.RunModel({'data_source': 'sqlite', 'filename_sqlite': fleet_sqlite, 'filename_metrics': None,
+                                 'filename_forecast': 'forecast.csv'}, tables.SYNTHETIC_PARAMETERS)
+    df_output = pd.read_csv(model.FILENAME_FORECAST_CSV, index_col=0)
+
+    assert run_record['info']['structures'] == len(df_output) == 300
+    assert df_output[fragility.FORECAST_WSPEED_COLUMN].isna().all()
+    assert df_output['p_f_forecast'].isna().all()
+
+
+@pytest.mark.skipif(parallel.START_METHOD not in multiprocessing.get_all_start_methods(),
+                    reason="needs the '%s' start method" % parallel.START_METHOD)
+def test_parallel_run_equals_serial_run(run_model):
+    _, df_output, df_line_output = run_model('serial')
+    _, df_output_parallel, df_line_output_parallel = run_model('parallel', workers=2, sql_chunksize=100)
+
+    pd.testing.assert_frame_equal(df_output_parallel, df_output)
+    pd.testing.assert_frame_equal(df_line_output_parallel, df_line_output)
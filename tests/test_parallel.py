@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: The process-pool p_f sweep (parallel.py) against the serial sweep
+(fragility.ComputeProbabilityFailureMatrix). Needs the 'fork' start method.
+"""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import fragility
+import model
+import parallel
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+WSPEEDS = fragility.WindSpeedGrid()
+
+pytestmark = pytest.mark.skipif(parallel.START_METHOD not in multiprocessing.get_all_start_methods(),
+                                reason="needs the '%s' start method" % parallel.START_METHOD)
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+@pytest.fixture
+def pool():
+    pool = parallel.StartPool(2, 300, len(WSPEEDS))
+    yield pool
+    parallel.ClosePool(pool)
+
+
+def test_parallel_matrix_equals_serial(pool, small_fleet, model_parameters):
+    df0 = model.ComputeDistributionParams(model.ComputeFactors(small_fleet, model_parameters), model_parameters)
+    component_parameters = fragility.ComponentParameters(df0)
+
+    prob_fail_serial = fragility.ComputeProbabilityFailureMatrix(WSPEEDS, component_parameters)
+    # Small blocks, so the rows are split into several tasks across both workers:
+    prob_fail = parallel.ComputeProbabilityFailureMatrixParallel(pool, WSPEEDS, component_parameters, block_rows=32)
+    # A smaller chunk reuses the shared blocks:
+    prob_fail_part = parallel.ComputeProbabilityFailureMatrixParallel(
+        pool, WSPEEDS, {name: values[:101] for name, values in component_parameters.items()})
+
+    np.testing.assert_array_equal(prob_fail, prob_fail_serial)
+    np.testing.assert_array_equal(prob_fail_part, prob_fail_serial[:101])
+
+
+def test_chunk_larger_than_pool_rejected(pool, small_fleet, model_parameters):
+    df0 = model.ComputeDistributionParams(model.ComputeFactors(small_fleet, model_parameters), model_parameters)
+    component_parameters = fragility.ComponentParameters(df0)
+
+    with pytest.raises(ValueError, match='does not fit the pool'):
+        parallel.ComputeProbabilityFailureMatrixParallel(pool, WSPEEDS, {name: np.r_[values, values[:1]] for name, values in component_parameters.items()})
+    with pytest.raises(ValueError, match='does not fit the pool'):
+        parallel.ComputeProbabilityFailureMatrixParallel(pool, WSPEEDS[:-1], component_parameters)
+
+
+def test_single_worker_runs_serially():
+    assert parallel.StartPool(1, 300, len(WSPEEDS)) is None
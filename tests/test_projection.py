@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: The multi-year aging projection (projection.py) against one model
+run per year (model.ScoreStructures with now set to that year).
+"""
+
+import numpy as np
+import pytest
+
+import fragility
+import model
+import projection
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+NOW_YEAR = 2020
+YEARS_AHEAD = 3
+WSPEEDS = fragility.WindSpeedGrid(0, 120, 5)
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def test_each_year_matches_a_run_at_that_year(small_fleet, model_parameters):
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in WSPEEDS]
+    years = projection.ProjectionYears(NOW_YEAR, YEARS_AHEAD)
+    # A small memory budget, so the projection runs in several row chunks:
+    prob_fail = projection.ProjectProbabilityFailure(small_fleet, model_parameters, years, WSPEEDS, memory_budget_mb=0.1)
+    df_summary = projection.RunAgingProjection(small_fleet, model_parameters, YEARS_AHEAD, WSPEEDS, NOW_YEAR)
+
+    np.testing.assert_array_equal(years, [2021, 2022, 2023])
+    assert prob_fail.shape == (YEARS_AHEAD, len(small_fleet), len(WSPEEDS))
+    for i, year in enumerate(years):
+        prob_fail_run = model.ScoreStructures(small_fleet, model_parameters, WSPEEDS, now_year=year)[labels].to_numpy()
+        np.testing.assert_array_equal(prob_fail[i], prob_fail_run)
+
+        df_year = df_summary[df_summary['year'] == year]
+        assert (df_year['years_ahead'] == i + 1).all()
+        np.testing.assert_array_equal(df_year['wspeed'].to_numpy(), WSPEEDS)
+        np.testing.assert_allclose(df_year['mean_p_f'].to_numpy(), np.nanmean(prob_fail_run, axis=0), rtol=0, atol=1e-14)
+        np.testing.assert_array_equal(df_year['max_p_f'].to_numpy(), np.nanmax(prob_fail_run, axis=0))
+    assert not np.array_equal(prob_fail[0], prob_fail[-1])
+
+
+def test_projection_into_caller_array(small_fleet, model_parameters, tmp_path):
+    years = projection.ProjectionYears(NOW_YEAR, YEARS_AHEAD)
+    out = np.lib.format.open_memmap(str(tmp_path / 'projection.npy'), mode='w+', shape=(YEARS_AHEAD, len(small_fleet), len(WSPEEDS)))
+
+    result = projection.ProjectProbabilityFailure(small_fleet, model_parameters, years, WSPEEDS, out=out)
+
+    assert result is out
+    np.testing.assert_array_equal(out, projection.ProjectProbabilityFailure(small_fleet, model_parameters, years, WSPEEDS))
+
+
+@pytest.mark.parametrize('shape', [(YEARS_AHEAD, 299, 25), (YEARS_AHEAD + 1, 300, 25), (YEARS_AHEAD, 300, 121)])
+def test_output_array_shape_mismatch(small_fleet, model_parameters, shape):
+    years = projection.ProjectionYears(NOW_YEAR, YEARS_AHEAD)
+
+    with pytest.raises(ValueError, match='Output array has shape'):
+        projection.ProjectProbabilityFailure(small_fleet, model_parameters, years, WSPEEDS, out=np.empty(shape))
+
+
+def test_invalid_years_rejected(small_fleet, model_parameters):
+    with pytest.raises(ValueError, match='at least one year ahead'):
+        projection.ProjectionYears(NOW_YEAR, 0)
+    with pytest.raises(ValueError, match='non-empty list of years'):
+        projection.ProjectProbabilityFailure(small_fleet, model_parameters, [], WSPEEDS)
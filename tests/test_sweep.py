@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Purpose: Batched parameter sweeps (sweep.py) against one model run per
+parameter set (model.ScoreStructures with the overrides applied).
+"""
+
+import numpy as np
+import pytest
+
+import fragility
+import model
+import sweep
+
+#-----------------------------------------------------------------------------#
+#                               CONSTANTS                                     #
+#-----------------------------------------------------------------------------#
+NOW_YEAR = 2020
+WSPEEDS = fragility.WindSpeedGrid(0, 120, 5)
+PARAMETER_SETS = [{},
+                  {'mu_steel': 5.0, 'r_cor': 0.3},
+                  {'ANCHOR_CD': [0.15, 0.35, 50.0], 'STRUCTURE_CD': [0.2, 0.45, 40.0], 'r_spl': 0.2}]
+
+#-----------------------------------------------------------------------------#
+#                               FUNCTIONS                                     #
+#-----------------------------------------------------------------------------#
+
+def _OverriddenParameters(model_parameters, parameter_set):
+
+    #********************************************************************#
+    # Purpose: To apply a parameter set to model_parameters as a model  #
+    #          run would see it: scalars replaced, and theme constants  #
+    #          replaced in a copy of the component constants table.     #
+    #********************************************************************#
+    overridden = dict(model_parameters)
+    df_constants = model_parameters['reliability_calcs_constants'].copy()
+    for name, value in parameter_set.items():
+        if name in sweep.SCALAR_PARAMETERS:
+            overridden[name] = value
+        else:
+            df_constants.loc[[0, 1, 2], name] = value
+    overridden['reliability_calcs_constants'] = df_constants
+
+    return overridden
+
+
+def test_sweep_matches_one_run_per_set(small_fleet, model_parameters):
+    labels = [fragility.ProbabilityFailureLabel(wspeed) for wspeed in WSPEEDS]
+    inputs = sweep.PrepareSweepInputs(small_fleet, model_parameters, NOW_YEAR)
+    prob_fail = np.concatenate([chunk for _, chunk in sweep.IterSweepChunks(inputs, model_parameters, PARAMETER_SETS, WSPEEDS, 2**20)], axis=1)
+    df_summary = sweep.RunParameterSweep(small_fleet, model_parameters, PARAMETER_SETS, WSPEEDS, NOW_YEAR)
+
+    assert prob_fail.shape == (len(PARAMETER_SETS), len(small_fleet), len(WSPEEDS))
+    assert list(df_summary.columns) == ['parameter_set', 'mu_steel', 'r_cor', 'r_spl', 'wspeed', 'structures', 'mean_p_f', 'max_p_f',
+                                        'expected_failures']
+    for k, parameter_set in enumerate(PARAMETER_SETS):
+        df_output = model.ScoreStructures(small_fleet, _OverriddenParameters(model_parameters, parameter_set), WSPEEDS, NOW_YEAR)
+        prob_fail_run = df_output[labels].to_numpy()
+        np.testing.assert_array_equal(prob_fail[k], prob_fail_run)
+
+        df_set = df_summary[df_summary['parameter_set'] == k]
+        np.testing.assert_array_equal(df_set['wspeed'].to_numpy(), WSPEEDS)
+        np.testing.assert_array_equal(df_set['structures'].to_numpy(), np.sum(~np.isnan(prob_fail_run), axis=0))
+        np.testing.assert_allclose(df_set['mean_p_f'].to_numpy(), np.nanmean(prob_fail_run, axis=0), rtol=0, atol=1e-14)
+        np.testing.assert_array_equal(df_set['max_p_f'].to_numpy(), np.nanmax(prob_fail_run, axis=0))
+
+    assert (df_summary.loc[df_summary['parameter_set'] == 1, 'mu_steel'] == 5.0).all()
+    assert (df_summary.loc[df_summary['parameter_set'] != 1, 'mu_steel'] == model_parameters['mu_steel']).all()
+
+
+def test_sets_differ(small_fleet, model_parameters):
+    df_summary = sweep.RunParameterSweep(small_fleet, model_parameters, PARAMETER_SETS, WSPEEDS, NOW_YEAR)
+    mean_p_f = df_summary.pivot(index='parameter_set', columns='wspeed', values='mean_p_f').to_numpy()
+
+    assert not np.array_equal(mean_p_f[0], mean_p_f[1])
+    assert not np.array_equal(mean_p_f[0], mean_p_f[2])
+
+
+@pytest.mark.parametrize('parameter_sets, message', [([{'mu_stel': 4.0}], 'Unknown sweep parameters'),
+                                                     ([{}, {'ANCHOR': [0.1, 0.3, 60]}], 'Unknown sweep parameters'),
+                                                     ([{'GUY_CD': [0.1, 0.3]}], 'must be \\[cov, cov_D, design life\\]'),
+                                                     ([], 'at least one parameter set')])
+def test_invalid_parameter_sets_rejected(small_fleet, model_parameters, parameter_sets, message):
+    with pytest.raises(ValueError, match=message):
+        sweep.RunParameterSweep(small_fleet, model_parameters, parameter_sets, WSPEEDS, NOW_YEAR)
+
+
+def test_parameter_grid():
+    parameter_sets = sweep.ParameterGrid(mu_steel=[4.0, 5.0], r_cor=[0.1, 0.2, 0.3])
+
+    assert len(parameter_sets) == 6
+    assert parameter_sets[0] == {'mu_steel': 4.0, 'r_cor': 0.1}
+    assert parameter_sets[-1] == {'mu_steel': 5.0, 'r_cor': 0.3}